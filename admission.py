@@ -0,0 +1,197 @@
+"""
+Admission control for the expensive routes
+
+Two mechanisms keep bursts from tying up every worker:
+
+  * RateLimiter: token buckets per wallet and one global bucket. A request
+    over either limit is refused at once with 429 and the time until a
+    token is available. The buckets live in SQLite, so the limits hold for
+    the whole deployment however many worker processes serve it.
+  * Stage: bounded concurrency with a bounded, time-limited wait queue in
+    front of a scarce resource (the embedding model, chain submission).
+    When the queue is full, or a request waits longer than max_wait, it is
+    refused with 503 instead of queuing without bound.
+
+Both raise Overloaded; the app turns it into a 429/503 with Retry-After.
+Rates are configured as "count/seconds" strings, e.g. "5/60" allows bursts
+of 5 and refills 5 tokens per minute; an empty string or "0" disables.
+"""
+
+import math
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+
+class Overloaded(Exception):
+    def __init__(self, status, retry_after, message):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.message = message
+
+
+def parse_rate(value):
+    """'count/seconds' -> (tokens per second, burst), or None when disabled"""
+    value = (value or "").strip()
+    if value in ("", "0"):
+        return None
+    count, _, seconds = value.partition("/")
+    count, seconds = float(count), float(seconds or 1)
+    if count <= 0 or seconds <= 0:
+        return None
+    return count / seconds, count
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, tokens, updated):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = tokens
+        self.updated = updated
+
+    def take(self, now):
+        """Consume a token; returns 0 on success, else seconds until one is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+GLOBAL_KEY = ""  # bucket row of the global limit (wallet keys are never empty)
+
+
+class RateLimiter:
+    """Token buckets in a SQLite table, so every worker process draws on the same limits"""
+
+    def __init__(self, name, per_key=None, global_rate=None, path="rate_limits.db", max_keys=10000):
+        self.name = name
+        self.per_key = parse_rate(per_key)
+        self.global_rate = parse_rate(global_rate)
+        self.path = path
+        self.max_keys = max_keys
+        self._local = threading.local()
+        if self.per_key or self.global_rate:
+            self._connect().execute("""CREATE TABLE IF NOT EXISTS buckets
+                                       (limiter TEXT NOT NULL,
+                                        key TEXT NOT NULL,
+                                        tokens REAL NOT NULL,
+                                        updated REAL NOT NULL,
+                                        PRIMARY KEY (limiter, key))""")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def check(self, key):
+        """Admit one request for key or raise Overloaded(429)"""
+        use_wallet = bool(self.per_key and key)
+        if not use_wallet and not self.global_rate:
+            return
+        # Wall clock, not monotonic: the buckets are shared between processes
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if use_wallet:
+                wait = self._take(conn, key, self.per_key, now)
+                if wait:
+                    metrics.ADMISSION_REJECTIONS.inc(limiter=self.name, reason="wallet")
+                    raise Overloaded(429, wait, "Too many requests from this wallet")
+            if self.global_rate:
+                # A global reject rolls back the wallet token too; the request was not served
+                wait = self._take(conn, GLOBAL_KEY, self.global_rate, now)
+                if wait:
+                    metrics.ADMISSION_REJECTIONS.inc(limiter=self.name, reason="global")
+                    raise Overloaded(429, wait, "The service is receiving too many requests")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _take(self, conn, key, rate, now):
+        found = conn.execute("SELECT tokens, updated FROM buckets WHERE limiter = ? AND key = ?",
+                             (self.name, key)).fetchone()
+        if found is None and key != GLOBAL_KEY:
+            self._prune(conn, rate, now)
+        per_second, burst = rate
+        tokens, updated = found or (burst, now)
+        bucket = TokenBucket(per_second, burst, tokens, updated)
+        wait = bucket.take(now)
+        conn.execute("INSERT OR REPLACE INTO buckets (limiter, key, tokens, updated) VALUES (?, ?, ?, ?)",
+                     (self.name, key, bucket.tokens, bucket.updated))
+        return wait
+
+    def _prune(self, conn, rate, now):
+        count = conn.execute("SELECT COUNT(*) FROM buckets WHERE limiter = ?", (self.name,)).fetchone()[0]
+        if count < self.max_keys:
+            return
+        # Wallets whose bucket has refilled carry no state worth keeping
+        per_second, burst = rate
+        conn.execute("DELETE FROM buckets WHERE limiter = ? AND key != ? AND tokens + (? - updated) * ? >= ?",
+                     (self.name, GLOBAL_KEY, now, per_second, burst))
+
+
+class Stage:
+    def __init__(self, name, concurrency, max_queue, max_wait):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiting = 0
+        self.service_time = 1.0  # moving average of seconds spent inside, for Retry-After
+        self._cond = threading.Condition()
+
+    def _retry_after(self):
+        return self.service_time * (self.waiting + 1) / self.concurrency
+
+    def acquire(self):
+        start = time.monotonic()
+        with self._cond:
+            if self.active >= self.concurrency:
+                if self.waiting >= self.max_queue:
+                    metrics.ADMISSION_REJECTIONS.inc(limiter=self.name, reason="queue_full")
+                    raise Overloaded(503, self._retry_after(), "The service is busy, please retry shortly")
+                self.waiting += 1
+                metrics.STAGE_WAITING.set(self.waiting, stage=self.name)
+                try:
+                    deadline = start + self.max_wait
+                    while self.active >= self.concurrency:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            metrics.ADMISSION_REJECTIONS.inc(limiter=self.name, reason="queue_timeout")
+                            raise Overloaded(503, self._retry_after(), "The service is busy, please retry shortly")
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+                    metrics.STAGE_WAITING.set(self.waiting, stage=self.name)
+            self.active += 1
+            metrics.STAGE_ACTIVE.set(self.active, stage=self.name)
+        metrics.STAGE_WAIT_DURATION.observe(time.monotonic() - start, stage=self.name)
+
+    def release(self, elapsed):
+        with self._cond:
+            self.active -= 1
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+            metrics.STAGE_ACTIVE.set(self.active, stage=self.name)
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the stage's slots for the duration of the block"""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
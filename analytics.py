@@ -0,0 +1,178 @@
+"""
+Incrementally maintained complaint analytics
+
+Counters live in a small SQLite table shared by every worker, keyed by
+(dimension, value): complaints per department, status, day and city, and
+per blockchain outcome. Each submit increments the matching counters; each
+recorded field change moves one count from the old value to the new one.
+Resolution times are kept as a running sum and count. Reading the
+dashboard is a single scan of the counter table, whose size depends on the
+number of departments/cities/days, never on the number of complaints.
+
+    python analytics.py rebuild    # recompute from complaints.csv once
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+DIMENSIONS = {
+    "department": "Department",
+    "status": "Status",
+    "city": "City",
+    "blockchain": "Blockchain Status"
+}
+FIELD_DIMENSIONS = {field: dimension for dimension, field in DIMENSIONS.items()}
+RESOLVED_STATUSES = ("Resolved", "Closed")
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _key(dimension, value):
+    value = str(value or "").strip()
+    return value.title() if dimension == "city" else value
+
+
+class AnalyticsCounters:
+    def __init__(self, path="analytics.db"):
+        self.path = path
+        self._local = threading.local()
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS counters
+                (dimension TEXT NOT NULL,
+                 value TEXT NOT NULL,
+                 count INTEGER NOT NULL DEFAULT 0,
+                 PRIMARY KEY (dimension, value)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS totals
+                (name TEXT PRIMARY KEY,
+                 value REAL NOT NULL DEFAULT 0) WITHOUT ROWID;
+        """)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _bump(conn, dimension, value, delta):
+        conn.execute("""INSERT INTO counters (dimension, value, count) VALUES (?, ?, ?)
+                        ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count""",
+                     (dimension, _key(dimension, value), delta))
+
+    @staticmethod
+    def _add_total(conn, name, delta):
+        conn.execute("""INSERT INTO totals (name, value) VALUES (?, ?)
+                        ON CONFLICT (name) DO UPDATE SET value = value + excluded.value""", (name, delta))
+
+    def _transaction(self, apply):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            apply(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def record_complaints(self, rows):
+        """Count newly stored complaints (dicts with complaint store column names)"""
+        def apply(conn):
+            for row in rows:
+                self._add_total(conn, "complaints", 1)
+                self._bump(conn, "day", str(row.get("Date", ""))[:10], 1)
+                for dimension, field in DIMENSIONS.items():
+                    self._bump(conn, dimension, row.get(field, ""), 1)
+        self._transaction(apply)
+
+    def record_complaint(self, row):
+        self.record_complaints([row])
+
+    def record_change(self, field, old_value, new_value, submitted_at=None, changed_at=None):
+        """Move one complaint between counters after a field update"""
+        dimension = FIELD_DIMENSIONS.get(field)
+        if dimension is None or _key(dimension, old_value) == _key(dimension, new_value):
+            return
+
+        def apply(conn):
+            self._bump(conn, dimension, old_value, -1)
+            self._bump(conn, dimension, new_value, 1)
+            if field == "Status" and new_value in RESOLVED_STATUSES and old_value not in RESOLVED_STATUSES:
+                try:
+                    opened = datetime.strptime(submitted_at, DATE_FORMAT)
+                    closed = datetime.strptime(changed_at, DATE_FORMAT) if changed_at else datetime.now()
+                except (TypeError, ValueError):
+                    return
+                self._add_total(conn, "resolved", 1)
+                self._add_total(conn, "resolution_seconds", (closed - opened).total_seconds())
+        self._transaction(apply)
+
+    def dashboard(self, days=30):
+        """Current aggregates as a JSON-ready dict"""
+        conn = self._connect()
+        counters = {dimension: {} for dimension in list(DIMENSIONS) + ["day"]}
+        for dimension, value, count in conn.execute("SELECT dimension, value, count FROM counters WHERE count != 0"):
+            counters.setdefault(dimension, {})[value] = count
+        totals = dict(conn.execute("SELECT name, value FROM totals"))
+
+        blockchain = counters["blockchain"]
+        settled = blockchain.get("Success", 0) + blockchain.get("Failed", 0)
+        resolved = int(totals.get("resolved", 0))
+        by_day = sorted(counters.pop("day").items())[-days:]
+        return {
+            "total_complaints": int(totals.get("complaints", 0)),
+            "by_department": counters["department"],
+            "by_status": counters["status"],
+            "by_city": counters["city"],
+            "by_day": dict(by_day),
+            "blockchain": {
+                "counts": blockchain,
+                "success_rate": round(blockchain.get("Success", 0) / settled, 4) if settled else None,
+                "failure_rate": round(blockchain.get("Failed", 0) / settled, 4) if settled else None
+            },
+            "resolution": {
+                "resolved": resolved,
+                "average_hours": round(totals["resolution_seconds"] / resolved / 3600, 2) if resolved else None
+            }
+        }
+
+
+def rebuild(counters):
+    """Recompute every counter from the local store, archive included (run once, or to repair drift)"""
+    from complaint_store import store
+
+    df = store.all_complaints()
+    conn = counters._connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DELETE FROM counters")
+        # Resolution times cannot be recovered from the CSV, so those totals are kept
+        conn.execute("INSERT OR REPLACE INTO totals (name, value) VALUES ('complaints', ?)", (len(df),))
+        grouped = {dimension: df[field] for dimension, field in DIMENSIONS.items()}
+        grouped["day"] = df["Date"].str[:10]
+        for dimension, column in grouped.items():
+            for value, count in column.map(lambda v, d=dimension: _key(d, v)).value_counts().items():
+                conn.execute("INSERT INTO counters (dimension, value, count) VALUES (?, ?, ?)",
+                             (dimension, value, int(count)))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    print(f"✅ Analytics rebuilt from {len(df)} complaints")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Complaint analytics maintenance")
+    parser.add_argument("command", choices=["rebuild", "show"])
+    parser.add_argument("--db", default="analytics.db")
+    args = parser.parse_args()
+
+    analytics = AnalyticsCounters(args.db)
+    if args.command == "rebuild":
+        rebuild(analytics)
+    else:
+        print(json.dumps(analytics.dashboard(), indent=2))
@@ -1,40 +1,73 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session
+from flask import Flask, Response, render_template, request, redirect, url_for, jsonify, session
 import pandas as pd
-import pickle
 import os
-import random
-import string
-import csv
 from datetime import datetime
 from sentence_transformers import SentenceTransformer
 from functools import wraps
-from blockchain_manager import BlockchainManager
+import threading
+import json
+import logging
+import queue
+import time
 from config import Config
+import app_logging
+import assets
+
+# Configure logging before anything else logs
+app_logging.configure_logging(Config.LOG_LEVEL, Config.LOG_FORMAT, Config.LOG_DEBUG_SAMPLE_EVERY,
+                              Config.LOG_QUEUE_SIZE, Config.LOG_LEVELS)
+logger = logging.getLogger("app")
+
+from chain_backend import create_blockchain_manager
+import metrics
+from complaint_writer import GroupCommitWriter, COMPLAINT_COLUMNS, FEEDBACK_COLUMNS, UPDATE_COLUMNS
+from complaint_store import store as complaint_store, DEFAULT_PAGE_SIZE, UPDATES_FILE
+from classifier import EmbeddingCache, rank_departments
+from reference_ids import ReferenceGenerator
+import idempotency
+from tx_watcher import TransactionWatcher, CONFIRMED, FINAL_STATES
+from vector_index import VectorIndex
+from model_registry import ModelRegistry, ModelHandle
+from search_index import SearchIndex
+from analytics import AnalyticsCounters, FIELD_DIMENSIONS
+from complaint_updates import UpdateRecorder
+from admission import RateLimiter, Stage, Overloaded
+from page_cache import PageCache, fingerprint_files
+import diagnostics
 
 app = Flask(__name__)
 app.config.from_object(Config)
+metrics.init_app(app, token=Config.METRICS_TOKEN, allowed_addresses=Config.METRICS_ALLOWED_ADDRESSES)
+app_logging.init_app(app)
+assets.init_app(app)
 
 # Load ML models with error handling
-try:
-    with open("complaint_model.pkl", "rb") as f:
-        model = pickle.load(f)
-    print("✅ ML model loaded successfully")
-except FileNotFoundError:
-    print("❌ complaint_model.pkl not found. Please run train_model.py first")
-    model = None
+model_registry = ModelRegistry(Config.MODEL_REGISTRY_DIR, Config.MODEL_KEEP_VERSIONS)
+if model_registry.current_version() is None:
+    try:
+        if model_registry.import_files():
+            logger.info("Imported complaint_model.pkl into the model registry")
+    except Exception as e:
+        # A corrupt or incompatible pickle must not keep the app from starting
+        logger.error("Could not import complaint_model.pkl into the model registry: %s", e)
+model_handle = ModelHandle(model_registry, Config.MODEL_RELOAD_INTERVAL,
+                           Config.MODEL_PUBLISH_INTERVAL, Config.MODEL_PUBLISH_BATCH)
+if model_handle.get() is None:
+    logger.error("No ML model in the registry. Please run train_model.py first")
+model_handle.start()
 
 try:
     embedding_model = SentenceTransformer("embedding_model")
-    print("✅ Embedding model loaded successfully")
+    logger.info("Embedding model loaded successfully")
 except:
-    print("❌ Embedding model loading failed. Using fallback")
+    logger.error("Embedding model loading failed. Using fallback")
     embedding_model = None
 
 try:
     dept_contacts = pd.read_csv("department_contacts.csv")
-    print("✅ Department contacts loaded successfully")
+    logger.info("Department contacts loaded successfully")
 except FileNotFoundError:
-    print("❌ department_contacts.csv not found. Creating default")
+    logger.warning("department_contacts.csv not found. Creating default")
     dept_contacts = pd.DataFrame({
         'Department': ['Water Supply', 'Electricity', 'Roads', 'Sanitation'],
         'Phone': ['+1234567890', '+1234567891', '+1234567892', '+1234567893'],
@@ -42,16 +75,130 @@ except FileNotFoundError:
     })
     dept_contacts.to_csv("department_contacts.csv", index=False)
 
-try:
-    with open("classes.pkl", "rb") as f:
-        all_departments = pickle.load(f)
-    print("✅ Department classes loaded successfully")
-except FileNotFoundError:
-    print("❌ classes.pkl not found. Using default departments")
-    all_departments = dept_contacts['Department'].tolist()
+# Chain backend selected by CHAIN_BACKEND (web3 node or in-memory simulator)
+blockchain_manager = create_blockchain_manager()
+
+# Serialized, batched appenders for the local complaint store and training feedback
+complaints_writer = GroupCommitWriter("complaints.csv", COMPLAINT_COLUMNS)
+feedback_writer = GroupCommitWriter("consumer_complaints.csv", FEEDBACK_COLUMNS)
+updates_writer = GroupCommitWriter(UPDATES_FILE, UPDATE_COLUMNS)
+
+# Full-text and faceted search for administrators, kept current on every write
+search_index = SearchIndex(Config.SEARCH_INDEX_DB)
+
+# Dashboard aggregates, updated on every submit and field change
+analytics = AnalyticsCounters(Config.ANALYTICS_DB)
+
+# Complaint embeddings partitioned by (department, city) for duplicate detection
+vector_index = VectorIndex(Config.VECTOR_INDEX_DIR)
+
+# Field changes go to the updates log, search index, analytics and vector index together
+update_recorder = UpdateRecorder(updates_writer, search_index, analytics, vector_index)
+
+def record_complaint_update(ref_no, field, value):
+    """Append a field change for a stored complaint (applied on top of complaints.csv)"""
+    previous = complaint_store.get_complaint(ref_no) if field in FIELD_DIMENSIONS else None
+    update_recorder.record(previous or {"Reference No": ref_no}, field, value)
+
+def handle_chain_outcome(event):
+    """Record the final on-chain outcome of a watched transaction in the local store"""
+    blockchain_status = "Success" if event["state"] == CONFIRMED else "Failed"
+    complaint = complaint_store.get_complaint(event["ref_no"])
+    if complaint and complaint.get("Blockchain Status") != blockchain_status:
+        record_complaint_update(event["ref_no"], "Blockchain Status", blockchain_status)
+        logger.info("Complaint transaction %s", event["state"], extra={"ref_no": event["ref_no"], "tx_hash": event["tx_hash"]})
+
+# One watcher per process follows every transaction browsers are waiting on
+tx_watcher = TransactionWatcher(
+    blockchain_manager,
+    required_confirmations=Config.REQUIRED_CONFIRMATIONS,
+    poll_interval=Config.TX_POLL_INTERVAL,
+    on_final=handle_chain_outcome
+)
+
+# Time-sortable reference numbers, unique per worker slot
+reference_generator = ReferenceGenerator(Config.REF_STATE_DIR, Config.WORKER_ID)
+
+# Deduplicates re-POSTs of the same confirmation form across workers
+idempotency_store = idempotency.IdempotencyStore(Config.IDEMPOTENCY_DB, Config.IDEMPOTENCY_TTL)
+IDEMPOTENCY_RETRY_AFTER = 5  # seconds a re-POST of a still-running submission is asked to wait
+
+def encode_texts(texts):
+    """Encode complaint texts with the embedding model, recording timing metrics"""
+    metrics.EMBEDDING_BATCH_SIZE.observe(len(texts))
+    with metrics.EMBEDDING_DURATION.time():
+        return embedding_model.encode(texts)
 
-# Initialize blockchain manager
-blockchain_manager = BlockchainManager()
+# Shared by /api/classify, /preview and /confirm so each text is encoded once
+embedding_cache = EmbeddingCache(encode_texts)
+
+# Admission control: per-wallet and global rate limits, bounded queues for the model and the chain
+submit_limiter = RateLimiter("submit", Config.SUBMIT_RATE_PER_WALLET, Config.SUBMIT_RATE_GLOBAL, Config.RATE_LIMIT_DB)
+classify_limiter = RateLimiter("classify", Config.CLASSIFY_RATE_PER_WALLET, Config.CLASSIFY_RATE_GLOBAL, Config.RATE_LIMIT_DB)
+classify_stage = Stage("classify", Config.CLASSIFY_CONCURRENCY, Config.CLASSIFY_QUEUE_SIZE, Config.CLASSIFY_QUEUE_TIMEOUT)
+chain_stage = Stage("chain", Config.CHAIN_CONCURRENCY, Config.CHAIN_QUEUE_SIZE, Config.CHAIN_QUEUE_TIMEOUT)
+
+@app.errorhandler(Overloaded)
+def handle_overloaded(e):
+    """Refuse fast with 429/503 and a Retry-After hint instead of tying up a worker"""
+    logger.warning("Request refused: %s", e.message, extra={"status": e.status})
+    headers = {"Retry-After": str(e.retry_after)}
+    if request.path.startswith("/api/"):
+        return jsonify({"error": e.message, "retry_after": e.retry_after}), e.status, headers
+    return render_template("busy.html", message=e.message, retry_after=e.retry_after), e.status, headers
+
+# Rendered /history and /track pages with ETags derived from each wallet's data version
+page_cache = PageCache(
+    fingerprint_files(os.path.join(app.root_path, app.template_folder),
+                      os.path.join(app.static_folder, "dist", "manifest.json"),
+                      "department_contacts.csv"),
+    Config.PAGE_CACHE_TTL, Config.PAGE_CACHE_MAX_BYTES
+)
+
+# Probes behind /healthz, /readyz and /api/admin/diagnostics, run concurrently and cached for a few seconds
+health = diagnostics.Diagnostics(Config.HEALTH_CACHE_TTL, Config.HEALTH_PROBE_TIMEOUT)
+health.add("rpc", diagnostics.chain_probe(blockchain_manager, Config.HEALTH_MAX_BLOCK_LAG),
+           critical=Config.HEALTH_REQUIRE_CHAIN)
+health.add("signer", diagnostics.signer_probe(blockchain_manager, Config.HEALTH_MIN_SIGNER_BALANCE), critical=False)
+health.add("model", diagnostics.model_probe(model_handle, embedding_model))
+health.add("store", diagnostics.store_probe(complaint_store, ["complaints.csv", "consumer_complaints.csv", UPDATES_FILE]))
+health.add("admission", diagnostics.admission_probe([classify_stage, chain_stage]), critical=False)
+health.add("runtime", diagnostics.runtime_probe(app_logging.dropped_records, page_cache), critical=False)
+
+def find_similar_complaints(embedding, department, city, wallet_address, exclude=()):
+    """Likely duplicates of a complaint: how many there are, with details only for the wallet's own"""
+    similar = {"count": 0, "own": []}
+    try:
+        matches = vector_index.search(embedding, department, city, top_k=Config.DUPLICATE_MAX_RESULTS,
+                                      min_score=Config.DUPLICATE_THRESHOLD, exclude=exclude)
+    except Exception as e:
+        logger.error("Duplicate search failed: %s", e)
+        return similar
+    for match in matches:
+        complaint = complaint_store.get_complaint(match["ref_no"])
+        if not complaint:
+            continue
+        similar["count"] += 1
+        # Other wallets' references and statuses are theirs alone
+        if complaint.get("Wallet Address", "").lower() == wallet_address.lower():
+            similar["own"].append({
+                "ref_no": match["ref_no"],
+                "similarity": match["score"],
+                "date": complaint.get("Date", ""),
+                "status": complaint.get("Status", "")
+            })
+    return similar
+
+# Latest /api/classify sequence number seen per wallet, used to drop stale requests
+_classify_seq = {}
+_classify_seq_lock = threading.Lock()
+
+def get_dept_info(department):
+    """Contact details for a department, with placeholders if it is unknown"""
+    dept_info = dept_contacts[dept_contacts["Department"] == department]
+    if not dept_info.empty:
+        return dept_info.iloc[0].to_dict()
+    return {"Department": department, "Phone": "N/A", "Email": "N/A"}
 
 def login_required(f):
     """Decorator to require blockchain wallet login"""
@@ -62,6 +209,27 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def rate_limited(limiter):
+    """Decorator applying a per-wallet/global rate limit (use below login_required)"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limiter.check(session['wallet_address'].lower())
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def admin_required(f):
+    """Decorator to restrict an endpoint to wallets listed in ADMIN_WALLETS"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'wallet_address' not in session:
+            return jsonify({"error": "Login required"}), 401
+        if session['wallet_address'].lower() not in Config.ADMIN_WALLETS:
+            return jsonify({"error": "Administrator access required"}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
 @app.route("/")
 def home():
     """Home page - redirect to login if not authenticated"""
@@ -103,6 +271,7 @@ def logout():
 
 @app.route("/preview", methods=["POST"])
 @login_required
+@rate_limited(classify_limiter)
 def preview_complaint():
     """Preview complaint before submission"""
     name = request.form.get("name", "").strip()
@@ -115,21 +284,22 @@ def preview_complaint():
     complaint = request.form.get("complaint", "").strip()
 
     # ML prediction with fallback
-    if model and embedding_model and complaint:
-        try:
-            complaint_embedding = embedding_model.encode([complaint])
-            predicted_dept = model.predict(complaint_embedding)[0]
-        except:
-            predicted_dept = "General"
+    similar_complaints = {"count": 0, "own": []}
+    bundle = model_handle.get()
+    if bundle and embedding_model and complaint:
+        with classify_stage.slot():
+            try:
+                complaint_embedding = embedding_cache.get(complaint)
+                predicted_dept = bundle.model.predict(complaint_embedding)[0]
+                similar_complaints = find_similar_complaints(complaint_embedding, predicted_dept, city,
+                                                             session['wallet_address'])
+            except:
+                predicted_dept = "General"
     else:
         predicted_dept = "General"
 
     # Get department info
-    dept_info = dept_contacts[dept_contacts["Department"] == predicted_dept]
-    if not dept_info.empty:
-        dept_info = dept_info.iloc[0].to_dict()
-    else:
-        dept_info = {"Department": predicted_dept, "Phone": "N/A", "Email": "N/A"}
+    dept_info = get_dept_info(predicted_dept)
 
     departments_data = dept_contacts.to_dict(orient="records")
 
@@ -138,64 +308,86 @@ def preview_complaint():
         name=name, email=email, phone=phone, address=address,
         city=city, state=state, zip=zip_code, complaint=complaint,
         dept_info=dept_info, departments_data=departments_data,
+        similar_complaints=similar_complaints,
+        idempotency_key=idempotency.new_key(),
         wallet_address=session['wallet_address']
     )
 
-@app.route("/confirm", methods=["POST"])
+@app.route("/api/classify", methods=["POST"])
 @login_required
-def confirm_complaint():
-    """Confirm and submit complaint to blockchain"""
-    # Get form data
-    complaint_data = {
-        'name': request.form.get("name", "").strip(),
-        'email': request.form.get("email", "").strip(),
-        'phone': request.form.get("phone", "").strip(),
-        'address': request.form.get("address", "").strip(),
-        'city': request.form.get("city", "").strip(),
-        'state': request.form.get("state", "").strip(),
-        'zip': request.form.get("zip", "").strip(),
-        'complaint': request.form.get("complaint", "").strip()
-    }
+@rate_limited(classify_limiter)
+def classify_complaint():
+    """Low-latency department prediction for a complaint draft"""
+    data = request.get_json(silent=True) or {}
+    complaint = str(data.get("complaint", "")).strip()[:1000]
+    top_k = max(1, min(int(data.get("top_k", 3) or 3), 10))
+    seq = data.get("seq")
+    wallet_address = session['wallet_address']
     
-    department = (request.form.get("correct_department") or request.form.get("department", "")).strip()
+    # Drop requests overtaken by a newer keystroke from the same wallet
+    if isinstance(seq, int):
+        with _classify_seq_lock:
+            if seq < _classify_seq.get(wallet_address, -1):
+                return jsonify({"stale": True, "seq": seq}), 409
+            _classify_seq[wallet_address] = seq
     
-    # Generate reference number
-    ref_no = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+    bundle = model_handle.get()
+    if not (bundle and embedding_model) or len(complaint) < 3:
+        ranked = [("General", None)]
+    else:
+        with classify_stage.slot():
+            try:
+                ranked = rank_departments(bundle.model, embedding_cache.get(complaint), top_k)
+            except Exception as e:
+                logger.error("Classification failed: %s", e)
+                return jsonify({"error": "Classification failed"}), 500
     
+    department, probability = ranked[0]
+    return jsonify({
+        "department": department,
+        "probability": probability,
+        "alternatives": [
+            {"department": dept, "probability": prob} for dept, prob in ranked[1:]
+        ],
+        "contact": get_dept_info(department),
+        "seq": seq
+    })
+
+def submit_complaint(ref_no, complaint_data, department, wallet_address):
+    """Update the model, record the complaint on chain and in the local store"""
     # Update ML model with feedback if possible
-    if model and embedding_model and complaint_data['complaint'] and department:
+    if model_handle.get() and embedding_model and complaint_data['complaint'] and department:
         try:
-            feedback_df = pd.DataFrame([[complaint_data['complaint'], department]], 
-                                     columns=["complaint_text", "product"])
-            
             # Save to CSV for future training
-            if os.path.exists("consumer_complaints.csv"):
-                feedback_df.to_csv("consumer_complaints.csv", mode="a", header=False, 
-                                 index=False, quoting=csv.QUOTE_MINIMAL)
-            else:
-                feedback_df.to_csv("consumer_complaints.csv", mode="w", header=True, 
-                                 index=False, quoting=csv.QUOTE_MINIMAL)
-            
-            # Incremental learning
-            complaint_embedding = embedding_model.encode([complaint_data['complaint']])
-            model.partial_fit(complaint_embedding, [department], classes=all_departments)
+            with metrics.STORAGE_DURATION.time(operation="append", file="consumer_complaints.csv"):
+                feedback_writer.append({
+                    "complaint_text": complaint_data['complaint'],
+                    "product": department
+                })
             
-            # Save updated model
-            with open("complaint_model.pkl", "wb") as f:
-                pickle.dump(model, f)
+            # Incremental learning, batched into registry versions shared by every worker
+            complaint_embedding = embedding_cache.get(complaint_data['complaint'])
+            model_handle.partial_fit(complaint_embedding, [department], note=ref_no)
         except Exception as e:
-            print(f"Error updating ML model: {e}")
+            logger.error("Error updating ML model: %s", e, extra={"ref_no": ref_no})
     
     # Submit to blockchain
     blockchain_result = blockchain_manager.submit_complaint_to_blockchain(
-        ref_no, complaint_data, department, session['wallet_address']  # Pass wallet address
+        ref_no, complaint_data, department, wallet_address,  # Pass wallet address
+        wait=not Config.ASYNC_CHAIN_SUBMIT
     )
+    if blockchain_result.get("tx_hash"):
+        tx_watcher.watch(ref_no, blockchain_result["tx_hash"])
+    
+    if blockchain_result.get("pending"):
+        blockchain_status = "Pending"
+    else:
+        blockchain_status = "Success" if blockchain_result["success"] else "Failed"
     
     # Save to local CSV as backup with proper wallet address mapping
-    file_exists = os.path.exists("complaints.csv")
-    df = pd.DataFrame([{
+    complaint_row = {
         "Reference No": ref_no,
-        "Wallet Address": session['wallet_address'],
+        "Wallet Address": wallet_address,
         "Name": complaint_data['name'],
         "Email": complaint_data['email'],
         "Phone": complaint_data['phone'],
@@ -207,68 +399,165 @@ def confirm_complaint():
         "Department": department,
         "Status": "Submitted",
         "Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "Blockchain Status": "Success" if blockchain_result["success"] else "Failed",
+        "Blockchain Status": blockchain_status,
         "Transaction Hash": blockchain_result.get("tx_hash", "N/A")
-    }])
+    }
     
     try:
-        df.to_csv("complaints.csv", mode="a", header=not file_exists, 
-                  index=False, quoting=csv.QUOTE_MINIMAL)
-        print(f"✅ Complaint {ref_no} saved to CSV for wallet {session['wallet_address']}")
+        with metrics.STORAGE_DURATION.time(operation="append", file="complaints.csv"):
+            complaints_writer.append(complaint_row)
+        logger.info("Complaint saved to local store", extra={"ref_no": ref_no, "wallet": wallet_address})
     except Exception as e:
-        print(f"❌ Error saving to CSV: {e}")
+        logger.error("Error saving to CSV: %s", e, extra={"ref_no": ref_no})
+    
+    try:
+        search_index.index_complaint(complaint_row)
+    except Exception as e:
+        logger.error("Error indexing complaint for search: %s", e, extra={"ref_no": ref_no})
+    try:
+        analytics.record_complaint(complaint_row)
+    except Exception as e:
+        logger.error("Error updating analytics: %s", e, extra={"ref_no": ref_no})
+    
+    # Index the embedding so later reports of the same incident are flagged
+    if embedding_model and complaint_data['complaint']:
+        try:
+            vector_index.add(ref_no, department, complaint_data['city'],
+                             embedding_cache.get(complaint_data['complaint']))
+        except Exception as e:
+            logger.error("Error indexing complaint embedding: %s", e, extra={"ref_no": ref_no})
+    
+    return blockchain_result
+
+@app.route("/confirm", methods=["POST"])
+@login_required
+def confirm_complaint():
+    """Confirm and submit complaint to blockchain"""
+    wallet_address = session['wallet_address']
+    idempotency_key = request.form.get("idempotency_key", "").strip()
+    
+    # A re-POST of an already confirmed form replays the original result
+    if idempotency_key:
+        outcome, row = idempotency_store.claim(idempotency_key, wallet_address)
+        if outcome == idempotency.MISMATCH:
+            return redirect(url_for('home'))
+        if outcome == idempotency.IN_PROGRESS:
+            row = idempotency_store.wait_for_result(idempotency_key, Config.IDEMPOTENCY_WAIT)
+            if row is None:
+                # The original request failed and released the key
+                return redirect(url_for('home'))
+            if row["result"] is None:
+                # Still running: say so instead of presenting an unfinished result as final
+                metrics.DUPLICATE_SUBMISSIONS.inc()
+                return render_template("processing.html",
+                                     ref_no=row["ref_no"],
+                                     idempotency_key=idempotency_key,
+                                     retry_after=IDEMPOTENCY_RETRY_AFTER), 202, {"Retry-After": str(IDEMPOTENCY_RETRY_AFTER)}
+        if outcome != idempotency.CLAIMED:
+            metrics.DUPLICATE_SUBMISSIONS.inc()
+            logger.info("Duplicate submission detected", extra={"ref_no": row["ref_no"]})
+            return render_template("confirmation.html", 
+                                 ref_no=row["result"]["ref_no"],
+                                 blockchain_result=row["result"]["blockchain_result"],
+                                 wallet_address=wallet_address)
+    
+    # Get form data
+    complaint_data = {
+        'name': request.form.get("name", "").strip(),
+        'email': request.form.get("email", "").strip(),
+        'phone': request.form.get("phone", "").strip(),
+        'address': request.form.get("address", "").strip(),
+        'city': request.form.get("city", "").strip(),
+        'state': request.form.get("state", "").strip(),
+        'zip': request.form.get("zip", "").strip(),
+        'complaint': request.form.get("complaint", "").strip()
+    }
+    
+    department = (request.form.get("correct_department") or request.form.get("department", "")).strip()
+    
+    # A fresh claim needs the whole form: the processing page's retry only carries the key, and
+    # must not turn into an empty complaint when the original request failed or the key expired
+    if not complaint_data['complaint'] or not department:
+        if idempotency_key:
+            idempotency_store.release(idempotency_key)
+        return redirect(url_for('home'))
+    
+    # Only new submissions are charged; duplicates were answered above from the stored result
+    try:
+        submit_limiter.check(wallet_address.lower())
+    except Overloaded:
+        if idempotency_key:
+            # Free the key so the same form can be re-POSTed after Retry-After
+            idempotency_store.release(idempotency_key)
+        raise
+    
+    # Generate reference number, skipping any legacy random ref it happens to match
+    ref_no = reference_generator.next_ref()
+    while complaint_store.ref_exists(ref_no):
+        ref_no = reference_generator.next_ref()
+    
+    # Only CHAIN_CONCURRENCY submissions run at once; the rest queue briefly or get a 503
+    if not idempotency_key:
+        with chain_stage.slot():
+            blockchain_result = submit_complaint(ref_no, complaint_data, department, wallet_address)
+    else:
+        idempotency_store.set_ref(idempotency_key, ref_no)
+        try:
+            with chain_stage.slot():
+                blockchain_result = submit_complaint(ref_no, complaint_data, department, wallet_address)
+        except Exception:
+            idempotency_store.release(idempotency_key)
+            raise
+        idempotency_store.complete(idempotency_key, {
+            "ref_no": ref_no,
+            "blockchain_result": blockchain_result
+        })
     
     return render_template("confirmation.html", 
                          ref_no=ref_no,
                          blockchain_result=blockchain_result,
-                         wallet_address=session['wallet_address'])
+                         wallet_address=wallet_address)
 
 @app.route("/track", methods=["GET", "POST"])
 @login_required
 def track_complaint():
-    """Track complaint by reference number"""
+    """Track complaint by reference number (GET ?ref_no= supports If-None-Match)"""
+    wallet_address = session['wallet_address']
+    ref_no = request.values.get("ref_no", "").strip().upper()  # Ensure uppercase
+    etag = page_cache.etag(wallet_address, complaint_store.wallet_version(wallet_address), "track", ref_no)
+    return page_cache.respond(etag, lambda: render_track_page(ref_no))
+
+def render_track_page(ref_no):
+    """Render /track; returns (html, cacheable), uncacheable if a store or chain lookup failed"""
     result = None
     blockchain_data = None
+    cacheable = True
+    rpc_errors = metrics.rpc_error_count()
     
-    if request.method == "POST":
-        ref_no = request.form.get("ref_no", "").strip().upper()  # Ensure uppercase
-        print(f"🔍 Tracking complaint: {ref_no} for wallet: {session['wallet_address']}")
+    if ref_no:
+        logger.debug("Tracking complaint", extra={"ref_no": ref_no})
         
-        # Check local CSV first for faster lookup
-        local_complaint = None
-        if os.path.exists("complaints.csv"):
-            try:
-                df = pd.read_csv("complaints.csv", quoting=csv.QUOTE_MINIMAL, on_bad_lines="skip")
-                # Convert Reference No to string to ensure proper comparison
-                df["Reference No"] = df["Reference No"].astype(str)
-                
-                # Find complaint by reference number and wallet address
-                local_complaint = df[
-                    (df["Reference No"] == ref_no) & 
-                    (df["Wallet Address"].str.lower() == session['wallet_address'].lower())
-                ]
-                
-                if not local_complaint.empty:
-                    result = local_complaint.iloc[0].to_dict()
-                    print(f"✅ Found complaint in local CSV: {ref_no}")
-                else:
-                    print(f"❌ Complaint not found in local CSV or wrong owner: {ref_no}")
-                    
-            except Exception as e:
-                print(f"❌ Error reading local complaints: {e}")
+        # Check local store first for faster lookup
+        try:
+            result = complaint_store.find_complaint(ref_no, session['wallet_address'])
+            logger.debug("Local store lookup: %s", "found" if result is not None else "not found or wrong owner",
+                         extra={"ref_no": ref_no})
+        except Exception as e:
+            logger.error("Error reading local complaints: %s", e, extra={"ref_no": ref_no})
+            cacheable = False
         
         # Check blockchain
         blockchain_data = blockchain_manager.get_complaint_from_blockchain(ref_no)
         if blockchain_data:
-            print(f"✅ Found complaint on blockchain: {ref_no}")
+            logger.debug("Found complaint on blockchain", extra={"ref_no": ref_no})
             # Verify ownership
             is_owner = blockchain_manager.verify_complaint_ownership(ref_no, session['wallet_address'])
             if not is_owner:
-                print(f"❌ Wallet {session['wallet_address']} is not owner of complaint {ref_no}")
+                logger.warning("Wallet is not owner of complaint", extra={"ref_no": ref_no})
                 result = "not_authorized"
                 blockchain_data = None
         else:
-            print(f"❌ Complaint not found on blockchain: {ref_no}")
+            logger.debug("Complaint not found on blockchain", extra={"ref_no": ref_no})
         
         # Determine final result
         if result is None and blockchain_data is None:
@@ -278,52 +567,76 @@ def track_complaint():
         elif blockchain_data and result is None:
             result = "blockchain_only"
     
-    return render_template("track.html", 
-                         result=result, 
-                         blockchain_data=blockchain_data,
-                         wallet_address=session['wallet_address'],
-                         network_info=blockchain_manager.get_network_info())
+    html = render_template("track.html", 
+                           result=result, 
+                           blockchain_data=blockchain_data,
+                           wallet_address=session['wallet_address'],
+                           network_info=blockchain_manager.get_network_info())
+    # A failed chain lookup reads as "not found": only cache answers the node actually gave
+    return html, cacheable and metrics.rpc_error_count() == rpc_errors
 
-@app.route("/history")
+@app.route("/events/complaint/<ref_no>")
 @login_required
-def view_history():
-    """View user's complaint history"""
-    user_complaints = []
-    wallet_address = session['wallet_address']
+def complaint_events(ref_no):
+    """Server-Sent Events stream of a complaint's transaction status"""
+    ref_no = ref_no.strip().upper()
+    complaint = complaint_store.find_complaint(ref_no, session['wallet_address'])
+    tx_hash = (complaint or {}).get("Transaction Hash", "")
     
-    print(f"🔍 Loading history for wallet: {wallet_address}")
-    
-    # Get complaints from local CSV first (faster)
-    if os.path.exists("complaints.csv"):
+    def stream():
+        yield "retry: 5000\n\n"
+        if not tx_hash or tx_hash == "N/A":
+            yield f"event: status\ndata: {json.dumps({'ref_no': ref_no, 'state': 'unavailable'})}\n\n"
+            return
+        
+        updates = tx_watcher.subscribe(ref_no, tx_hash)
+        deadline = time.monotonic() + Config.SSE_MAX_SECONDS
         try:
-            df = pd.read_csv("complaints.csv", quoting=csv.QUOTE_MINIMAL, on_bad_lines="skip")
-            # Filter by wallet address (case insensitive)
-            user_df = df[df["Wallet Address"].str.lower() == wallet_address.lower()]
-            
-            if not user_df.empty:
-                user_complaints = user_df.to_dict(orient="records")
-                # Sort by date (newest first)
-                user_complaints = sorted(user_complaints, 
-                                       key=lambda x: x.get('Date', ''), 
-                                       reverse=True)
-                print(f"✅ Found {len(user_complaints)} complaints in local CSV")
-            else:
-                print(f"❌ No complaints found in local CSV for wallet: {wallet_address}")
-                
-        except Exception as e:
-            print(f"❌ Error reading complaints history from CSV: {e}")
+            while time.monotonic() < deadline:
+                try:
+                    event = updates.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+                if event["state"] in FINAL_STATES:
+                    break
+        finally:
+            tx_watcher.unsubscribe(ref_no, updates)
     
-    # Also try to get from blockchain (as backup/verification)
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def load_history_page(wallet_address, args):
+    """Query one page of a wallet's history using filters from the request args"""
+    filters = {
+        "status": args.get("status", "").strip() or None,
+        "department": args.get("department", "").strip() or None,
+        "date_from": args.get("date_from", "").strip() or None,
+        "date_to": args.get("date_to", "").strip() or None,
+        "text": args.get("q", "").strip() or None,
+    }
+    cursor = args.get("cursor") or None
+    limit = args.get("limit", type=int) or DEFAULT_PAGE_SIZE
+    
+    page = {"complaints": [], "next_cursor": None, "total": 0, "summary": {}}
     try:
-        ref_numbers = blockchain_manager.get_user_complaints(wallet_address)
-        print(f"📊 Blockchain reports {len(ref_numbers)} complaints for this wallet")
-        
-        # If we have blockchain data but no local data, create minimal records
-        if ref_numbers and not user_complaints:
-            for ref_no in ref_numbers:
+        page = complaint_store.query_history(wallet_address, cursor=cursor, limit=limit, **filters)
+        logger.debug("Found %d matching complaints in local store", page["total"])
+    except Exception as e:
+        logger.error("Error reading complaints history from CSV: %s", e)
+    
+    # Fall back to the blockchain only when the wallet has no local records at all
+    if not page["summary"] and not cursor and not any(filters.values()):
+        try:
+            ref_numbers = blockchain_manager.get_user_complaints(wallet_address)
+            logger.debug("Blockchain reports %d complaints for this wallet", len(ref_numbers))
+            
+            # Newest submissions are at the end of the on-chain list
+            for ref_no in list(reversed(ref_numbers))[:limit]:
                 blockchain_complaint = blockchain_manager.get_complaint_from_blockchain(ref_no)
                 if blockchain_complaint:
-                    user_complaints.append({
+                    page["complaints"].append({
                         "Reference No": ref_no,
                         "Department": blockchain_complaint.get('department', 'Unknown'),
                         "Status": blockchain_complaint.get('status', 'Unknown'),
@@ -332,26 +645,109 @@ def view_history():
                         "Complaint": "Details stored on blockchain",
                         "Blockchain Status": "Success"
                     })
-    except Exception as e:
-        print(f"❌ Error reading from blockchain: {e}")
+            page["total"] = len(ref_numbers)
+        except Exception as e:
+            logger.error("Error reading from blockchain: %s", e)
     
-    print(f"📋 Returning {len(user_complaints)} complaints for history view")
+    page["filters"] = {key: value or "" for key, value in filters.items()}
+    return page
+
+@app.route("/history")
+@login_required
+def view_history():
+    """View user's complaint history"""
+    wallet_address = session['wallet_address']
+    etag = page_cache.etag(wallet_address, complaint_store.wallet_version(wallet_address),
+                           "history", request.query_string.decode())
+    return page_cache.respond(etag, lambda: render_history_page(wallet_address))
+
+def render_history_page(wallet_address):
+    """Render /history; returns (html, cacheable), uncacheable if the chain fallback failed"""
+    rpc_errors = metrics.rpc_error_count()
+    page = load_history_page(wallet_address, request.args)
+    logger.debug("Returning %d complaints for history view", len(page["complaints"]))
     
-    return render_template("history.html", 
-                         complaints=user_complaints,
-                         wallet_address=wallet_address,
-                         network_info=blockchain_manager.get_network_info())
+    html = render_template("history.html", 
+                           complaints=page["complaints"],
+                           next_cursor=page["next_cursor"],
+                           total=page["total"],
+                           summary=page["summary"],
+                           filters=page["filters"],
+                           departments=dept_contacts['Department'].tolist(),
+                           wallet_address=wallet_address,
+                           network_info=blockchain_manager.get_network_info())
+    return html, metrics.rpc_error_count() == rpc_errors
+
+@app.route("/api/history")
+@login_required
+def api_history():
+    """Paginated, filterable complaint history as JSON"""
+    page = load_history_page(session['wallet_address'], request.args)
+    return jsonify(page)
+
+@app.route("/healthz")
+def healthz():
+    """Liveness: 200 while the process serves requests, with ok/warn/fail per check"""
+    return jsonify(health.summary()), 200, {"Cache-Control": "no-store"}
+
+@app.route("/readyz")
+def readyz():
+    """Readiness: 503 while a critical probe (model, store, chain if required) fails"""
+    summary = health.summary()
+    return jsonify(summary), 200 if summary["ready"] else 503, {"Cache-Control": "no-store"}
+
+@app.route("/api/admin/diagnostics")
+@admin_required
+def admin_diagnostics():
+    """Full health report with every probe's details (chain head, signer balance, queues, pid)"""
+    return jsonify(health.report()), 200, {"Cache-Control": "no-store"}
 
 @app.route("/api/blockchain_status")
 @login_required
 def blockchain_status():
     """API endpoint to check blockchain connection status"""
+    rpc = health.report()["checks"]["rpc"]
     return jsonify({
-        "connected": blockchain_manager.is_connected(),
+        "connected": rpc["status"] != diagnostics.FAIL,
+        "block_lag_seconds": rpc.get("block_lag_seconds"),
         "contract_address": Config.CONTRACT_ADDRESS,
         "user_address": session.get('wallet_address')
     })
 
+@app.route("/api/admin/search")
+@admin_required
+def admin_search():
+    """Full-text complaint search with facet counts (department, status, city, month)"""
+    args = request.args
+    try:
+        limit = int(args.get("limit", 20))
+        offset = int(args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    
+    with metrics.STORAGE_DURATION.time(operation="search", file="search_index.db"):
+        found = search_index.search(
+            args.get("q", "").strip(),
+            department=args.get("department") or None,
+            status=args.get("status") or None,
+            city=args.get("city") or None,
+            state=args.get("state") or None,
+            date_from=args.get("date_from") or None,
+            date_to=args.get("date_to") or None,
+            limit=limit, offset=offset
+        )
+    return jsonify(found)
+
+@app.route("/api/admin/dashboard")
+@admin_required
+def admin_dashboard():
+    """Pre-aggregated complaint statistics (no scan of the complaint store)"""
+    try:
+        days = max(1, min(int(request.args.get("days", 30)), 366))
+    except ValueError:
+        return jsonify({"error": "days must be an integer"}), 400
+    return jsonify(analytics.dashboard(days))
+
 if __name__ == "__main__":
     # Create necessary directories
     os.makedirs('static/css', exist_ok=True)
@@ -0,0 +1,179 @@
+"""
+Non-blocking structured logging
+
+Log calls only put the record on a bounded in-memory queue; a single
+background listener thread formats it as one JSON object per line and
+writes it to stdout, so request threads never wait on stdout. When the
+queue is full, records are dropped and counted instead of blocking.
+
+Records carry structured fields passed via `extra=` (ref_no, wallet,
+rpc_method, tx_hash, ...). Inside a Flask request the request id, route,
+method and session wallet are added automatically. High-frequency DEBUG
+messages are sampled: only one in every N records with the same logger and
+message template is kept.
+
+    LOG_LEVEL=INFO  LOG_LEVELS=blockchain_manager=DEBUG,werkzeug=WARNING
+    LOG_FORMAT=json|text  LOG_DEBUG_SAMPLE_EVERY=10
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+import uuid
+
+FIELDS = ("request_id", "route", "method", "wallet", "ref_no", "rpc_method", "tx_hash",
+          "status", "duration_ms", "sampled")
+
+_listener = None
+_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = " ".join(f"{field}={getattr(record, field)}" for field in FIELDS
+                          if getattr(record, field, None) is not None)
+        return f"{line} [{fields}]" if fields else line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller; overflow is counted, not waited on"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Resolve the message and traceback here; keep the structured attributes intact
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request id, route, method and wallet when logging inside a Flask request"""
+
+    def filter(self, record):
+        try:
+            from flask import g, has_request_context, request, session
+        except ImportError:
+            return True
+        if has_request_context():
+            record.request_id = getattr(record, "request_id", None) or g.get("request_id")
+            if getattr(record, "route", None) is None:
+                record.route = request.url_rule.rule if request.url_rule else request.path
+            record.method = getattr(record, "method", None) or request.method
+            if getattr(record, "wallet", None) is None:
+                record.wallet = session.get("wallet_address")
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every record above DEBUG; keep 1 in `every` DEBUG records per (logger, template)"""
+
+    def __init__(self, every=10):
+        super().__init__()
+        self.every = max(int(every), 1)
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+def configure_logging(level="INFO", fmt="json", debug_sample_every=10, queue_size=10000,
+                      logger_levels="", stream=None):
+    """Route all logging through the queue to a JSON (or text) stdout writer; safe to call twice"""
+    global _listener, _handler
+    root = logging.getLogger()
+    if _listener is not None:
+        root.setLevel(level)
+        return _handler
+
+    log_queue = queue.Queue(queue_size)
+    _handler = DroppingQueueHandler(log_queue)
+    _handler.addFilter(SamplingFilter(debug_sample_every))
+    _handler.addFilter(RequestContextFilter())
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root.handlers = [_handler]
+    root.setLevel(level)
+    for item in filter(None, (part.strip() for part in logger_levels.split(","))):
+        name, _, logger_level = item.partition("=")
+        logging.getLogger(name.strip()).setLevel(logger_level.strip().upper())
+    return _handler
+
+
+def dropped_records():
+    return _handler.dropped if _handler else 0
+
+
+def init_app(app):
+    """Assign request ids and write one access log record per request"""
+    from flask import g, request
+
+    access_log = logging.getLogger("access")
+
+    @app.before_request
+    def _start_request():
+        g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+        g._log_start = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        start = g.pop("_log_start", None)
+        if start is not None:
+            access_log.info("%s %s %s", request.method, request.path, response.status_code, extra={
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+            })
+        response.headers["X-Request-ID"] = g.get("request_id", "")
+        return response
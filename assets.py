@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Static asset pipeline
+
+    python assets.py vendor    # download pinned third-party assets into static/vendor/ (commit them)
+    python assets.py build     # fingerprint + precompress static/ into static/dist/
+
+`build` copies every file under static/ (except dist/) to
+static/dist/<dir>/<name>.<hash>.<ext> along with .gz and, when the brotli
+module is installed, .br variants, and writes static/dist/manifest.json.
+Templates reference assets by their logical name:
+
+    <link rel="stylesheet" href="{{ asset_url('css/style.css') }}">
+
+With a manifest, asset_url() points at /assets/<hashed name>, served with the
+best precompressed variant the browser accepts and a one-year immutable
+Cache-Control. Without one (development), it falls back to the plain /static
+URL, and vendored files that have not been downloaded fall back to their CDN.
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = "static"
+MANIFEST_FILE = "manifest.json"
+COMPRESSIBLE = (".css", ".js", ".json", ".svg", ".map", ".txt", ".html")
+CACHE_SECONDS = 365 * 24 * 3600
+
+# Third-party assets: logical name -> (pinned CDN URL, SRI hash published by the project)
+VENDOR_ASSETS = {
+    "vendor/bootstrap.min.css": (
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css",
+        "sha384-9ndCyUaIbzAi2FUVXJi0CjmCapSmO7SnpJef0486qhLnuZ2cdeRhO02iuK6FUUVM"
+    ),
+    "vendor/bootstrap.bundle.min.js": (
+        "https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js",
+        "sha384-geWF76RCwLtnZ8qwWowPQNguL3RmwHVBC9FhGdlKrxdiJJigb/j/68SIy3Te4Bkz"
+    )
+}
+
+
+def _sri(data):
+    return "sha384-" + base64.b64encode(hashlib.sha384(data).digest()).decode()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def vendor(static_dir=STATIC_DIR):
+    """Download the pinned third-party assets, refusing any whose hash does not match"""
+    for name, (url, integrity) in VENDOR_ASSETS.items():
+        path = os.path.join(static_dir, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                if _sri(f.read()) == integrity:
+                    print(f"✅ {name} already vendored")
+                    continue
+        with urllib.request.urlopen(url, timeout=30) as response:
+            data = response.read()
+        if _sri(data) != integrity:
+            raise ValueError(f"{url} does not match its pinned integrity hash; not vendoring it")
+        _write_atomic(path, data)
+        print(f"📥 {name} ({len(data) // 1024} KB)")
+
+
+def _source_files(static_dir):
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != os.path.join(static_dir, "dist"))
+        for name in sorted(files):
+            if not name.startswith("."):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, static_dir).replace(os.sep, "/"), path
+
+
+def build(static_dir=STATIC_DIR, clean=False):
+    """Fingerprint and precompress every static asset; returns the manifest"""
+    dist_dir = os.path.join(static_dir, "dist")
+    manifest = {}
+    for name, path in _source_files(static_dir):
+        with open(path, "rb") as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+        manifest[name] = hashed
+        target = os.path.join(dist_dir, hashed)
+        if os.path.exists(target):
+            continue  # same content, already built
+        _write_atomic(target, data)
+        if ext in COMPRESSIBLE:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                _write_atomic(target + ".gz", compressed)
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    _write_atomic(target + ".br", compressed)
+        print(f"📦 {name} -> {hashed}")
+
+    if clean and os.path.isdir(dist_dir):
+        # Old fingerprints are kept by default so pages rendered before a deploy still load
+        keep = set(manifest.values())
+        for root, _, files in os.walk(dist_dir):
+            for filename in files:
+                rel = os.path.relpath(os.path.join(root, filename), dist_dir).replace(os.sep, "/")
+                base = rel[:-3] if rel.endswith((".gz", ".br")) else rel
+                if rel != MANIFEST_FILE and base not in keep:
+                    os.remove(os.path.join(root, filename))
+
+    _write_atomic(os.path.join(dist_dir, MANIFEST_FILE), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    if brotli is None:
+        print("⚠️ brotli not installed; only gzip variants were generated")
+    print(f"✅ {len(manifest)} assets in {dist_dir}")
+    return manifest
+
+
+def init_app(app, static_dir=None):
+    """Register asset_url() for templates and the /assets route serving built files"""
+    from flask import abort, request, send_file, url_for
+
+    static_dir = static_dir or app.static_folder
+    dist_dir = os.path.join(static_dir, "dist")
+    manifest = {}
+    manifest_path = os.path.join(dist_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        logger.info("Serving %d fingerprinted assets", len(manifest))
+    hashed_names = set(manifest.values())
+
+    def asset_url(name):
+        if name in manifest:
+            return url_for("serve_asset", filename=manifest[name])
+        if name in VENDOR_ASSETS and not os.path.exists(os.path.join(static_dir, name)):
+            return VENDOR_ASSETS[name][0]
+        return url_for("static", filename=name)
+
+    app.jinja_env.globals["asset_url"] = asset_url
+
+    @app.route("/assets/<path:filename>")
+    def serve_asset(filename):
+        """Fingerprinted asset, precompressed when the client accepts it, cached for a year"""
+        if filename not in hashed_names:
+            abort(404)
+        path = os.path.join(dist_dir, filename)
+        accepted = {part.split(";")[0].strip() for part in request.headers.get("Accept-Encoding", "").split(",")}
+        encoding = None
+        for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if candidate in accepted and os.path.exists(path + suffix):
+                path, encoding = path + suffix, candidate
+                break
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_file(path, mimetype=mimetype, download_name=os.path.basename(filename),
+                             max_age=CACHE_SECONDS, conditional=True, etag=True)
+        response.headers["Cache-Control"] = f"public, max-age={CACHE_SECONDS}, immutable"
+        response.headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+    return asset_url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vendor, fingerprint and precompress static assets")
+    parser.add_argument("command", choices=["vendor", "build"])
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    parser.add_argument("--clean", action="store_true", help="Remove fingerprinted files no longer in the manifest")
+    args = parser.parse_args()
+
+    if args.command == "vendor":
+        vendor(args.static_dir)
+    else:
+        build(args.static_dir, args.clean)
@@ -1,12 +1,38 @@
 from web3 import Web3
-import hashlib
+from web3.exceptions import ContractLogicError, TransactionNotFound
 import json
+import logging
 from datetime import datetime
 from config import Config
+from chain_backend import ChainBackend
+import rpc_recorder
+import metrics
 
-class BlockchainManager:
+logger = logging.getLogger(__name__)
+
+# Multicall3 is deployed at the same address on mainnet, Sepolia and most other chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [{
+    "name": "aggregate3",
+    "type": "function",
+    "stateMutability": "payable",
+    "inputs": [{"name": "calls", "type": "tuple[]", "components": [
+        {"name": "target", "type": "address"},
+        {"name": "allowFailure", "type": "bool"},
+        {"name": "callData", "type": "bytes"}
+    ]}],
+    "outputs": [{"name": "returnData", "type": "tuple[]", "components": [
+        {"name": "success", "type": "bool"},
+        {"name": "returnData", "type": "bytes"}
+    ]}]
+}]
+# Return types of the public `complaints(string)` mapping getter (last one is `exists`)
+COMPLAINT_GETTER_TYPES = ["address", "string", "string", "string", "uint256", "bool"]
+
+class BlockchainManager(ChainBackend):
     def __init__(self):
-        self.w3 = Web3(Web3.HTTPProvider(Config.BLOCKCHAIN_NETWORK))
+        # RPC_RECORD_FILE / RPC_REPLAY_FILE wrap or replace the provider (see rpc_recorder.py)
+        self.w3 = Web3(rpc_recorder.provider_from_config(Web3.HTTPProvider(Config.BLOCKCHAIN_NETWORK)))
         self.contract = None
         self.network_info = None
         
@@ -19,9 +45,9 @@ class BlockchainManager:
                     'is_testnet': Config.IS_TESTNET,
                     'explorer_url': Config.get_block_explorer_url()
                 }
-                print(f"✅ Connected to {self._get_network_name()}")
+                logger.info("Connected to %s", self._get_network_name())
             except Exception as e:
-                print(f"❌ Error getting network info: {e}")
+                logger.error("Error getting network info: %s", e)
         
         if self.w3.is_connected() and Config.CONTRACT_ADDRESS and Config.CONTRACT_ABI:
             try:
@@ -29,14 +55,13 @@ class BlockchainManager:
                     address=Web3.to_checksum_address(Config.CONTRACT_ADDRESS),
                     abi=Config.CONTRACT_ABI
                 )
-                print("✅ Blockchain connected and contract loaded")
-                print(f"📍 Contract address: {Config.CONTRACT_ADDRESS}")
+                logger.info("Blockchain connected and contract %s loaded", Config.CONTRACT_ADDRESS)
                 if self.network_info:
-                    print(f"🔍 View contract: {self.network_info['explorer_url']}/address/{Config.CONTRACT_ADDRESS}")
+                    logger.info("View contract: %s/address/%s", self.network_info['explorer_url'], Config.CONTRACT_ADDRESS)
             except Exception as e:
-                print(f"❌ Contract loading failed: {e}")
+                logger.error("Contract loading failed: %s", e)
         else:
-            print("❌ Blockchain connection or contract loading failed")
+            logger.error("Blockchain connection or contract loading failed")
     
     def _get_network_name(self):
         """Get human-readable network name"""
@@ -60,6 +85,7 @@ class BlockchainManager:
             'contract_address': Config.CONTRACT_ADDRESS
         }
     
+    @metrics.track_rpc
     def is_connected(self):
         return self.w3.is_connected() and self.contract is not None
     
@@ -70,13 +96,87 @@ class BlockchainManager:
         except:
             return False
     
-    def hash_complaint_data(self, complaint_data):
-        """Create a hash of sensitive complaint data"""
-        data_string = f"{complaint_data['name']}{complaint_data['email']}{complaint_data['complaint']}{complaint_data['phone']}"
-        return hashlib.sha256(data_string.encode()).hexdigest()
+    def _wait_for_receipt(self, tx_hash, timeout=120):
+        """Wait for a sent transaction to be mined, tracking it as pending meanwhile"""
+        metrics.PENDING_TRANSACTIONS.inc()
+        try:
+            return self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+        finally:
+            metrics.PENDING_TRANSACTIONS.dec()
+    
+    def _pending_result(self, tx_hash):
+        """Result for a transaction that has been sent but not yet mined"""
+        explorer_url = self.network_info['explorer_url'] if self.network_info else Config.get_block_explorer_url()
+        return {
+            "success": True,
+            "pending": True,
+            "tx_hash": tx_hash.hex(),
+            "network": self._get_network_name(),
+            "explorer_urls": {
+                "transaction": f"{explorer_url}/tx/0x{tx_hash.hex()}",
+                "contract": f"{explorer_url}/address/{Config.CONTRACT_ADDRESS}"
+            }
+        }
+    
+    @metrics.track_rpc
+    def get_block_number(self):
+        """Latest block number, or None if the node is unreachable"""
+        try:
+            return self.w3.eth.block_number
+        except Exception as e:
+            logger.error("Error getting block number: %s", e, extra={"rpc_method": "eth_blockNumber"})
+            metrics.rpc_failed()
+            return None
+    
+    @metrics.track_rpc
+    def get_head(self):
+        """(number, timestamp) of the latest block, or None if the node is unreachable"""
+        try:
+            block = self.w3.eth.get_block('latest')
+            return block['number'], block['timestamp']
+        except Exception as e:
+            logger.error("Error getting latest block: %s", e, extra={"rpc_method": "eth_getBlockByNumber"})
+            metrics.rpc_failed()
+            return None
+    
+    @metrics.track_rpc
+    def get_signer_balance(self):
+        """ETH balance of the admin account that pays for contract transactions"""
+        if not Config.PRIVATE_KEY:
+            return None
+        admin_account = self.w3.eth.account.from_key(Config.PRIVATE_KEY)
+        return float(self.w3.from_wei(self.w3.eth.get_balance(admin_account.address), 'ether'))
+    
+    @metrics.track_rpc
+    def get_transaction_receipt(self, tx_hash):
+        """Receipt for a transaction, or None while it is still pending"""
+        try:
+            return self.w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+        except Exception as e:
+            logger.error("Error getting receipt: %s", e, extra={"rpc_method": "eth_getTransactionReceipt", "tx_hash": str(tx_hash)})
+            metrics.rpc_failed()
+            return None
     
-    def submit_complaint_to_blockchain(self, reference_no, complaint_data, department, user_wallet_address):
-        """Submit complaint to blockchain with user's wallet address"""
+    @metrics.track_rpc
+    def get_transaction(self, tx_hash):
+        """Transaction as the node knows it (mined or in its mempool), or None if it is unknown
+
+        Lookup errors other than not-found propagate: callers use None to decide to resend.
+        """
+        try:
+            return self.w3.eth.get_transaction(tx_hash)
+        except TransactionNotFound:
+            return None
+    
+    @metrics.track_rpc
+    def submit_complaint_to_blockchain(self, reference_no, complaint_data, department, user_wallet_address, wait=True):
+        """Submit complaint to blockchain with user's wallet address
+        
+        With wait=False the call returns as soon as the transaction is sent;
+        the result carries "pending": True and the receipt is left to the caller.
+        """
         if not self.is_connected():
             return {"success": False, "message": "Blockchain not available"}
         
@@ -110,7 +210,7 @@ class BlockchainManager:
                 # Add 20% buffer to gas estimate
                 gas_limit = int(gas_estimate * 1.2)
             except Exception as e:
-                print(f"⚠️  Could not estimate gas, using default: {e}")
+                logger.warning("Could not estimate gas, using default: %s", e, extra={"rpc_method": "eth_estimateGas", "ref_no": reference_no})
                 gas_limit = Config.GAS_LIMIT
             
             # Build transaction - submit on behalf of user but from admin account
@@ -131,18 +231,21 @@ class BlockchainManager:
             estimated_cost = transaction['gas'] * transaction['gasPrice']
             estimated_cost_eth = self.w3.from_wei(estimated_cost, 'ether')
             
-            print(f"💸 Estimated transaction cost: {estimated_cost_eth:.6f} ETH")
+            logger.debug("Estimated transaction cost: %.6f ETH", estimated_cost_eth, extra={"ref_no": reference_no})
             
             # Sign and send transaction
             signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
             tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
             
-            print(f"📤 Transaction sent: {tx_hash.hex()}")
+            logger.info("Transaction sent", extra={"rpc_method": "eth_sendRawTransaction", "ref_no": reference_no, "tx_hash": tx_hash.hex()})
+            
+            if not wait:
+                return self._pending_result(tx_hash)
             
             # Wait for transaction receipt
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
+            receipt = self._wait_for_receipt(tx_hash, timeout=300)
             
-            print(f"✅ Complaint {reference_no} submitted to blockchain for user {user_wallet_address}")
+            logger.info("Complaint submitted to blockchain", extra={"ref_no": reference_no, "wallet": user_wallet_address, "tx_hash": receipt.transactionHash.hex()})
             
             # Generate explorer URLs
             explorer_url = self.network_info['explorer_url'] if self.network_info else Config.get_block_explorer_url()
@@ -161,7 +264,7 @@ class BlockchainManager:
             }
             
         except Exception as e:
-            print(f"❌ Blockchain submission failed: {e}")
+            logger.error("Blockchain submission failed, retrying with submitComplaint: %s", e, extra={"rpc_method": "submitComplaintForUser", "ref_no": reference_no})
             # Fallback: Try with original method if the new method fails
             try:
                 transaction = self.contract.functions.submitComplaint(
@@ -178,7 +281,9 @@ class BlockchainManager:
                 
                 signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
                 tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+                if not wait:
+                    return self._pending_result(tx_hash)
+                receipt = self._wait_for_receipt(tx_hash)
                 
                 explorer_url = self.network_info['explorer_url'] if self.network_info else Config.get_block_explorer_url()
                 
@@ -194,13 +299,85 @@ class BlockchainManager:
                     }
                 }
             except Exception as e2:
-                print(f"❌ Fallback blockchain submission also failed: {e2}")
+                logger.error("Fallback blockchain submission also failed: %s", e2, extra={"rpc_method": "submitComplaint", "ref_no": reference_no})
                 return {"success": False, "message": str(e2)}
     
+    @metrics.track_rpc
+    def complaints_exist(self, reference_nos, batch_size=200):
+        """Return {reference_no: bool} for many refs, one Multicall3 eth_call per batch when available"""
+        exists = {}
+        reference_nos = list(reference_nos)
+        multicall = None
+        if self.w3.eth.get_code(MULTICALL3_ADDRESS):
+            multicall = self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        
+        for start in range(0, len(reference_nos), batch_size):
+            batch = reference_nos[start:start + batch_size]
+            if multicall is None:
+                # No Multicall3 on this chain: fall back to one view call per ref
+                for ref_no in batch:
+                    exists[ref_no] = bool(self.contract.functions.complaints(ref_no).call()[5])
+                continue
+            calls = [(self.contract.address, True, self.contract.encodeABI(fn_name="complaints", args=[ref_no]))
+                     for ref_no in batch]
+            for ref_no, (success, data) in zip(batch, multicall.functions.aggregate3(calls).call()):
+                exists[ref_no] = bool(success and self.w3.codec.decode(COMPLAINT_GETTER_TYPES, data)[5])
+        return exists
+    
+    @metrics.track_rpc
+    def find_submission_transactions(self, reference_nos, from_block=0, refs_per_query=100):
+        """Return {reference_no: tx_hash} from ComplaintSubmitted logs (refs are indexed by keccak hash)"""
+        topic = self.w3.keccak(text="ComplaintSubmitted(string,address,string,uint256)").hex()
+        by_topic = {self.w3.keccak(text=ref_no).hex(): ref_no for ref_no in reference_nos}
+        found = {}
+        topics = list(by_topic)
+        for start in range(0, len(topics), refs_per_query):
+            logs = self.w3.eth.get_logs({
+                "address": self.contract.address,
+                "fromBlock": from_block,
+                "toBlock": "latest",
+                "topics": [topic, topics[start:start + refs_per_query]]
+            })
+            for log in logs:
+                ref_no = by_topic.get(log["topics"][1].hex())
+                if ref_no:
+                    found[ref_no] = log["transactionHash"].hex()
+        return found
+    
+    @metrics.track_rpc
+    def send_complaint_transaction(self, reference_no, complaint_data, department, user_wallet_address, nonce):
+        """Sign and send one submission with an explicit nonce, without waiting; returns the tx hash"""
+        admin_account = self.w3.eth.account.from_key(Config.PRIVATE_KEY)
+        complaint_hash = self.hash_complaint_data(complaint_data)
+        if user_wallet_address and Web3.is_address(user_wallet_address):
+            function = self.contract.functions.submitComplaintForUser(
+                reference_no, complaint_hash, department, "Submitted",
+                Web3.to_checksum_address(user_wallet_address)
+            )
+        else:
+            # Legacy records have no owner wallet; the submitting account becomes the owner
+            function = self.contract.functions.submitComplaint(reference_no, complaint_hash, department, "Submitted")
+        transaction = function.build_transaction({
+            'from': admin_account.address,
+            'gas': Config.GAS_LIMIT,
+            'gasPrice': self.w3.to_wei(str(Config.GAS_PRICE), 'gwei'),
+            'nonce': nonce
+        })
+        signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
+        return self.w3.eth.send_raw_transaction(signed_txn.raw_transaction).hex()
+    
+    @metrics.track_rpc
+    def get_pending_nonce(self):
+        """Next nonce for the signing account, counting transactions still in the mempool"""
+        admin_account = self.w3.eth.account.from_key(Config.PRIVATE_KEY)
+        return self.w3.eth.get_transaction_count(admin_account.address, 'pending')
+    
+    @metrics.track_rpc
     def get_complaint_from_blockchain(self, reference_no):
         """Retrieve complaint from blockchain"""
         if not self.is_connected():
-            print("❌ Blockchain not connected")
+            logger.warning("Blockchain not connected")
+            metrics.rpc_failed()
             return None
         
         try:
@@ -213,44 +390,57 @@ class BlockchainManager:
                 "timestamp": result[4],
                 "formatted_date": datetime.fromtimestamp(result[4]).strftime("%Y-%m-%d %H:%M:%S")
             }
+        except ContractLogicError as e:
+            # Reverted: the contract has no such complaint
+            logger.warning("Error retrieving complaint from blockchain: %s", e, extra={"rpc_method": "getComplaint", "ref_no": reference_no})
+            return None
         except Exception as e:
-            print(f"❌ Error retrieving complaint {reference_no} from blockchain: {e}")
+            logger.warning("Error retrieving complaint from blockchain: %s", e, extra={"rpc_method": "getComplaint", "ref_no": reference_no})
+            metrics.rpc_failed()
             return None
     
+    @metrics.track_rpc
     def get_user_complaints(self, user_address):
         """Get all complaint reference numbers for a user"""
         if not self.is_connected():
-            print("❌ Blockchain not connected")
+            logger.warning("Blockchain not connected")
+            metrics.rpc_failed()
             return []
         
         try:
             # Convert to checksum address
             checksum_address = Web3.to_checksum_address(user_address)
             result = self.contract.functions.getUserComplaints(checksum_address).call()
-            print(f"✅ Found {len(result)} complaints on blockchain for {user_address}")
+            logger.debug("Found %d complaints on blockchain", len(result), extra={"rpc_method": "getUserComplaints", "wallet": user_address})
             return result
         except Exception as e:
-            print(f"❌ Error retrieving user complaints for {user_address}: {e}")
+            logger.error("Error retrieving user complaints: %s", e, extra={"rpc_method": "getUserComplaints", "wallet": user_address})
+            metrics.rpc_failed()
             return []
     
+    @metrics.track_rpc
     def verify_complaint_ownership(self, reference_no, user_address):
         """Verify if a complaint belongs to a specific user"""
         if not self.is_connected():
-            print("❌ Blockchain not connected")
+            logger.warning("Blockchain not connected")
+            metrics.rpc_failed()
             return False
         
         try:
             checksum_address = Web3.to_checksum_address(user_address)
             result = self.contract.functions.verifyComplaintOwnership(reference_no, checksum_address).call()
-            print(f"✅ Ownership verification for {reference_no}: {result}")
+            logger.debug("Ownership verification: %s", result, extra={"rpc_method": "verifyComplaintOwnership", "ref_no": reference_no})
             return result
         except Exception as e:
-            print(f"❌ Error verifying complaint ownership for {reference_no}: {e}")
+            logger.error("Error verifying complaint ownership: %s", e, extra={"rpc_method": "verifyComplaintOwnership", "ref_no": reference_no})
+            metrics.rpc_failed()
             return False
     
+    @metrics.track_rpc
     def get_transaction_details(self, tx_hash):
         """Get detailed information about a transaction"""
         if not self.w3.is_connected():
+            metrics.rpc_failed()
             return None
         
         try:
@@ -278,9 +468,11 @@ class BlockchainManager:
                 "to_address": tx.to
             }
         except Exception as e:
-            print(f"❌ Error getting transaction details: {e}")
+            logger.error("Error getting transaction details: %s", e, extra={"tx_hash": str(tx_hash)})
+            metrics.rpc_failed()
             return None
 
+    @metrics.track_rpc
     def update_complaint_status(self, reference_no, new_status):
         """Update complaint status (admin function)"""
         if not self.is_connected():
@@ -310,7 +502,7 @@ class BlockchainManager:
             
             signed_txn = self.w3.eth.account.sign_transaction(transaction, Config.PRIVATE_KEY)
             tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            receipt = self._wait_for_receipt(tx_hash)
             
             explorer_url = self.network_info['explorer_url'] if self.network_info else Config.get_block_explorer_url()
             
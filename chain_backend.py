@@ -0,0 +1,114 @@
+"""
+Chain backend interface and selection
+
+The app and the maintenance scripts talk to the complaint contract only
+through the methods below. Two backends implement them:
+
+    CHAIN_BACKEND=web3     BlockchainManager: a real node over JSON-RPC (default)
+    CHAIN_BACKEND=memory   SimulatedBlockchainManager: an in-process ComplaintContract
+                           simulator with no RPC endpoint (see chain_simulator.py)
+
+Backends are imported lazily, so the memory backend runs without web3 installed.
+"""
+
+import hashlib
+from abc import ABC, abstractmethod
+
+from config import Config
+
+
+class ChainBackend(ABC):
+    """Operations the app needs from the complaint contract's chain
+
+    A backend missing any of the abstract methods fails at construction.
+    """
+
+    @abstractmethod
+    def is_connected(self):
+        ...
+
+    @abstractmethod
+    def is_valid_address(self, address):
+        ...
+
+    @abstractmethod
+    def get_network_info(self):
+        """dict with chain_id, latest_block, is_testnet, explorer_url, network_name, contract_address"""
+
+    @abstractmethod
+    def get_block_number(self):
+        """Latest block number, or None if the chain is unreachable"""
+
+    @abstractmethod
+    def get_head(self):
+        """(number, unix timestamp) of the latest block, or None if the chain is unreachable"""
+
+    @abstractmethod
+    def get_signer_balance(self):
+        """ETH balance of the account that signs contract transactions, or None"""
+
+    @abstractmethod
+    def get_transaction_receipt(self, tx_hash):
+        """Receipt (with .status and .blockNumber), or None while the transaction is pending"""
+
+    @abstractmethod
+    def get_transaction(self, tx_hash):
+        """The transaction if the node knows it (mined or still pending), or None if it is unknown"""
+
+    @abstractmethod
+    def get_transaction_details(self, tx_hash):
+        ...
+
+    @abstractmethod
+    def submit_complaint_to_blockchain(self, reference_no, complaint_data, department, user_wallet_address, wait=True):
+        ...
+
+    @abstractmethod
+    def send_complaint_transaction(self, reference_no, complaint_data, department, user_wallet_address, nonce):
+        ...
+
+    @abstractmethod
+    def get_pending_nonce(self):
+        ...
+
+    @abstractmethod
+    def update_complaint_status(self, reference_no, new_status):
+        ...
+
+    @abstractmethod
+    def complaints_exist(self, reference_nos, batch_size=200):
+        ...
+
+    @abstractmethod
+    def find_submission_transactions(self, reference_nos, from_block=0, refs_per_query=100):
+        ...
+
+    @abstractmethod
+    def get_complaint_from_blockchain(self, reference_no):
+        ...
+
+    @abstractmethod
+    def get_user_complaints(self, user_address):
+        ...
+
+    @abstractmethod
+    def verify_complaint_ownership(self, reference_no, user_address):
+        ...
+
+    def hash_complaint_data(self, complaint_data):
+        """Create a hash of sensitive complaint data"""
+        data_string = f"{complaint_data['name']}{complaint_data['email']}{complaint_data['complaint']}{complaint_data['phone']}"
+        return hashlib.sha256(data_string.encode()).hexdigest()
+
+
+def create_blockchain_manager(backend=None):
+    """Instantiate the backend named by CHAIN_BACKEND"""
+    backend = (backend or Config.CHAIN_BACKEND).lower()
+    if backend == "memory":
+        from chain_simulator import SimulatedBlockchainManager
+        return SimulatedBlockchainManager(block_time=Config.CHAIN_SIM_BLOCK_TIME,
+                                          balance_eth=Config.CHAIN_SIM_BALANCE)
+    if backend == "web3":
+        from blockchain_manager import BlockchainManager
+        return BlockchainManager()
+    raise ValueError(f"Unknown CHAIN_BACKEND {backend!r} (expected 'web3' or 'memory')")
@@ -0,0 +1,442 @@
+"""
+In-memory ComplaintContract simulator
+
+A pure-Python stand-in for the deployed contract and the chain around it,
+used when CHAIN_BACKEND=memory:
+
+  * ComplaintContractSimulator mirrors ComplaintContract.sol: the same
+    storage, onlyOwner and duplicate/missing-ref checks with the contract's
+    revert reasons, and ComplaintSubmitted / ComplaintStatusUpdated events.
+  * SimulatedChain adds what the app sees of a chain: per-sender nonces, a
+    gas-paying admin balance, a mempool, blocks every `block_time` seconds
+    (mined lazily, no background thread), receipts with status 0 for
+    reverted transactions, and event logs.
+
+State lives in the process and is lost on restart; every worker process has
+its own chain. Use it for development and load tests, not for anything that
+must survive a restart.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from chain_backend import ChainBackend
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+CHAIN_ID = 1337
+NETWORK_NAME = "In-memory Simulator"
+SIMULATOR_OWNER = "0x" + hashlib.sha256(b"complaint-desk simulator owner").hexdigest()[:40]
+SIMULATOR_CONTRACT = "0x" + hashlib.sha256(b"complaint-desk simulator contract").hexdigest()[:40]
+ZERO_ADDRESS = "0x" + "0" * 40
+ADDRESS_RE = re.compile(r"^0x[0-9a-fA-F]{40}$")
+WEI_PER_ETH = 10 ** 18
+
+# Gas charged per mined call, close to what the compiled contract uses
+GAS_USED = {
+    "submitComplaint": 160000,
+    "submitComplaintForUser": 165000,
+    "updateComplaintStatus": 40000
+}
+REVERTED_GAS_USED = 30000
+
+
+class ContractRevert(Exception):
+    """A require() failed; the message is the contract's revert reason"""
+
+
+class Receipt(dict):
+    """Transaction receipt with attribute access, like web3's AttributeDict"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _address(value):
+    return str(value).lower()
+
+
+def _tx_key(tx_hash):
+    tx_hash = str(tx_hash).lower()
+    return tx_hash[2:] if tx_hash.startswith("0x") else tx_hash
+
+
+class ComplaintContractSimulator:
+    """Storage, access checks, revert reasons and events of ComplaintContract.sol
+
+    State-changing functions take (sender, timestamp, *args) and return the
+    events they emit; all checks run before any write, so a revert leaves no
+    partial state behind.
+    """
+
+    def __init__(self, owner):
+        self.owner = _address(owner)
+        self._complaints = {}
+        self._user_complaints = {}
+
+    def _only_owner(self, sender):
+        if _address(sender) != self.owner:
+            raise ContractRevert("Only contract owner can call this function")
+
+    def _store(self, reference_no, complaint_hash, department, status, user, timestamp):
+        if reference_no in self._complaints:
+            raise ContractRevert("Complaint already exists")
+        self._complaints[reference_no] = {
+            "user": user,
+            "complaintHash": complaint_hash,
+            "department": department,
+            "status": status,
+            "timestamp": timestamp
+        }
+        self._user_complaints.setdefault(user, []).append(reference_no)
+        return [("ComplaintSubmitted", {"referenceNo": reference_no, "user": user,
+                                        "department": department, "timestamp": timestamp})]
+
+    def submitComplaint(self, sender, timestamp, referenceNo, complaintHash, department, status):
+        return self._store(referenceNo, complaintHash, department, status, _address(sender), timestamp)
+
+    def submitComplaintForUser(self, sender, timestamp, referenceNo, complaintHash, department, status, userAddress):
+        self._only_owner(sender)
+        return self._store(referenceNo, complaintHash, department, status, _address(userAddress), timestamp)
+
+    def updateComplaintStatus(self, sender, timestamp, referenceNo, newStatus):
+        self._only_owner(sender)
+        if referenceNo not in self._complaints:
+            raise ContractRevert("Complaint does not exist")
+        self._complaints[referenceNo]["status"] = newStatus
+        return [("ComplaintStatusUpdated", {"referenceNo": referenceNo, "newStatus": newStatus,
+                                            "timestamp": timestamp})]
+
+    # Views
+
+    def complaints(self, referenceNo):
+        """Public mapping getter: zero values (exists=False) for unknown refs"""
+        complaint = self._complaints.get(referenceNo)
+        if complaint is None:
+            return (ZERO_ADDRESS, "", "", "", 0, False)
+        return (complaint["user"], complaint["complaintHash"], complaint["department"],
+                complaint["status"], complaint["timestamp"], True)
+
+    def getComplaint(self, referenceNo):
+        if referenceNo not in self._complaints:
+            raise ContractRevert("Complaint does not exist")
+        return self.complaints(referenceNo)[:5]
+
+    def getUserComplaints(self, user):
+        return list(self._user_complaints.get(_address(user), []))
+
+    def verifyComplaintOwnership(self, referenceNo, user):
+        complaint = self._complaints.get(referenceNo)
+        return complaint is not None and complaint["user"] == _address(user)
+
+    def getAllComplaintsCount(self):
+        return 0  # same placeholder as the contract
+
+
+class SimulatedChain:
+    """Blocks, nonces, balances, receipts and logs around one simulated contract"""
+
+    def __init__(self, owner=SIMULATOR_OWNER, block_time=0.1, balance_eth=100, contract_address=SIMULATOR_CONTRACT):
+        self.contract = ComplaintContractSimulator(owner)
+        self.contract_address = contract_address
+        self.block_time = max(block_time, 0.001)
+        self.block_number = 0
+        self._balances = {_address(owner): int(balance_eth * WEI_PER_ETH)}
+        self._nonces = {}
+        self._mempool = []
+        self._transactions = {}
+        self._receipts = {}
+        self._logs = []
+        self._block_timestamps = {0: int(time.time())}
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _advance(self):
+        """Mine the blocks due since the last call; pending transactions go into the first one (caller holds the lock)"""
+        target = int((time.monotonic() - self._started) / self.block_time)
+        if target <= self.block_number:
+            return
+        block = self.block_number + 1
+        timestamp = int(time.time())
+        self._block_timestamps[block] = timestamp
+        for tx in self._mempool:
+            self._execute(tx, block, timestamp)
+        self._mempool = []
+        self.block_number = target
+
+    def _execute(self, tx, block, timestamp):
+        logs = []
+        try:
+            events = getattr(self.contract, tx["function"])(tx["from"], timestamp, *tx["args"])
+            status, gas_used = 1, GAS_USED[tx["function"]]
+        except ContractRevert as e:
+            events, status, gas_used = [], 0, REVERTED_GAS_USED
+            tx["revert_reason"] = str(e)
+        self._balances[tx["from"]] = self._balances.get(tx["from"], 0) - gas_used * tx["gasPrice"]
+        for name, args in events:
+            log = {"event": name, "args": args, "address": self.contract_address, "blockNumber": block,
+                   "transactionHash": tx["hash"], "logIndex": len(self._logs)}
+            self._logs.append(log)
+            logs.append(log)
+        tx["blockNumber"] = block
+        self._receipts[tx["hash"]] = Receipt(
+            transactionHash=tx["hash"], blockNumber=block, status=status, gasUsed=gas_used,
+            effectiveGasPrice=tx["gasPrice"], logs=logs, to=self.contract_address, **{"from": tx["from"]}
+        )
+
+    def send_transaction(self, sender, function, args, gas_price, nonce=None, gas=None):
+        """Queue a contract call for the next block; returns the tx hash (hex, no 0x)"""
+        if function not in GAS_USED:
+            raise ValueError(f"{function} is not a state-changing contract function")
+        sender = _address(sender)
+        gas = gas or Config.GAS_LIMIT
+        with self._lock:
+            self._advance()
+            expected = self._nonces.get(sender, 0)
+            nonce = expected if nonce is None else nonce
+            if nonce < expected:
+                raise ValueError(f"nonce too low: next nonce {expected}, tx nonce {nonce}")
+            if nonce > expected:
+                raise ValueError(f"nonce gap: next nonce {expected}, tx nonce {nonce} (not queued by the simulator)")
+            if self._balances.get(sender, 0) < gas * gas_price:
+                raise ValueError("insufficient funds for gas * price + value")
+            tx_hash = hashlib.sha256(f"{sender}:{nonce}:{function}:{args!r}".encode()).hexdigest()
+            self._nonces[sender] = nonce + 1
+            tx = {"hash": tx_hash, "from": sender, "to": self.contract_address, "function": function,
+                  "args": tuple(args), "nonce": nonce, "gas": gas, "gasPrice": gas_price, "blockNumber": None}
+            self._transactions[tx_hash] = tx
+            self._mempool.append(tx)
+        return tx_hash
+
+    def call(self, function, *args):
+        """Run a view function against the latest block"""
+        with self._lock:
+            self._advance()
+            return getattr(self.contract, function)(*args)
+
+    def get_block_number(self):
+        with self._lock:
+            self._advance()
+            return self.block_number
+
+    def get_block_timestamp(self, block):
+        with self._lock:
+            return self._block_timestamps.get(block)
+
+    def get_balance(self, address):
+        with self._lock:
+            self._advance()
+            return self._balances.get(_address(address), 0)
+
+    def get_nonce(self, address):
+        with self._lock:
+            return self._nonces.get(_address(address), 0)
+
+    def get_transaction(self, tx_hash):
+        with self._lock:
+            self._advance()
+            return self._transactions.get(_tx_key(tx_hash))
+
+    def get_receipt(self, tx_hash):
+        with self._lock:
+            self._advance()
+            return self._receipts.get(_tx_key(tx_hash))
+
+    def wait_for_receipt(self, tx_hash, timeout=120):
+        deadline = time.monotonic() + timeout
+        while True:
+            receipt = self.get_receipt(tx_hash)
+            if receipt is not None:
+                return receipt
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Transaction {tx_hash} not mined after {timeout}s")
+            time.sleep(self.block_time)
+
+    def get_logs(self, event, from_block=0, reference_nos=None):
+        with self._lock:
+            self._advance()
+            return [log for log in self._logs
+                    if log["event"] == event and log["blockNumber"] >= from_block
+                    and (reference_nos is None or log["args"]["referenceNo"] in reference_nos)]
+
+
+class SimulatedBlockchainManager(ChainBackend):
+    """BlockchainManager API backed by a SimulatedChain instead of an RPC endpoint"""
+
+    def __init__(self, block_time=0.1, balance_eth=100, chain=None):
+        self.chain = chain or SimulatedChain(SIMULATOR_OWNER, block_time, balance_eth)
+        self.admin_address = self.chain.contract.owner
+        self.gas_price = int(Config.GAS_PRICE * 10 ** 9)
+        self.network_info = {
+            'chain_id': CHAIN_ID,
+            'latest_block': 0,
+            'is_testnet': True,
+            'explorer_url': None
+        }
+        logger.info("Using the in-memory chain simulator (block time %.3fs)", self.chain.block_time)
+
+    def get_network_info(self):
+        return {
+            **self.network_info,
+            'latest_block': self.chain.get_block_number(),
+            'network_name': NETWORK_NAME,
+            'contract_address': self.chain.contract_address
+        }
+
+    @metrics.track_rpc
+    def is_connected(self):
+        return True
+
+    def is_valid_address(self, address):
+        return bool(address) and bool(ADDRESS_RE.match(str(address)))
+
+    @metrics.track_rpc
+    def get_block_number(self):
+        return self.chain.get_block_number()
+
+    @metrics.track_rpc
+    def get_head(self):
+        number = self.chain.get_block_number()
+        # Blocks are mined lazily, so the head is as fresh as the call that produced it
+        return number, self.chain.get_block_timestamp(number) or int(time.time())
+
+    @metrics.track_rpc
+    def get_signer_balance(self):
+        return self.chain.get_balance(self.admin_address) / WEI_PER_ETH
+
+    @metrics.track_rpc
+    def get_transaction_receipt(self, tx_hash):
+        return self.chain.get_receipt(tx_hash)
+
+    @metrics.track_rpc
+    def get_transaction(self, tx_hash):
+        return self.chain.get_transaction(tx_hash)
+
+    def _wait_for_receipt(self, tx_hash, timeout=120):
+        metrics.PENDING_TRANSACTIONS.inc()
+        try:
+            return self.chain.wait_for_receipt(tx_hash, timeout)
+        finally:
+            metrics.PENDING_TRANSACTIONS.dec()
+
+    def _submit_call(self, reference_no, complaint_data, department, user_wallet_address):
+        complaint_hash = self.hash_complaint_data(complaint_data)
+        if self.is_valid_address(user_wallet_address):
+            return "submitComplaintForUser", (reference_no, complaint_hash, department, "Submitted", user_wallet_address)
+        # Legacy records have no owner wallet; the submitting account becomes the owner
+        return "submitComplaint", (reference_no, complaint_hash, department, "Submitted")
+
+    def _result(self, receipt):
+        if receipt.status != 1:
+            reason = self.chain.get_transaction(receipt.transactionHash).get("revert_reason", "reverted")
+            return {"success": False, "tx_hash": receipt.transactionHash,
+                    "message": f"Transaction reverted: {reason}"}
+        return {
+            "success": True,
+            "tx_hash": receipt.transactionHash,
+            "block_number": receipt.blockNumber,
+            "gas_used": receipt.gasUsed,
+            "actual_cost_eth": receipt.gasUsed * receipt.effectiveGasPrice / WEI_PER_ETH,
+            "network": NETWORK_NAME
+        }
+
+    @metrics.track_rpc
+    def submit_complaint_to_blockchain(self, reference_no, complaint_data, department, user_wallet_address, wait=True):
+        """Submit a complaint; same result shape as BlockchainManager (without explorer links)"""
+        balance_eth = self.chain.get_balance(self.admin_address) / WEI_PER_ETH
+        if balance_eth < 0.001:
+            return {
+                "success": False,
+                "message": f"Insufficient balance for gas fees. Current balance: {balance_eth:.6f} ETH"
+            }
+        try:
+            function, args = self._submit_call(reference_no, complaint_data, department, user_wallet_address)
+            tx_hash = self.chain.send_transaction(self.admin_address, function, args, self.gas_price)
+            logger.info("Transaction sent", extra={"rpc_method": function, "ref_no": reference_no, "tx_hash": tx_hash})
+            if not wait:
+                return {"success": True, "pending": True, "tx_hash": tx_hash, "network": NETWORK_NAME}
+            return self._result(self._wait_for_receipt(tx_hash, timeout=300))
+        except Exception as e:
+            logger.error("Simulated submission failed: %s", e, extra={"ref_no": reference_no})
+            return {"success": False, "message": str(e)}
+
+    @metrics.track_rpc
+    def send_complaint_transaction(self, reference_no, complaint_data, department, user_wallet_address, nonce):
+        function, args = self._submit_call(reference_no, complaint_data, department, user_wallet_address)
+        return self.chain.send_transaction(self.admin_address, function, args, self.gas_price, nonce=nonce)
+
+    @metrics.track_rpc
+    def get_pending_nonce(self):
+        return self.chain.get_nonce(self.admin_address)
+
+    @metrics.track_rpc
+    def update_complaint_status(self, reference_no, new_status):
+        try:
+            tx_hash = self.chain.send_transaction(self.admin_address, "updateComplaintStatus",
+                                                  (reference_no, new_status), self.gas_price)
+            result = self._result(self._wait_for_receipt(tx_hash))
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+        return {key: result[key] for key in ("success", "tx_hash", "message") if key in result}
+
+    @metrics.track_rpc
+    def complaints_exist(self, reference_nos, batch_size=200):
+        return {ref_no: self.chain.call("complaints", ref_no)[5] for ref_no in reference_nos}
+
+    @metrics.track_rpc
+    def find_submission_transactions(self, reference_nos, from_block=0, refs_per_query=100):
+        logs = self.chain.get_logs("ComplaintSubmitted", from_block, set(reference_nos))
+        return {log["args"]["referenceNo"]: log["transactionHash"] for log in logs}
+
+    @metrics.track_rpc
+    def get_complaint_from_blockchain(self, reference_no):
+        try:
+            user, complaint_hash, department, status, timestamp = self.chain.call("getComplaint", reference_no)
+        except ContractRevert as e:
+            logger.warning("Error retrieving complaint from blockchain: %s", e, extra={"rpc_method": "getComplaint", "ref_no": reference_no})
+            return None
+        return {
+            "user": user,
+            "complaint_hash": complaint_hash,
+            "department": department,
+            "status": status,
+            "timestamp": timestamp,
+            "formatted_date": datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    @metrics.track_rpc
+    def get_user_complaints(self, user_address):
+        return self.chain.call("getUserComplaints", user_address)
+
+    @metrics.track_rpc
+    def verify_complaint_ownership(self, reference_no, user_address):
+        return self.chain.call("verifyComplaintOwnership", reference_no, user_address)
+
+    @metrics.track_rpc
+    def get_transaction_details(self, tx_hash):
+        tx = self.chain.get_transaction(tx_hash)
+        receipt = self.chain.get_receipt(tx_hash)
+        if tx is None or receipt is None:
+            return None
+        return {
+            "hash": tx_hash,
+            "block_number": receipt.blockNumber,
+            "confirmations": self.chain.get_block_number() - receipt.blockNumber,
+            "gas_used": receipt.gasUsed,
+            "gas_price": tx["gasPrice"],
+            "cost_eth": receipt.gasUsed * tx["gasPrice"] / WEI_PER_ETH,
+            "status": "Success" if receipt.status == 1 else "Failed",
+            "timestamp": self.chain.get_block_timestamp(receipt.blockNumber),
+            "explorer_url": None,
+            "from_address": tx["from"],
+            "to_address": tx["to"]
+        }
@@ -0,0 +1,81 @@
+"""
+Embedding cache and top-k department prediction helpers
+
+Encoding is by far the most expensive step of a prediction, and the same
+text is encoded repeatedly: on every keystroke pause (/api/classify), again
+in /preview and again in /confirm. Embeddings depend only on the text, so
+they are cached (LRU) and concurrent requests for the same text share one
+encode call. Predictions themselves are cheap and always use the live model,
+so incremental partial_fit updates are picked up immediately.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    def __init__(self, encode_batch, max_entries=2048):
+        self.encode_batch = encode_batch
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text):
+        """Return the embedding for text as a (1, dim) array"""
+        key = normalize_text(text)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector[np.newaxis, :]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+
+        if not owner:
+            # Coalesce with the request already encoding this text
+            return future.result()[np.newaxis, :]
+
+        try:
+            vector = np.asarray(self.encode_batch([key]))[0]
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        future.set_result(vector)
+        return vector[np.newaxis, :]
+
+
+def rank_departments(model, embedding, top_k=3):
+    """Return [(department, probability), ...] best first; probability is None without predict_proba"""
+    if hasattr(model, "predict_proba"):
+        try:
+            probabilities = model.predict_proba(embedding)[0]
+        except Exception:
+            probabilities = None
+        if probabilities is not None:
+            order = np.argsort(probabilities)[::-1][:top_k]
+            return [(str(model.classes_[i]), float(probabilities[i])) for i in order]
+    return [(str(model.predict(embedding)[0]), None)]
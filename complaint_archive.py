@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Cold storage for old, resolved complaints
+
+Resolved complaints older than a retention age are moved out of
+complaints.csv into gzip-compressed monthly partitions
+(archive/complaints-YYYY-MM.csv.gz). A SQLite index maps every archived
+reference number to its partition and owner, so the store can answer /track
+and /history lookups for archived complaints by opening only the partitions
+it needs. The hot files then hold only active complaints, and every read
+and repair pass over them gets cheaper.
+
+Usage:
+    python complaint_archive.py --max-age-days 180 --dry-run
+    python complaint_archive.py --max-age-days 180
+"""
+
+import argparse
+import gzip
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from complaint_writer import COMPLAINT_COLUMNS, FileLock
+from fix_csv import iter_records, parse_record
+
+ARCHIVE_DIR = "archive"
+ARCHIVABLE_STATUSES = ("Resolved", "Closed")
+
+
+class ComplaintArchive:
+    def __init__(self, directory=ARCHIVE_DIR, cached_partitions=4):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.db")
+        self.cached_partitions = cached_partitions
+        self._partitions = OrderedDict()  # name -> (mtime, frame)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self, create=False):
+        """Index connection, or None while nothing has been archived yet"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if not create and not os.path.exists(self.index_path):
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(self.index_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS archived
+                            (ref_no TEXT PRIMARY KEY,
+                             wallet TEXT NOT NULL,
+                             partition TEXT NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS archived_wallet ON archived (wallet)")
+            self._local.conn = conn
+        return conn
+
+    def _partition_path(self, name):
+        return os.path.join(self.directory, f"complaints-{name}.csv.gz")
+
+    def _load_partition(self, name):
+        path = self._partition_path(name)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=COMPLAINT_COLUMNS)
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._partitions.get(name)
+            if cached and cached[0] == mtime:
+                self._partitions.move_to_end(name)
+                return cached[1]
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, compression="gzip")
+        with self._lock:
+            self._partitions[name] = (mtime, df)
+            self._partitions.move_to_end(name)
+            while len(self._partitions) > self.cached_partitions:
+                self._partitions.popitem(last=False)
+        return df
+
+    def contains(self, ref_no):
+        conn = self._connect()
+        return bool(conn and conn.execute("SELECT 1 FROM archived WHERE ref_no = ?", (ref_no,)).fetchone())
+
+    def get_complaint(self, ref_no):
+        """Return the archived complaint dict for ref_no, or None"""
+        conn = self._connect()
+        found = conn and conn.execute("SELECT partition FROM archived WHERE ref_no = ?", (ref_no,)).fetchone()
+        if not found:
+            return None
+        df = self._load_partition(found[0])
+        match = df[df["Reference No"] == ref_no]
+        return None if match.empty else match.iloc[-1].to_dict()
+
+    def wallet_frame(self, wallet_address):
+        """Archived complaints of one wallet, reading only the partitions that hold them"""
+        conn = self._connect()
+        if conn is None:
+            return None
+        refs_by_partition = {}
+        for ref_no, partition in conn.execute("SELECT ref_no, partition FROM archived WHERE wallet = ?",
+                                              (wallet_address.lower(),)):
+            refs_by_partition.setdefault(partition, set()).add(ref_no)
+        frames = []
+        for partition, refs in refs_by_partition.items():
+            df = self._load_partition(partition)
+            frames.append(df[df["Reference No"].isin(refs)])
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True).drop_duplicates("Reference No", keep="last")
+
+    def wallet_refs(self, wallet_address):
+        """Reference numbers of one wallet's archived complaints (index only, no partition reads)"""
+        conn = self._connect()
+        if conn is None:
+            return []
+        return [row[0] for row in conn.execute("SELECT ref_no FROM archived WHERE wallet = ?",
+                                               (wallet_address.lower(),))]
+
+    def all_complaints(self):
+        """Every archived complaint (reads all partitions; meant for index rebuilds)"""
+        conn = self._connect()
+        if conn is None:
+            return pd.DataFrame(columns=COMPLAINT_COLUMNS)
+        partitions = [row[0] for row in conn.execute("SELECT DISTINCT partition FROM archived ORDER BY partition")]
+        frames = [self._load_partition(name) for name in partitions]
+        if not frames:
+            return pd.DataFrame(columns=COMPLAINT_COLUMNS)
+        return pd.concat(frames, ignore_index=True).drop_duplicates("Reference No", keep="last")
+
+    def add(self, df):
+        """Write complaints into their monthly partitions, then index them"""
+        os.makedirs(self.directory, exist_ok=True)
+        months = df["Date"].str[:7].where(df["Date"].str.match(r"\d{4}-\d{2}"), "unknown")
+        conn = self._connect(create=True)
+        for name, rows in df.groupby(months):
+            path = self._partition_path(name)
+            existing = self._load_partition(name)
+            combined = pd.concat([existing, rows[COMPLAINT_COLUMNS]], ignore_index=True)
+            combined = combined.drop_duplicates("Reference No", keep="last")
+            with gzip.open(path + ".tmp", "wt", encoding="utf-8", newline="") as f:
+                combined.to_csv(f, index=False, lineterminator="\n")
+            with open(path + ".tmp", "rb") as f:
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT OR REPLACE INTO archived (ref_no, wallet, partition) VALUES (?, ?, ?)",
+                             [(ref_no, wallet.lower(), name)
+                              for ref_no, wallet in zip(rows["Reference No"], rows["Wallet Address"])])
+            conn.execute("COMMIT")
+            print(f"📦 {len(rows)} complaints archived to {os.path.basename(path)}")
+
+
+def _read_current(complaints_path, updates_path):
+    """complaints.csv with complaint_updates.csv applied (caller holds both file locks)"""
+    df = pd.read_csv(complaints_path, dtype=str, keep_default_na=False, on_bad_lines="skip")
+    df = df.reindex(columns=COMPLAINT_COLUMNS, fill_value="")
+    if os.path.exists(updates_path):
+        updates = pd.read_csv(updates_path, dtype=str, keep_default_na=False, on_bad_lines="skip")
+        updates = updates[updates["Field"].isin(COMPLAINT_COLUMNS)]
+        latest = updates.drop_duplicates(["Reference No", "Field"], keep="last")
+        for field, rows in latest.groupby("Field"):
+            values = dict(zip(rows["Reference No"], rows["Value"]))
+            mask = df["Reference No"].isin(values.keys())
+            df.loc[mask, field] = df.loc[mask, "Reference No"].map(values)
+    return df
+
+
+def _rewrite_without(path, refs):
+    """Atomically rewrite an append-only CSV, dropping records whose first field is in refs (caller holds its lock)"""
+    kept = dropped = 0
+    with open(path, "rb") as src, open(path + ".tmp", "wb") as out:
+        for index, (raw, _) in enumerate(iter_records(src, final=True)):
+            fields = parse_record(raw)
+            if index > 0 and fields and fields[0] in refs:
+                dropped += 1
+                continue
+            out.write(raw)
+            kept += 1
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(path + ".tmp", path)
+    return kept - 1, dropped
+
+
+def archive_complaints(complaints_path="complaints.csv", updates_path="complaint_updates.csv",
+                       archive_dir=ARCHIVE_DIR, max_age_days=180, dry_run=False):
+    """Move resolved complaints older than max_age_days from the hot files into the archive"""
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+    # Writers wait while the hot files are rewritten; readers see the new inode and reload
+    with FileLock(complaints_path), FileLock(updates_path):
+        df = _read_current(complaints_path, updates_path)
+        old = df[df["Status"].isin(ARCHIVABLE_STATUSES)
+                 & df["Date"].str.match(r"\d{4}-\d{2}-\d{2}") & (df["Date"] < cutoff)]
+        print(f"🔍 {len(old)} of {len(df)} complaints are {'/'.join(ARCHIVABLE_STATUSES)} and older than {cutoff}")
+        if old.empty or dry_run:
+            for month, count in sorted(old["Date"].str[:7].value_counts().items()):
+                print(f"   {month}: {count}")
+            return len(old)
+
+        # Partitions and index first: a crash before the rewrite leaves duplicates, never losses
+        ComplaintArchive(archive_dir).add(old)
+        refs = set(old["Reference No"])
+        kept, dropped = _rewrite_without(complaints_path, refs)
+        print(f"✅ {complaints_path}: {dropped} archived, {kept} active complaints kept")
+        if os.path.exists(updates_path):
+            kept, dropped = _rewrite_without(updates_path, refs)
+            print(f"✅ {updates_path}: {dropped} updates folded into the archive, {kept} kept")
+    return len(old)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive resolved complaints into monthly partitions")
+    parser.add_argument("--complaints", default="complaints.csv")
+    parser.add_argument("--updates", default="complaint_updates.csv")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--max-age-days", type=int, default=180)
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived")
+    args = parser.parse_args()
+
+    archive_complaints(args.complaints, args.updates, args.archive_dir, args.max_age_days, args.dry_run)
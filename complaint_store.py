@@ -0,0 +1,306 @@
+"""
+Read side of the local complaint store (complaints.csv)
+
+Keeps a per-process DataFrame of complaints, sorted oldest first by (Date,
+Reference No), with each wallet's row positions listed newest first.
+complaints.csv is append-only, so after the first load only the bytes
+appended since the previous read are parsed, and as new complaints are the
+newest they are appended to the frame without re-sorting it. Later changes
+to a complaint (status, blockchain outcome) are appended to
+complaint_updates.csv and overlaid in place on just the rows they change. Complaints moved to cold storage by
+complaint_archive.py are found through the archive's ref index, so lookups
+and history pages fall through to them transparently. Queries filter and
+paginate on the server with an opaque (Date, Reference No) cursor.
+"""
+
+import base64
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import metrics
+from complaint_archive import ComplaintArchive
+from complaint_writer import COMPLAINT_COLUMNS, UPDATE_COLUMNS, FileLock
+
+COMPLAINTS_FILE = "complaints.csv"
+UPDATES_FILE = "complaint_updates.csv"
+SORT_COLUMNS = ["Date", "Reference No"]
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(date, ref_no):
+    raw = json.dumps([date, ref_no]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (date, ref_no) for a cursor string, or None if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        date, ref_no = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(date), str(ref_no)
+    except Exception:
+        return None
+
+
+class _TailReader:
+    """Incrementally parses an append-only CSV, returning only rows added since the last read"""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.inode = None
+        self.offset = 0
+
+    def read(self):
+        """Return (new_rows, reset); reset means the file was replaced and rows start over"""
+        if not os.path.exists(self.path):
+            reset = self.inode is not None
+            self.inode, self.offset = None, 0
+            return None, reset
+
+        stat = os.stat(self.path)
+        if stat.st_ino == self.inode and stat.st_size == self.offset:
+            return None, False
+
+        incremental = stat.st_ino == self.inode and stat.st_size > self.offset
+        kwargs = {"dtype": str, "keep_default_na": False, "on_bad_lines": "skip"}
+        if incremental:
+            kwargs.update(header=None, names=self.columns)
+        with metrics.STORAGE_DURATION.time(operation="read", file=os.path.basename(self.path)):
+            # Writers hold this lock for a whole group commit, so we never see a partial row
+            with FileLock(self.path):
+                with open(self.path, "rb") as f:
+                    f.seek(self.offset if incremental else 0)
+                    rows = pd.read_csv(f, **kwargs)
+                    self.offset = f.tell()
+        self.inode = stat.st_ino
+        return rows.reindex(columns=self.columns, fill_value=""), not incremental
+
+
+class ComplaintStore:
+    def __init__(self, path=COMPLAINTS_FILE, updates_path=UPDATES_FILE, archive=None):
+        self.path = path
+        self.archive = archive
+        self._lock = threading.Lock()
+        self._df = None
+        self._by_wallet = {}
+        self._positions = {}  # ref_no -> row position in self._df
+        self._updates = {}
+        self._update_counts = {}
+        self._complaints_reader = _TailReader(path, COMPLAINT_COLUMNS)
+        self._updates_reader = _TailReader(updates_path, UPDATE_COLUMNS)
+
+    def _refresh(self):
+        """Bring the cached frame up to date with the files on disk"""
+        new_rows, reset = self._complaints_reader.read()
+        new_updates, updates_reset = self._updates_reader.read()
+        if self._df is not None and new_rows is None and not reset and new_updates is None and not updates_reset:
+            return
+
+        if updates_reset:
+            self._updates = {}
+            self._update_counts = {}
+        changed = {}
+        if new_updates is not None:
+            for ref_no, field, value in new_updates[["Reference No", "Field", "Value"]].itertuples(index=False):
+                if field in COMPLAINT_COLUMNS:
+                    self._updates.setdefault(ref_no, {})[field] = value
+                    changed.setdefault(ref_no, {})[field] = value
+                    self._update_counts[ref_no] = self._update_counts.get(ref_no, 0) + 1
+
+        if new_rows is not None:
+            new_rows["_wallet"] = new_rows["Wallet Address"].str.lower()
+            new_rows = new_rows.sort_values(SORT_COLUMNS, kind="stable", ignore_index=True)
+            # Updates recorded before their complaint row was read
+            self._apply_updates(new_rows, {ref_no: self._updates[ref_no]
+                                           for ref_no in new_rows["Reference No"] if ref_no in self._updates})
+
+        if reset or self._df is None:
+            df = new_rows if new_rows is not None else pd.DataFrame(columns=COMPLAINT_COLUMNS + ["_wallet"])
+            self._rebuild(df)
+        elif new_rows is not None and not new_rows.empty:
+            df = self._df
+            if df.empty or tuple(new_rows[SORT_COLUMNS].iloc[0]) >= tuple(df[SORT_COLUMNS].iloc[-1]):
+                self._append(new_rows)
+            else:
+                # Rows older than the newest stored one (e.g. an import of backdated records)
+                self._rebuild(pd.concat([df, new_rows], ignore_index=True)
+                              .sort_values(SORT_COLUMNS, kind="stable", ignore_index=True))
+        self._apply_changes(changed)
+
+    def _rebuild(self, df):
+        """Index a frame already sorted oldest first"""
+        self._df = df
+        self._positions = dict(zip(df["Reference No"], range(len(df))))
+        self._by_wallet = {wallet: positions[::-1]
+                           for wallet, positions in df.groupby("_wallet", sort=False).indices.items()}
+
+    def _append(self, new_rows):
+        """Add rows that are all newer than the frame's newest; only their wallets are re-indexed"""
+        start = len(self._df)
+        self._df = pd.concat([self._df, new_rows], ignore_index=True)
+        self._positions.update(zip(new_rows["Reference No"], range(start, start + len(new_rows))))
+        for wallet, positions in new_rows.groupby("_wallet", sort=False).indices.items():
+            newest_first = positions[::-1] + start
+            previous = self._by_wallet.get(wallet)
+            self._by_wallet[wallet] = newest_first if previous is None else np.concatenate([newest_first, previous])
+
+    def _apply_changes(self, changed):
+        """Overlay a batch of new field updates in place on the rows they change"""
+        by_field = {}
+        for ref_no, fields in changed.items():
+            position = self._positions.get(ref_no)
+            if position is None:
+                continue  # archived, or its row has not been read yet
+            for field, value in fields.items():
+                by_field.setdefault(field, ([], []))
+                by_field[field][0].append(position)
+                by_field[field][1].append(value)
+        for field, (positions, values) in by_field.items():
+            self._df.iloc[positions, self._df.columns.get_loc(field)] = values
+
+    def _apply_updates(self, df, updates=None):
+        """Overlay recorded field updates (status changes, tx hashes) onto the frame (caller holds the lock)"""
+        updates = self._updates if updates is None else updates
+        if not updates or df.empty:
+            return
+        by_field = {}
+        for ref_no, fields in updates.items():
+            for field, value in fields.items():
+                by_field.setdefault(field, {})[ref_no] = value
+        for field, values in by_field.items():
+            mask = df["Reference No"].isin(values.keys())
+            if mask.any():
+                df.loc[mask, field] = df.loc[mask, "Reference No"].map(values)
+
+    def snapshot(self):
+        """Return (frame, wallet -> row positions) for the current file contents"""
+        with self._lock:
+            self._refresh()
+            return self._df, self._by_wallet
+
+    def wallet_version(self, wallet_address):
+        """Opaque token that changes whenever the wallet's stored complaints or their updates change
+
+        Built from what is in the files, not from process state, so every worker
+        reading the same files agrees on it. Replacing either file (migration,
+        archiving) changes every wallet's version.
+        """
+        with self._lock:
+            self._refresh()
+            positions = self._by_wallet.get(wallet_address.lower(), [])
+            refs = set(self._df["Reference No"].values[positions])
+            if self.archive:
+                refs.update(self.archive.wallet_refs(wallet_address))
+            updates = sum(self._update_counts.get(ref_no, 0) for ref_no in refs)
+            return f"{self._complaints_reader.inode}-{self._updates_reader.inode}-{len(positions)}-{updates}"
+
+    def get_complaint(self, ref_no):
+        """Return the complaint dict for ref_no regardless of owner, or None"""
+        with self._lock:
+            self._refresh()
+            position = self._positions.get(ref_no)
+            if position is not None:
+                return self._df.iloc[position].drop(labels="_wallet").to_dict()
+        complaint = self.archive.get_complaint(ref_no) if self.archive else None
+        if complaint is not None:
+            # Updates recorded after archiving (status changes, reconciliation) still apply
+            with self._lock:
+                complaint.update(self._updates.get(ref_no, {}))
+        return complaint
+
+    def ref_exists(self, ref_no):
+        """True if any stored or archived complaint already uses ref_no"""
+        with self._lock:
+            self._refresh()
+            if ref_no in self._positions:
+                return True
+        return bool(self.archive and self.archive.contains(ref_no))
+
+    def wallet_frame(self, wallet_address):
+        """A wallet's complaints, newest first, including archived ones"""
+        df, by_wallet = self.snapshot()
+        positions = by_wallet.get(wallet_address.lower())
+        hot = df.iloc[0:0] if positions is None else df.iloc[positions]
+        archived = self.archive.wallet_frame(wallet_address) if self.archive else None
+        if archived is None or archived.empty:
+            return hot
+        # A ref can briefly be in both while an archive run rewrites the hot file
+        archived = archived[~archived["Reference No"].isin(hot["Reference No"])].copy()
+        archived["_wallet"] = wallet_address.lower()
+        with self._lock:
+            self._apply_updates(archived)
+        combined = pd.concat([hot, archived], ignore_index=True)
+        return combined.sort_values(["Date", "Reference No"], ascending=False, kind="stable", ignore_index=True)
+
+    def all_complaints(self):
+        """Every stored complaint, hot and archived, with recorded updates applied"""
+        df, _ = self.snapshot()
+        df = df.drop(columns="_wallet")
+        archived = self.archive.all_complaints() if self.archive else None
+        if archived is None or archived.empty:
+            return df
+        archived = archived[~archived["Reference No"].isin(df["Reference No"])].copy()
+        with self._lock:
+            self._apply_updates(archived)
+        return pd.concat([df, archived], ignore_index=True)
+
+    def find_complaint(self, ref_no, wallet_address):
+        """Return the complaint dict for ref_no owned by wallet_address, or None"""
+        user_df = self.wallet_frame(wallet_address)
+        match = user_df[user_df["Reference No"] == ref_no]
+        if match.empty:
+            return None
+        return match.iloc[0].drop(labels="_wallet").to_dict()
+
+    def query_history(self, wallet_address, status=None, department=None, date_from=None,
+                      date_to=None, text=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+        """Return one page of a wallet's complaints, newest first, with server-side filters"""
+        limit = max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+        user_df = self.wallet_frame(wallet_address)
+        summary = user_df["Status"].value_counts().to_dict()
+
+        mask = pd.Series(True, index=user_df.index)
+        if status:
+            mask &= user_df["Status"].str.lower() == status.lower()
+        if department:
+            mask &= user_df["Department"].str.lower() == department.lower()
+        if date_from:
+            mask &= user_df["Date"] >= date_from
+        if date_to:
+            # A bare date includes the whole day
+            mask &= user_df["Date"] <= (date_to + " 23:59:59" if len(date_to) == 10 else date_to)
+        if text:
+            needle = text.lower()
+            mask &= (user_df["Complaint"].str.lower().str.contains(needle, regex=False)
+                     | user_df["Reference No"].str.lower().str.contains(needle, regex=False)
+                     | user_df["Department"].str.lower().str.contains(needle, regex=False))
+        filtered = user_df[mask]
+        total = len(filtered)
+
+        position = decode_cursor(cursor) if cursor else None
+        if position:
+            date, ref_no = position
+            filtered = filtered[(filtered["Date"] < date)
+                                | ((filtered["Date"] == date) & (filtered["Reference No"] < ref_no))]
+
+        page = filtered.head(limit + 1)
+        items = page.head(limit).drop(columns="_wallet").to_dict(orient="records")
+        next_cursor = None
+        if len(page) > limit and items:
+            next_cursor = encode_cursor(items[-1]["Date"], items[-1]["Reference No"])
+
+        return {
+            "complaints": items,
+            "next_cursor": next_cursor,
+            "total": total,
+            "summary": summary
+        }
+
+
+store = ComplaintStore(archive=ComplaintArchive())
@@ -0,0 +1,62 @@
+"""
+Recording field changes of stored complaints
+
+complaint_updates.csv is the record of changes on top of complaints.csv; the
+admin search index, the analytics counters and the duplicate-detection
+vector index (partitioned by department) are derived from the same changes.
+Everything that changes a stored complaint (the app, reconcile.py,
+reclassify.py) records it through UpdateRecorder so they stay in sync.
+"""
+
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_MOVES = 1000
+
+
+class UpdateRecorder:
+    def __init__(self, updates_writer, search_index, analytics, vector_index=None):
+        self.updates_writer = updates_writer
+        self.search_index = search_index
+        self.analytics = analytics
+        self.vector_index = vector_index
+        self._moves = []
+
+    def record(self, complaint, field, value, wait=True):
+        """Write a field change to the updates log, search index and analytics
+
+        `complaint` holds the values before the change ("Reference No", plus the
+        field and "Date" for analytics) and is updated in place. Department
+        changes move the complaint's vector; with wait=False the moves are
+        batched until flush() (each move is a pass over the vector index).
+        """
+        ref_no = complaint["Reference No"]
+        changed_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.updates_writer.append({"Reference No": ref_no, "Field": field,
+                                    "Value": value, "Date": changed_at}, wait=wait)
+        if field in complaint:
+            try:
+                self.analytics.record_change(field, complaint[field], value, complaint.get("Date"), changed_at)
+            except Exception as e:
+                logger.error("Error updating analytics: %s", e, extra={"ref_no": ref_no})
+        try:
+            self.search_index.update_field(ref_no, field, value)
+        except Exception as e:
+            logger.error("Error updating search index: %s", e, extra={"ref_no": ref_no})
+        if field == "Department" and self.vector_index is not None:
+            self._moves.append((ref_no, value))
+            if wait or len(self._moves) >= MAX_PENDING_MOVES:
+                self.flush()
+        complaint[field] = value
+
+    def flush(self):
+        """Apply batched vector index moves"""
+        moves, self._moves = self._moves, []
+        if not moves:
+            return
+        try:
+            self.vector_index.reassign(moves)
+        except Exception as e:
+            logger.error("Error moving %d complaints in the vector index: %s", len(moves), e)
@@ -0,0 +1,168 @@
+"""
+Group-commit CSV append writer
+
+Rows appended from request threads are queued and written by a single
+background thread. Everything pending is flushed in one write under an
+exclusive cross-process file lock and fsynced once per group, so concurrent
+workers can no longer interleave partial rows in the same file.
+"""
+
+import atexit
+import csv
+import io
+import logging
+import os
+import threading
+import time
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+COMPLAINT_COLUMNS = [
+    "Reference No", "Wallet Address", "Name", "Email", "Phone",
+    "Address", "City", "State", "Zip", "Complaint", "Department",
+    "Status", "Date", "Blockchain Status", "Transaction Hash"
+]
+
+FEEDBACK_COLUMNS = ["complaint_text", "product"]
+
+# complaint_updates.csv: later field changes to a complaint, latest entry wins
+UPDATE_COLUMNS = ["Reference No", "Field", "Value", "Date"]
+
+
+class FileLock:
+    """Exclusive advisory lock on `<path>.lock`, shared by every worker process"""
+
+    def __init__(self, path):
+        self.lock_path = path + ".lock"
+        self._fh = None
+
+    def __enter__(self):
+        self._fh = open(self.lock_path, "a+")
+        if fcntl:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+class _PendingRow:
+    __slots__ = ("values", "done", "error")
+
+    def __init__(self, values):
+        self.values = values
+        self.done = threading.Event()
+        self.error = None
+
+
+class GroupCommitWriter:
+    """Batched, fsynced, process-safe appender for a single CSV file"""
+
+    def __init__(self, path, columns, max_batch=256, max_delay=0.005):
+        self.path = path
+        self.columns = list(columns)
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def append(self, row, wait=True):
+        """Queue a row (dict keyed by column name); by default block until it is durable"""
+        entry = _PendingRow([row.get(column, "") for column in self.columns])
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"Writer for {self.path} is closed")
+            self._ensure_thread()
+            self._pending.append(entry)
+            self._cond.notify()
+        if wait:
+            entry.done.wait()
+            if entry.error is not None:
+                raise entry.error
+        return entry
+
+    def close(self):
+        """Flush everything still queued and stop the writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"group-commit:{self.path}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+            # Give concurrent requests a moment to join this group
+            if self.max_delay:
+                time.sleep(self.max_delay)
+            with self._cond:
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+            self._commit(batch)
+
+    def _commit(self, batch):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL, lineterminator="\n")
+        writer.writerows(entry.values for entry in batch)
+        error = None
+        try:
+            with metrics.STORAGE_DURATION.time(operation="group_commit", file=os.path.basename(self.path)):
+                with FileLock(self.path):
+                    self._write_locked(buffer.getvalue())
+            metrics.GROUP_COMMIT_BATCH_SIZE.observe(len(batch), file=os.path.basename(self.path))
+        except Exception as e:
+            logger.error("Group commit to %s failed: %s", self.path, e)
+            error = e
+        for entry in batch:
+            entry.error = error
+            entry.done.set()
+
+    def _write_locked(self, data):
+        with open(self.path, "ab+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                header = io.StringIO()
+                csv.writer(header, quoting=csv.QUOTE_MINIMAL, lineterminator="\n").writerow(self.columns)
+                data = header.getvalue() + data
+            else:
+                # Never glue the first row onto a line left unterminated by older writers
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    data = "\n" + data
+            f.write(data.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
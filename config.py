@@ -7,23 +7,110 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
     
+    # Logging: JSON lines via a background writer; DEBUG records are sampled 1 in N per message
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')  # per-logger overrides, e.g. "blockchain_manager=DEBUG"
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_DEBUG_SAMPLE_EVERY = int(os.getenv('LOG_DEBUG_SAMPLE_EVERY', 10))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    
     # Blockchain Configuration
     BLOCKCHAIN_NETWORK = os.getenv('BLOCKCHAIN_NETWORK', 'https://sepolia.infura.io/v3/YOUR_INFURA_PROJECT_ID')
     PRIVATE_KEY = os.getenv('PRIVATE_KEY')
     INFURA_PROJECT_ID = os.getenv('INFURA_PROJECT_ID')
     
+    # Chain backend: "web3" talks to BLOCKCHAIN_NETWORK; "memory" runs an in-process contract
+    # simulator (per process, state lost on restart) for development and load tests
+    CHAIN_BACKEND = os.getenv('CHAIN_BACKEND', 'web3').lower()
+    CHAIN_SIM_BLOCK_TIME = float(os.getenv('CHAIN_SIM_BLOCK_TIME', 0.1))  # seconds
+    CHAIN_SIM_BALANCE = float(os.getenv('CHAIN_SIM_BALANCE', 100))  # ETH of the simulated admin account
+    
+    # Record the web3 backend's RPC traffic to a file, or replay a recording offline
+    # (RPC_REPLAY_SPEED: "recorded", "instant" or a speed factor)
+    RPC_RECORD_FILE = os.getenv('RPC_RECORD_FILE')
+    RPC_REPLAY_FILE = os.getenv('RPC_REPLAY_FILE')
+    RPC_REPLAY_SPEED = os.getenv('RPC_REPLAY_SPEED', 'recorded')
+    
     # Network Detection
     IS_TESTNET = 'sepolia' in BLOCKCHAIN_NETWORK.lower() or 'goerli' in BLOCKCHAIN_NETWORK.lower() or 'mumbai' in BLOCKCHAIN_NETWORK.lower()
     
     # Load contract info if exists
     CONTRACT_ADDRESS = None
     CONTRACT_ABI = None
+    CONTRACT_DEPLOY_BLOCK = 0
     
     if os.path.exists('contract_info.json'):
         with open('contract_info.json', 'r') as f:
             contract_info = json.load(f)
             CONTRACT_ADDRESS = contract_info.get('address')
             CONTRACT_ABI = contract_info.get('abi')
+            CONTRACT_DEPLOY_BLOCK = contract_info.get('block_number', 0)
+    
+    # Reference number generation: fixed worker slot (0-35) when several hosts share a store
+    WORKER_ID = os.getenv('WORKER_ID')
+    REF_STATE_DIR = os.getenv('REF_STATE_DIR', '.refgen')
+    
+    # Idempotent /confirm: how long keys are remembered and how long a duplicate waits for the original
+    IDEMPOTENCY_DB = os.getenv('IDEMPOTENCY_DB', 'idempotency.db')
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 24 * 3600))  # seconds
+    IDEMPOTENCY_WAIT = float(os.getenv('IDEMPOTENCY_WAIT', 30))  # seconds
+    
+    # Chain submission: with ASYNC_CHAIN_SUBMIT /confirm returns once the transaction is sent
+    # and the shared watcher follows it to REQUIRED_CONFIRMATIONS
+    ASYNC_CHAIN_SUBMIT = os.getenv('ASYNC_CHAIN_SUBMIT', 'false').lower() == 'true'
+    REQUIRED_CONFIRMATIONS = int(os.getenv('REQUIRED_CONFIRMATIONS', 3))
+    TX_POLL_INTERVAL = float(os.getenv('TX_POLL_INTERVAL', 4))  # seconds
+    SSE_MAX_SECONDS = int(os.getenv('SSE_MAX_SECONDS', 600))
+    
+    # Admission control: rates are "count/seconds" ("" disables); stages bound concurrent work
+    # and how many requests may queue for it (and for how long) before answering 503.
+    # Rate buckets are shared by all workers through RATE_LIMIT_DB; stages are per worker process
+    RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', 'rate_limits.db')
+    SUBMIT_RATE_PER_WALLET = os.getenv('SUBMIT_RATE_PER_WALLET', '5/60')
+    SUBMIT_RATE_GLOBAL = os.getenv('SUBMIT_RATE_GLOBAL', '20/10')
+    CLASSIFY_RATE_PER_WALLET = os.getenv('CLASSIFY_RATE_PER_WALLET', '60/60')
+    CLASSIFY_RATE_GLOBAL = os.getenv('CLASSIFY_RATE_GLOBAL', '')
+    CLASSIFY_CONCURRENCY = int(os.getenv('CLASSIFY_CONCURRENCY', 2))
+    CLASSIFY_QUEUE_SIZE = int(os.getenv('CLASSIFY_QUEUE_SIZE', 16))
+    CLASSIFY_QUEUE_TIMEOUT = float(os.getenv('CLASSIFY_QUEUE_TIMEOUT', 2))  # seconds
+    CHAIN_CONCURRENCY = int(os.getenv('CHAIN_CONCURRENCY', 4))
+    CHAIN_QUEUE_SIZE = int(os.getenv('CHAIN_QUEUE_SIZE', 32))
+    CHAIN_QUEUE_TIMEOUT = float(os.getenv('CHAIN_QUEUE_TIMEOUT', 10))  # seconds
+    
+    # Rendered /history and /track pages, keyed by ETag; TTL bounds staleness of chain-only data
+    PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', 60))  # seconds
+    PAGE_CACHE_MAX_BYTES = int(os.getenv('PAGE_CACHE_MAX_MB', 32)) * 1024 * 1024
+    
+    # Diagnostics for /healthz and /readyz: probes run concurrently, each bounded by
+    # HEALTH_PROBE_TIMEOUT, and results are reused for HEALTH_CACHE_TTL
+    HEALTH_CACHE_TTL = float(os.getenv('HEALTH_CACHE_TTL', 5))  # seconds
+    HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', 3))  # seconds
+    HEALTH_MAX_BLOCK_LAG = int(os.getenv('HEALTH_MAX_BLOCK_LAG', 120))  # seconds since the latest block
+    HEALTH_MIN_SIGNER_BALANCE = float(os.getenv('HEALTH_MIN_SIGNER_BALANCE', 0.01))  # ETH
+    HEALTH_REQUIRE_CHAIN = os.getenv('HEALTH_REQUIRE_CHAIN', 'false').lower() == 'true'  # not ready without the chain
+    
+    # Embedding index used to flag likely duplicate complaints on /preview
+    VECTOR_INDEX_DIR = os.getenv('VECTOR_INDEX_DIR', 'vector_index')
+    DUPLICATE_THRESHOLD = float(os.getenv('DUPLICATE_THRESHOLD', 0.85))  # cosine similarity
+    DUPLICATE_MAX_RESULTS = int(os.getenv('DUPLICATE_MAX_RESULTS', 3))
+    
+    # Classifier registry: workers poll the CURRENT pointer and hot-swap new versions
+    MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', 'models')
+    MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', 10))  # seconds
+    MODEL_KEEP_VERSIONS = int(os.getenv('MODEL_KEEP_VERSIONS', 10))
+    # Incremental updates from /confirm are published in batches, not one version per complaint
+    MODEL_PUBLISH_INTERVAL = float(os.getenv('MODEL_PUBLISH_INTERVAL', 300))  # seconds
+    MODEL_PUBLISH_BATCH = int(os.getenv('MODEL_PUBLISH_BATCH', 50))  # samples
+    
+    # Administrators: comma-separated wallet addresses allowed to use /api/admin endpoints
+    ADMIN_WALLETS = {w.strip().lower() for w in os.getenv('ADMIN_WALLETS', '').split(',') if w.strip()}
+    SEARCH_INDEX_DB = os.getenv('SEARCH_INDEX_DB', 'search_index.db')
+    ANALYTICS_DB = os.getenv('ANALYTICS_DB', 'analytics.db')
+    
+    # /metrics: scrapers send "Authorization: Bearer <METRICS_TOKEN>"; without a token only
+    # clients from the comma-separated METRICS_ALLOWED_ADDRESSES (loopback by default) may scrape
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    METRICS_ALLOWED_ADDRESSES = tuple(a.strip() for a in os.getenv('METRICS_ALLOWED_ADDRESSES', '127.0.0.1,::1').split(',') if a.strip())
     
     # Gas configuration (adjusted for testnet)
     GAS_LIMIT = int(os.getenv('GAS_LIMIT', 3000000))
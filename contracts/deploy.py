@@ -1,5 +1,7 @@
 from web3 import Web3
-from solcx import compile_source, install_solc, set_solc_version
+from solcx import compile_source, get_installed_solc_versions, install_solc
+import argparse
+import hashlib
 import json
 import os
 from dotenv import load_dotenv
@@ -7,13 +9,87 @@ import time
 
 load_dotenv()
 
-def deploy_contract():
-    SOLC_VERSION = "0.8.19"
+SOLC_VERSION = "0.8.19"
+CONTRACTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CONTRACT_SOURCE = os.path.join(CONTRACTS_DIR, 'ComplaintContract.sol')
+CONTRACT_NAME = 'ComplaintContract'
 
-    # ✅ Install and set Solidity version
-    print(f"🔍 Installing Solidity {SOLC_VERSION}...")
-    install_solc(SOLC_VERSION)
-    set_solc_version(SOLC_VERSION)
+# Compiled artifacts, one file per (source, compiler, optimizer settings)
+ARTIFACT_DIR = os.getenv('CONTRACT_ARTIFACT_DIR', os.path.join(CONTRACTS_DIR, 'build'))
+SOLC_OPTIMIZE = os.getenv('SOLC_OPTIMIZE', 'false').lower() == 'true'
+SOLC_OPTIMIZE_RUNS = int(os.getenv('SOLC_OPTIMIZE_RUNS', 200))
+
+def artifact_path(source, solc_version, optimize, optimize_runs):
+    """Cache file for a compilation; any change to the inputs gives a new key"""
+    key = hashlib.sha256(json.dumps({
+        'source': hashlib.sha256(source.encode('utf-8')).hexdigest(),
+        'solc_version': solc_version,
+        'optimize': optimize,
+        'optimize_runs': optimize_runs if optimize else None
+    }, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(ARTIFACT_DIR, f"{CONTRACT_NAME}-{key}.json")
+
+def load_artifact(solc_version=SOLC_VERSION, optimize=SOLC_OPTIMIZE, optimize_runs=SOLC_OPTIMIZE_RUNS):
+    """Return the cached artifact for the current source, or None (never compiles or downloads)"""
+    with open(CONTRACT_SOURCE, 'r') as file:
+        contract_source = file.read()
+    path = artifact_path(contract_source, solc_version, optimize, optimize_runs)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def compile_contract(solc_version=SOLC_VERSION, optimize=SOLC_OPTIMIZE, optimize_runs=SOLC_OPTIMIZE_RUNS,
+                     use_cache=True):
+    """Compile ComplaintContract.sol and return its interface (abi, bin, bin-runtime)
+
+    Results are cached under ARTIFACT_DIR, so unchanged sources load instantly
+    and offline; solc is only installed when a compilation is actually needed.
+    """
+    with open(CONTRACT_SOURCE, 'r') as file:
+        contract_source = file.read()
+
+    path = artifact_path(contract_source, solc_version, optimize, optimize_runs)
+    if use_cache and os.path.exists(path):
+        print(f"📦 Using cached contract artifact {os.path.basename(path)}")
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    # ✅ Install Solidity version only if missing
+    if solc_version not in [str(v) for v in get_installed_solc_versions()]:
+        print(f"🔍 Installing Solidity {solc_version}...")
+        install_solc(solc_version)
+
+    # ✅ Compile contract using the installed version
+    settings = f"optimizer on, {optimize_runs} runs" if optimize else "optimizer off"
+    print(f"🔨 Compiling contract ({settings})...")
+    compiled_sol = compile_source(
+        contract_source,
+        output_values=['abi', 'bin', 'bin-runtime'],
+        solc_version=solc_version,
+        optimize=optimize,
+        optimize_runs=optimize_runs if optimize else None
+    )
+    compiled = compiled_sol[f'<stdin>:{CONTRACT_NAME}']
+    artifact = {
+        'contract_name': CONTRACT_NAME,
+        'source_sha256': hashlib.sha256(contract_source.encode('utf-8')).hexdigest(),
+        'solc_version': solc_version,
+        'optimizer': {'enabled': optimize, 'runs': optimize_runs if optimize else None},
+        'abi': compiled['abi'],
+        'bin': compiled['bin'],
+        'bin-runtime': compiled['bin-runtime'],
+        'compiled_at': time.time()
+    }
+
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(artifact, f, indent=2)
+    os.replace(path + '.tmp', path)
+    print(f"💾 Contract artifact saved to {path}")
+    return artifact
+
+def deploy_contract(optimize=SOLC_OPTIMIZE, optimize_runs=SOLC_OPTIMIZE_RUNS, use_cache=True):
 
     # ✅ Connect to blockchain
     blockchain_network = os.getenv('BLOCKCHAIN_NETWORK')
@@ -55,14 +131,7 @@ def deploy_contract():
     except Exception as e:
         print(f"⚠️  Could not fetch network info: {e}")
 
-    # ✅ Read contract source
-    with open('ComplaintContract.sol', 'r') as file:
-        contract_source = file.read()
-
-    # ✅ Compile contract using the installed version
-    print("🔨 Compiling contract...")
-    compiled_sol = compile_source(contract_source, solc_version=SOLC_VERSION)
-    contract_interface = compiled_sol['<stdin>:ComplaintContract']
+    contract_interface = compile_contract(optimize=optimize, optimize_runs=optimize_runs, use_cache=use_cache)
 
     # ✅ Get account from private key
     private_key = os.getenv('PRIVATE_KEY')
@@ -161,6 +230,8 @@ def deploy_contract():
         'network': network_name,
         'chain_id': chain_id,
         'deployment_cost_eth': float(estimated_cost_eth),
+        'solc_version': contract_interface['solc_version'],
+        'optimizer': contract_interface['optimizer'],
         'deployed_at': time.time()
     }
 
@@ -172,4 +243,19 @@ def deploy_contract():
 
 
 if __name__ == "__main__":
-    deploy_contract()
+    parser = argparse.ArgumentParser(description="Compile and deploy ComplaintContract")
+    parser.add_argument('--compile-only', action='store_true', help="Build (or refresh) the artifact and exit")
+    parser.add_argument('--optimize-runs', type=int,
+                        help="Enable the solc optimizer with this many expected runs")
+    parser.add_argument('--no-cache', action='store_true', help="Recompile even if a cached artifact exists")
+    args = parser.parse_args()
+
+    if args.optimize_runs is not None:
+        SOLC_OPTIMIZE, SOLC_OPTIMIZE_RUNS = True, args.optimize_runs
+    if args.compile_only:
+        artifact = compile_contract(optimize=SOLC_OPTIMIZE, optimize_runs=SOLC_OPTIMIZE_RUNS,
+                                    use_cache=not args.no_cache)
+        print(f"📏 Deployment bytecode: {len(artifact['bin']) // 2} bytes, "
+              f"runtime: {len(artifact['bin-runtime']) // 2} bytes")
+    else:
+        deploy_contract(optimize=SOLC_OPTIMIZE, optimize_runs=SOLC_OPTIMIZE_RUNS, use_cache=not args.no_cache)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Gas benchmark for ComplaintContract
+
+Deploys the contract to an in-process EVM (eth-tester), exercises every
+function across a range of input sizes and prints a per-function gas table.
+Exits with a non-zero status when any measurement exceeds its measured
+baseline (per function and input case) by more than the tolerance, so contract
+changes can't silently raise submission fees. The baseline must be measured
+(--update-baseline); it records the solc version and optimizer settings it
+was measured with, and a check against a build with other settings fails
+with a clear message instead of reporting every difference as a regression.
+
+Usage:
+    python gas_benchmark.py
+    python gas_benchmark.py --thresholds gas_thresholds.json --tolerance 1
+    python gas_benchmark.py --update-baseline
+    python gas_benchmark.py --optimize-runs 200
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+from web3 import Web3, EthereumTesterProvider
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from deploy import compile_contract
+
+DEFAULT_THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gas_thresholds.json')
+DEFAULT_TOLERANCE = 2.0  # percent above the baseline before a measurement fails
+COMPILER_SETTINGS = ("solc_version", "optimize", "runs")  # stored with the baseline
+
+# Input sizes exercised by the benchmark
+DEPARTMENT_LENGTHS = [8, 32, 128, 512]
+COMPLAINTS_PER_USER = [1, 10, 100]
+
+
+def _complaint_hash(i):
+    return hashlib.sha256(f"benchmark-{i}".encode()).hexdigest()
+
+
+class GasBenchmark:
+    def __init__(self, contract_interface):
+        self.w3 = Web3(EthereumTesterProvider())
+        self.owner = self.w3.eth.accounts[0]
+        self.user = self.w3.eth.accounts[1]
+        self.counter = 0
+        self.results = []
+
+        factory = self.w3.eth.contract(abi=contract_interface['abi'], bytecode=contract_interface['bin'])
+        tx_hash = factory.constructor().transact({'from': self.owner})
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        self.contract = self.w3.eth.contract(address=receipt.contractAddress, abi=contract_interface['abi'])
+        self.record("constructor", "deploy", receipt.gasUsed)
+
+    def next_ref(self):
+        self.counter += 1
+        return f"B{self.counter:07d}"
+
+    def record(self, function, case, gas):
+        self.results.append({"function": function, "case": case, "gas": gas})
+
+    def transact(self, function, case, call, sender, record=True):
+        tx_hash = call.transact({'from': sender})
+        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        if record:
+            self.record(function, case, receipt.gasUsed)
+        return receipt
+
+    def estimate(self, function, case, call):
+        self.record(function, case, call.estimate_gas({'from': self.owner}))
+
+    def run(self):
+        fns = self.contract.functions
+
+        # Department string length drives storage cost of both submit paths
+        for length in DEPARTMENT_LENGTHS:
+            department = "D" * length
+            case = f"department={length}B"
+            self.transact("submitComplaint", case,
+                          fns.submitComplaint(self.next_ref(), _complaint_hash(self.counter), department, "Submitted"),
+                          self.user)
+            ref_no = self.next_ref()
+            self.transact("submitComplaintForUser", case,
+                          fns.submitComplaintForUser(ref_no, _complaint_hash(self.counter), department,
+                                                     "Submitted", self.user),
+                          self.owner)
+            self.transact("updateComplaintStatus", f"status={length}B",
+                          fns.updateComplaintStatus(ref_no, "S" * length), self.owner)
+            self.estimate("getComplaint", case, fns.getComplaint(ref_no))
+
+        # Per-user complaint list growth drives getUserComplaints cost
+        heavy_user = self.w3.eth.accounts[2]
+        submitted = 0
+        for target in COMPLAINTS_PER_USER:
+            while submitted < target:
+                ref_no = self.next_ref()
+                submitted += 1
+                self.transact("submitComplaintForUser", f"user_complaints={submitted}",
+                              fns.submitComplaintForUser(ref_no, _complaint_hash(self.counter),
+                                                         "Electricity", "Submitted", heavy_user),
+                              self.owner, record=submitted == target)
+            self.estimate("getUserComplaints", f"user_complaints={target}", fns.getUserComplaints(heavy_user))
+            self.estimate("verifyComplaintOwnership", f"user_complaints={target}",
+                          fns.verifyComplaintOwnership(ref_no, heavy_user))
+
+        self.estimate("getAllComplaintsCount", "default", fns.getAllComplaintsCount())
+        return self.results
+
+
+def compiler_settings(interface):
+    """solc version and optimizer settings of a compiled contract interface"""
+    return {
+        "solc_version": interface["solc_version"],
+        "optimize": interface["optimizer"]["enabled"],
+        "runs": interface["optimizer"]["runs"]
+    }
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def check_results(results, thresholds, tolerance):
+    """Annotate results with their threshold and return the number of failures"""
+    failures = 0
+    for row in results:
+        limit = thresholds.get(row["function"], {}).get(row["case"])
+        if limit is None:
+            row["limit"] = None
+            row["status"] = "untracked"
+            continue
+        row["limit"] = int(limit * (1 + tolerance / 100.0))
+        if row["gas"] > row["limit"]:
+            row["status"] = "FAIL"
+            failures += 1
+        else:
+            row["status"] = "ok"
+    return failures
+
+
+def print_table(results):
+    print(f"{'Function':<28}{'Case':<24}{'Gas':>12}{'Limit':>12}  Status")
+    print("-" * 84)
+    for row in results:
+        limit = f"{row['limit']:,}" if row.get("limit") else "-"
+        print(f"{row['function']:<28}{row['case']:<24}{row['gas']:>12,}{limit:>12}  {row.get('status', '')}")
+
+
+def write_baseline(results, settings, path):
+    """Store each measurement as the baseline for its function and case, with the compiler settings"""
+    gas = {}
+    for row in results:
+        gas.setdefault(row["function"], {})[row["case"]] = row["gas"]
+    with open(path, 'w') as f:
+        json.dump({**settings, "gas": gas}, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"💾 Baseline written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ComplaintContract gas usage")
+    parser.add_argument('--thresholds', default=DEFAULT_THRESHOLDS,
+                        help="Baseline JSON: compiler settings plus function -> case -> gas")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed percentage above each baseline")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Write the measurements to the thresholds file instead of checking")
+    parser.add_argument('--json', dest='json_output', help="Also write raw results to this file")
+    parser.add_argument('--optimize-runs', type=int,
+                        help="Benchmark the build compiled with the solc optimizer at this many runs")
+    args = parser.parse_args()
+
+    print("⛽ ComplaintContract Gas Benchmark")
+    print("=" * 50)
+    if args.optimize_runs is not None:
+        interface = compile_contract(optimize=True, optimize_runs=args.optimize_runs)
+    else:
+        interface = compile_contract()
+    settings = compiler_settings(interface)
+    results = GasBenchmark(interface).run()
+
+    if args.update_baseline:
+        print_table(results)
+        write_baseline(results, settings, args.thresholds)
+        return 0
+
+    baseline = load_baseline(args.thresholds)
+    if not baseline.get("gas"):
+        print(f"❌ No gas baseline at {args.thresholds}; measure one with --update-baseline")
+        return 1
+    measured_with = {key: baseline.get(key) for key in COMPILER_SETTINGS}
+    if measured_with != settings:
+        print(f"❌ The baseline was measured with {measured_with}, this build uses {settings}.")
+        print("   Gas is only comparable under the same compiler settings: benchmark with the baseline's "
+              "settings, or re-measure with --update-baseline")
+        return 1
+    failures = check_results(results, baseline["gas"], args.tolerance)
+    print_table(results)
+
+    if args.json_output:
+        with open(args.json_output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    print("\n" + "=" * 50)
+    if failures:
+        print(f"❌ {failures} measurement(s) exceeded their gas threshold")
+        return 1
+    print("✅ All measurements within gas thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,8 +21,7 @@ def debug_complaints():
                 print(f"Date range: {df['Date'].min()} to {df['Date'].max()}")
                 
                 print("\n💰 Wallet addresses in file:")
-                for wallet in df['Wallet Address'].unique():
-                    count = len(df[df['Wallet Address'] == wallet])
+                for wallet, count in df['Wallet Address'].value_counts().items():
                     print(f"  {wallet}: {count} complaints")
                 
                 print("\n📝 Recent complaints:")
@@ -0,0 +1,212 @@
+"""
+Concurrent health probes behind /healthz and /readyz
+
+Each probe is a callable returning a dict of details with an optional
+"status" ("ok", "warn" or "fail"; "ok" if missing). Probes run in parallel on
+a small thread pool, each bounded by `timeout`, and the report is reused for
+`ttl` seconds so health endpoints stay cheap however often they are polled.
+While one request refreshes an expired report, others get the previous one.
+
+A probe that has not returned by the timeout is reported as failed and is not
+started again until its earlier call finishes, so a hung RPC endpoint cannot
+pile up threads. The report is ready unless a critical probe failed.
+
+summary() is the public view for unauthenticated /healthz and /readyz: overall
+status plus ok/warn/fail per check. The full report (probe details such as
+block numbers, signer balance, pid) is for administrators only.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+OK, WARN, FAIL = "ok", "warn", "fail"
+_STATUS_VALUES = {OK: 1.0, WARN: 0.5, FAIL: 0.0}
+
+
+def _timed(probe):
+    start = time.perf_counter()
+    try:
+        result = dict(probe() or {})
+    except Exception as e:
+        result = {"status": FAIL, "error": str(e)}
+    result.setdefault("status", OK)
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+def run_probes(probes, timeout):
+    """Run name -> callable concurrently; returns name -> result dict (failed on timeout)"""
+    executor = ThreadPoolExecutor(max_workers=max(1, len(probes)), thread_name_prefix="probe")
+    futures = {name: executor.submit(_timed, probe) for name, probe in probes.items()}
+    wait(futures.values(), timeout=timeout)
+    # Do not block on probes still running; their threads end with the call
+    executor.shutdown(wait=False)
+    return {name: future.result() if future.done() else {"status": FAIL, "error": f"timed out after {timeout}s"}
+            for name, future in futures.items()}
+
+
+class Diagnostics:
+    def __init__(self, ttl=5.0, timeout=3.0):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._checks = {}
+        self._running = {}
+        self._executor = None
+        self._report = None
+        self._checked_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def add(self, name, probe, critical=True):
+        """Register a probe; a failing critical probe makes the instance not ready"""
+        self._checks[name] = (probe, critical)
+
+    def report(self):
+        """Latest report, refreshed if older than ttl"""
+        if self._report is not None and time.monotonic() - self._checked_at < self.ttl:
+            return self._report
+        # Only one refresh at a time; callers that already have a report do not wait for it
+        if not self._refresh_lock.acquire(blocking=self._report is None):
+            return self._report
+        try:
+            if self._report is None or time.monotonic() - self._checked_at >= self.ttl:
+                self._report = self._run()
+                self._checked_at = time.monotonic()
+            return self._report
+        finally:
+            self._refresh_lock.release()
+
+    def summary(self):
+        """Latest report without probe details: overall status and ok/warn/fail per check"""
+        report = self.report()
+        return {
+            "status": report["status"],
+            "ready": report["ready"],
+            "checks": {name: result["status"] for name, result in report["checks"].items()}
+        }
+
+    def _run(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=2 * max(1, len(self._checks)),
+                                                thread_name_prefix="diagnostics")
+        futures = {}
+        for name, (probe, _) in self._checks.items():
+            future = self._running.get(name)
+            if future is None or future.done():
+                future = self._running[name] = self._executor.submit(_timed, probe)
+            futures[name] = future
+        wait(futures.values(), timeout=self.timeout)
+
+        checks, ready, degraded = {}, True, False
+        for name, future in futures.items():
+            if future.done():
+                result = future.result()
+            else:
+                result = {"status": FAIL, "error": f"no answer within {self.timeout}s"}
+            critical = self._checks[name][1]
+            result["critical"] = critical
+            checks[name] = result
+            metrics.HEALTH_CHECK_STATUS.set(_STATUS_VALUES.get(result["status"], 0.0), check=name)
+            if result["status"] != OK:
+                degraded = True
+                if result["status"] == FAIL:
+                    logger.warning("Health check %s failed: %s", name, result.get("error", result))
+                    ready = ready and not critical
+
+        return {
+            "status": "fail" if not ready else "degraded" if degraded else "ok",
+            "ready": ready,
+            "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "pid": os.getpid(),
+            "checks": checks
+        }
+
+
+def chain_probe(blockchain_manager, max_block_lag):
+    """RPC round trip to the latest block, its age, and whether the contract is usable"""
+    def probe():
+        head = blockchain_manager.get_head()
+        if head is None:
+            return {"status": FAIL, "error": "chain unreachable"}
+        number, timestamp = head
+        lag = max(0, int(time.time() - timestamp))
+        result = {"block": number, "block_lag_seconds": lag,
+                  "contract_loaded": blockchain_manager.is_connected()}
+        if not result["contract_loaded"]:
+            result.update(status=FAIL, error="contract not loaded")
+        elif lag > max_block_lag:
+            result.update(status=WARN, error=f"latest block is {lag}s old")
+        return result
+    return probe
+
+
+def signer_probe(blockchain_manager, min_balance):
+    """Balance of the account paying for contract transactions"""
+    def probe():
+        balance = blockchain_manager.get_signer_balance()
+        if balance is None:
+            return {"status": WARN, "error": "no signing key configured"}
+        result = {"balance_eth": round(balance, 6)}
+        if balance < min_balance:
+            result.update(status=WARN, error=f"balance below {min_balance} ETH")
+        return result
+    return probe
+
+
+def model_probe(model_handle, embedding_model):
+    """Whether a classifier version and the embedding model are loaded"""
+    def probe():
+        bundle = model_handle.get()
+        result = {"version": bundle.version if bundle else None,
+                  "classes": len(bundle.classes) if bundle else 0,
+                  "embedding_model": embedding_model is not None}
+        if bundle is None or embedding_model is None:
+            result.update(status=FAIL, error="classifier or embedding model not loaded")
+        return result
+    return probe
+
+
+def store_probe(complaint_store, paths):
+    """Complaint store readable and its files writable"""
+    def probe():
+        frame, by_wallet = complaint_store.snapshot()
+        result = {"complaints": len(frame), "wallets": len(by_wallet)}
+        unwritable = [path for path in paths
+                      if not os.access(path if os.path.exists(path) else os.path.dirname(path) or ".", os.W_OK)]
+        if unwritable:
+            result.update(status=FAIL, error=f"not writable: {', '.join(unwritable)}")
+        return result
+    return probe
+
+
+def admission_probe(stages):
+    """Load on the admission stages; warns while a stage's queue is full"""
+    def probe():
+        result = {stage.name: {"active": stage.active, "waiting": stage.waiting, "queue_size": stage.max_queue}
+                  for stage in stages}
+        full = [stage.name for stage in stages if stage.max_queue and stage.waiting >= stage.max_queue]
+        if full:
+            result.update(status=WARN, error=f"queue full: {', '.join(full)}")
+        return result
+    return probe
+
+
+def runtime_probe(dropped_log_records, page_cache):
+    """Process-level counters: dropped log records (warns when rising) and page cache size"""
+    previous = {"dropped": dropped_log_records()}
+
+    def probe():
+        dropped = dropped_log_records()
+        result = {"dropped_log_records": dropped, "page_cache": page_cache.stats()}
+        if dropped > previous["dropped"]:
+            result.update(status=WARN, error=f"{dropped - previous['dropped']} log records dropped since last check")
+        previous["dropped"] = dropped
+        return result
+    return probe
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Columnar Parquet snapshots of the complaint store
+
+Writes complaints.csv as zstd-compressed Parquet partitioned by month and
+department, plus the complaint_updates.csv change log as its own dataset.
+Both CSV files are append-only, so each run exports only the rows appended
+since the previous run; the byte offsets are kept in a watermark file
+inside the snapshot directory. When a CSV file has been replaced (archiving,
+migrations), its dataset is rewritten in full into a new directory that is
+then renamed over the old one, so no row is ever exported twice; a full
+complaints export includes the complaints moved to the archive. Readers can
+load just the columns (and partitions) they need:
+
+    python export_snapshot.py export
+    python export_snapshot.py summary           # reads 3 columns only
+
+    from export_snapshot import read_snapshot
+    df = read_snapshot(columns=["Department", "Status"], filters=[("month", "=", "2025-06")])
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from complaint_archive import ARCHIVE_DIR, ComplaintArchive
+from complaint_store import COMPLAINTS_FILE, UPDATES_FILE, _TailReader
+from complaint_writer import COMPLAINT_COLUMNS, UPDATE_COLUMNS
+
+SNAPSHOT_DIR = "complaints_snapshot"
+WATERMARK_FILE = "_watermark.json"
+PARTITION_COLUMNS = ["month", "department"]
+
+
+def _load_watermark(snapshot_dir):
+    path = os.path.join(snapshot_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_watermark(snapshot_dir, watermark):
+    path = os.path.join(snapshot_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(watermark, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+
+def _reader(path, columns, state):
+    reader = _TailReader(path, columns)
+    if state:
+        reader.inode, reader.offset = state["inode"], state["offset"]
+    return reader
+
+
+def _replace_dataset(staging_dir, target_dir):
+    """Swap a freshly written dataset in for the old one (a missing staging_dir leaves none)"""
+    old_dir = target_dir + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(target_dir):
+        os.rename(target_dir, old_dir)
+    if os.path.exists(staging_dir):
+        os.rename(staging_dir, target_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _with_archived(rows, archive_dir):
+    """Hot complaint rows plus every archived complaint not also still in the hot file"""
+    archived = ComplaintArchive(archive_dir).all_complaints()
+    if archived.empty:
+        return rows
+    if rows is not None and not rows.empty:
+        # A ref is briefly in both while an archive run rewrites the hot file
+        archived = archived[~archived["Reference No"].isin(rows["Reference No"])]
+        return pd.concat([rows, archived], ignore_index=True)
+    return archived.reset_index(drop=True)
+
+
+def export_snapshot(snapshot_dir=SNAPSHOT_DIR, complaints_path=COMPLAINTS_FILE, updates_path=UPDATES_FILE,
+                    archive_dir=ARCHIVE_DIR):
+    """Append new complaints and updates to the snapshot; returns (complaints, updates) exported"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    watermark = _load_watermark(snapshot_dir)
+    # Unique per run: part files of runs within the same second must not overwrite each other
+    run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    exported = []
+
+    for name, path, columns in (("complaints", complaints_path, COMPLAINT_COLUMNS),
+                                ("updates", updates_path, UPDATE_COLUMNS)):
+        state = watermark.get(name)
+        reader = _reader(path, columns, state)
+        rows, reset = reader.read()
+        target_dir = os.path.join(snapshot_dir, name)
+        # Without a watermark (first run, lost watermark) or after a reset the rows are the whole file
+        full = reset or not state
+        output_dir = target_dir + f".new-{run_id}" if full else target_dir
+        if reset and state:
+            print(f"⚠️ {path} was replaced since the last snapshot; re-exporting it in full")
+        if full and name == "complaints":
+            # Archiving moves complaints out of the hot file (and folds their updates into them);
+            # a full export must carry them over or they vanish from the snapshot
+            rows = _with_archived(rows, archive_dir)
+        if rows is None or rows.empty:
+            exported.append(0)
+        else:
+            rows["month"] = rows["Date"].str[:7].where(rows["Date"].str.match(r"\d{4}-\d{2}"), "unknown")
+            partition_cols = ["month"]
+            if name == "complaints":
+                rows["department"] = rows["Department"].where(rows["Department"] != "", "unknown")
+                partition_cols = PARTITION_COLUMNS
+            pq.write_to_dataset(
+                pa.Table.from_pandas(rows, preserve_index=False),
+                root_path=output_dir,
+                partition_cols=partition_cols,
+                basename_template=f"part-{run_id}-{{i}}.parquet",
+                compression="zstd",
+                existing_data_behavior="overwrite_or_ignore"
+            )
+            exported.append(len(rows))
+            print(f"✅ Exported {len(rows)} {name} rows")
+        if full:
+            _replace_dataset(output_dir, target_dir)
+        if reader.inode is not None:
+            watermark[name] = {"inode": reader.inode, "offset": reader.offset}
+
+    # The watermark only moves after the data files are written, so a crash re-exports rather than skips
+    watermark["exported_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    _save_watermark(snapshot_dir, watermark)
+    return tuple(exported)
+
+
+def read_snapshot(snapshot_dir=SNAPSHOT_DIR, columns=None, filters=None, dataset="complaints"):
+    """Load a snapshot dataset as a DataFrame, reading only the requested columns and partitions"""
+    data = ds.dataset(os.path.join(snapshot_dir, dataset), format="parquet", partitioning="hive")
+    expression = None
+    for column, op, value in filters or []:
+        field = ds.field(column)
+        condition = {"=": field == value, "!=": field != value, ">=": field >= value,
+                     "<=": field <= value, ">": field > value, "<": field < value}[op]
+        expression = condition if expression is None else expression & condition
+    return data.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def summary(snapshot_dir=SNAPSHOT_DIR):
+    df = read_snapshot(snapshot_dir, columns=["Wallet Address", "Department", "Date"])
+    print(f"📊 Total complaints in snapshot: {len(df)}")
+    if df.empty:
+        return
+    print(f"Unique wallets: {df['Wallet Address'].nunique()}")
+    print(f"Date range: {df['Date'].min()} to {df['Date'].max()}")
+    print("\n🏢 Complaints per department:")
+    for department, count in df["Department"].value_counts().items():
+        print(f"  {department}: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parquet snapshots of the complaint store")
+    parser.add_argument("command", choices=["export", "summary"])
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--complaints", default=COMPLAINTS_FILE)
+    parser.add_argument("--updates", default=UPDATES_FILE)
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_snapshot(args.snapshot_dir, args.complaints, args.updates, args.archive_dir)
+    else:
+        summary(args.snapshot_dir)
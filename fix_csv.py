@@ -1,85 +1,206 @@
 #!/usr/bin/env python3
 """
 Script to fix the complaints.csv header to include blockchain fields
+
+Migrates the legacy 11-column layout to the 15-column layout by streaming
+rows in chunks into a temporary file, so memory use stays constant however
+large the complaint history is. Progress is checkpointed after every chunk;
+an interrupted run resumes where it stopped. The original file is only
+replaced, by an atomic rename, once every row has been written and fsynced.
+
+Usage:
+    python fix_csv.py [--path complaints.csv] [--chunk-size 10000] [--restart]
 """
 
-import pandas as pd
+import argparse
 import csv
+import io
+import json
+import os
 
-def fix_complaints_csv():
-    """Fix the CSV header and add missing columns for old records"""
-    
-    # Read the current CSV
-    print("📁 Reading current complaints.csv...")
-    
-    # Define the correct column names
-    new_columns = [
-        "Reference No", "Wallet Address", "Name", "Email", "Phone", 
-        "Address", "City", "State", "Zip", "Complaint", "Department", 
-        "Status", "Date", "Blockchain Status", "Transaction Hash"
-    ]
-    
-    # Read the raw CSV data
-    with open('complaints.csv', 'r', newline='', encoding='utf-8') as file:
-        reader = csv.reader(file)
-        rows = list(reader)
-    
-    print(f"📊 Found {len(rows)} rows in CSV")
-    
-    # Get the header
-    if rows:
-        current_header = rows[0]
-        print(f"🔍 Current header: {current_header}")
-        
-        # Check if we have the new format or old format
-        if len(current_header) < len(new_columns):
-            print("🔧 Converting old format to new format...")
-            
-            # Create new data with proper headers
-            new_data = []
-            
-            for i, row in enumerate(rows):
-                if i == 0:
-                    # Skip the old header
-                    continue
-                
-                # Check if this row has the new format (more columns)
-                if len(row) >= 15:  # New format
-                    new_data.append(row)
-                elif len(row) >= 11:  # Old format
-                    # Convert old format to new format
-                    new_row = [
-                        row[0] if len(row) > 0 else "",  # Reference No
-                        "",  # Wallet Address (unknown for old records)
-                        row[1] if len(row) > 1 else "",  # Name
-                        row[2] if len(row) > 2 else "",  # Email
-                        row[3] if len(row) > 3 else "",  # Phone
-                        row[4] if len(row) > 4 else "",  # Address
-                        row[5] if len(row) > 5 else "",  # City
-                        row[6] if len(row) > 6 else "",  # State
-                        row[7] if len(row) > 7 else "",  # Zip
-                        row[8] if len(row) > 8 else "",  # Complaint
-                        row[9] if len(row) > 9 else "",  # Department
-                        "Submitted",  # Status (default)
-                        row[10] if len(row) > 10 else "",  # Date
-                        "Legacy",  # Blockchain Status
-                        "N/A"  # Transaction Hash
-                    ]
-                    new_data.append(new_row)
-            
-            # Write the fixed CSV
-            print("💾 Writing fixed CSV...")
-            df = pd.DataFrame(new_data, columns=new_columns)
-            df.to_csv('complaints.csv', index=False, quoting=csv.QUOTE_MINIMAL)
-            
-            print(f"✅ Fixed CSV with {len(new_data)} records")
-            print("📋 New header:", new_columns)
-            
+from complaint_writer import COMPLAINT_COLUMNS, FileLock
+
+LEGACY_COLUMN_COUNT = 11
+
+
+def convert_row(row):
+    """Map a legacy row onto the 15-column layout; None for unusable rows"""
+    if len(row) >= len(COMPLAINT_COLUMNS):  # New format
+        return row[:len(COMPLAINT_COLUMNS)]
+    if len(row) >= LEGACY_COLUMN_COUNT:  # Old format
+        return [
+            row[0],  # Reference No
+            "",  # Wallet Address (unknown for old records)
+            row[1],  # Name
+            row[2],  # Email
+            row[3],  # Phone
+            row[4],  # Address
+            row[5],  # City
+            row[6],  # State
+            row[7],  # Zip
+            row[8],  # Complaint
+            row[9],  # Department
+            "Submitted",  # Status (default)
+            row[10],  # Date
+            "Legacy",  # Blockchain Status
+            "N/A"  # Transaction Hash
+        ]
+    return None
+
+
+def iter_records(f, final=False):
+    """Yield (raw_bytes, end_offset) for each CSV record, honouring quoted newlines
+
+    A record is complete once it ends in a newline with its double quotes
+    balanced. The bytes after the last complete record may be a row a writer
+    is still flushing, so they are only yielded when `final` is set (the
+    caller holds the file lock, or the file is no longer written).
+    """
+    pending = b""
+    for line in iter(f.readline, b""):
+        pending += line
+        if line.endswith(b"\n") and pending.count(b'"') % 2 == 0:
+            yield pending, f.tell()
+            pending = b""
+    if pending and final:
+        yield pending, f.tell()
+
+
+def parse_record(raw):
+    rows = list(csv.reader(io.StringIO(raw.decode("utf-8"))))
+    return rows[0] if rows else []
+
+
+class CSVMigration:
+    def __init__(self, path, chunk_size=10000):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.temp_path = path + ".migrating"
+        self.checkpoint_path = path + ".migrate.json"
+
+    def needs_migration(self):
+        with open(self.path, "rb") as f:
+            header = parse_record(next(iter_records(f, final=True), (b"", 0))[0])
+        print(f"🔍 Current header: {header}")
+        return len(header) < len(COMPLAINT_COLUMNS)
+
+    def _load_checkpoint(self):
+        if not (os.path.exists(self.checkpoint_path) and os.path.exists(self.temp_path)):
+            return None
+        with open(self.checkpoint_path, "r") as f:
+            checkpoint = json.load(f)
+        stat = os.stat(self.path)
+        if checkpoint.get("source_inode") != stat.st_ino or stat.st_size < checkpoint["input_offset"]:
+            print("⚠️  Source changed since the last checkpoint, starting over")
+            return None
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(checkpoint, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+
+    def _flush_chunk(self, out, chunk, checkpoint):
+        out.write("".join(chunk).encode("utf-8"))
+        out.flush()
+        os.fsync(out.fileno())
+        checkpoint["temp_size"] = out.tell()
+        self._save_checkpoint(checkpoint)
+        chunk.clear()
+
+    def _copy(self, src, out, checkpoint, skip_header, final):
+        """Stream records from src's current offset into out, checkpointing every chunk
+
+        Without `final` an unterminated tail is left for the next pass: src is
+        rewound to the end of the last complete record.
+        """
+        chunk = []
+        for raw, end in iter_records(src, final):
+            checkpoint["input_offset"] = end
+            if skip_header:
+                skip_header = False
+                continue
+            checkpoint["rows_in"] += 1
+            new_row = convert_row(parse_record(raw))
+            if new_row is None:
+                checkpoint["rows_skipped"] += 1
+                continue
+            buffer = io.StringIO()
+            csv.writer(buffer, quoting=csv.QUOTE_MINIMAL, lineterminator="\n").writerow(new_row)
+            chunk.append(buffer.getvalue())
+            checkpoint["rows_out"] += 1
+            if len(chunk) >= self.chunk_size:
+                self._flush_chunk(out, chunk, checkpoint)
+                print(f"📦 {checkpoint['rows_out']} rows migrated")
+        self._flush_chunk(out, chunk, checkpoint)
+        src.seek(checkpoint["input_offset"])
+
+    def run(self, resume=True):
+        checkpoint = self._load_checkpoint() if resume else None
+        if checkpoint:
+            print(f"⏩ Resuming after {checkpoint['rows_out']} migrated rows")
         else:
-            print("✅ CSV already has correct format")
-    
-    else:
+            checkpoint = {
+                "source_inode": os.stat(self.path).st_ino,
+                "input_offset": 0,
+                "temp_size": 0,
+                "rows_in": 0,
+                "rows_out": 0,
+                "rows_skipped": 0
+            }
+
+        src = open(self.path, "rb")
+        out = open(self.temp_path, "a+b")
+        try:
+            out.truncate(checkpoint["temp_size"])
+            out.seek(checkpoint["temp_size"])
+            if checkpoint["input_offset"] == 0:
+                out.write((",".join(COMPLAINT_COLUMNS) + "\n").encode("utf-8"))
+            src.seek(checkpoint["input_offset"])
+            self._copy(src, out, checkpoint, skip_header=checkpoint["input_offset"] == 0, final=False)
+
+            # Catch up on rows appended meanwhile and swap files while appenders are held off
+            print("🔒 Finalizing migration...")
+            with FileLock(self.path):
+                self._copy(src, out, checkpoint, skip_header=False, final=True)
+                src.close()
+                out.close()
+                os.replace(self.temp_path, self.path)
+        finally:
+            src.close()
+            out.close()
+
+        os.remove(self.checkpoint_path)
+        return checkpoint
+
+
+def fix_complaints_csv(path="complaints.csv", chunk_size=10000, resume=True):
+    """Fix the CSV header and add missing columns for old records"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
         print("❌ CSV file is empty")
+        return
+
+    print(f"📁 Reading current {path}...")
+    migration = CSVMigration(path, chunk_size)
+
+    if not os.path.exists(migration.checkpoint_path) and not migration.needs_migration():
+        print("✅ CSV already has correct format")
+        return
+
+    print("🔧 Converting old format to new format...")
+    result = migration.run(resume=resume)
+
+    print(f"✅ Fixed CSV with {result['rows_out']} records ({result['rows_skipped']} unusable rows skipped)")
+    print("📋 New header:", COMPLAINT_COLUMNS)
+
 
 if __name__ == "__main__":
-    fix_complaints_csv()
+    parser = argparse.ArgumentParser(description="Migrate complaints.csv to the 15-column format")
+    parser.add_argument("--path", default="complaints.csv")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+    args = parser.parse_args()
+    fix_complaints_csv(args.path, args.chunk_size, resume=not args.restart)
@@ -0,0 +1,105 @@
+"""
+Short-lived idempotency table for complaint submission
+
+/preview issues a random key with the confirmation form. /confirm claims the
+key before doing any work (model update, CSV write, chain transaction); a
+re-POST of the same form finds the key already claimed and gets the original
+result back instead of creating a second complaint and paying for a second
+transaction. Keys live in SQLite so every worker process shares them, and
+expire after a configurable TTL.
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+
+CLAIMED = "claimed"
+DUPLICATE = "duplicate"
+IN_PROGRESS = "in_progress"
+MISMATCH = "mismatch"
+
+
+def new_key():
+    return secrets.token_urlsafe(16)
+
+
+class IdempotencyStore:
+    def __init__(self, path="idempotency.db", ttl=24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS submissions
+                            (key TEXT PRIMARY KEY,
+                             wallet TEXT NOT NULL,
+                             ref_no TEXT,
+                             result TEXT,
+                             created_at REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS submissions_created ON submissions (created_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def claim(self, key, wallet_address):
+        """Try to take ownership of key; returns (outcome, row or None)"""
+        conn = self._connect()
+        now = time.time()
+        conn.execute("DELETE FROM submissions WHERE created_at < ?", (now - self.ttl,))
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO submissions (key, wallet, created_at) VALUES (?, ?, ?)",
+            (key, wallet_address.lower(), now)
+        ).rowcount
+        if inserted:
+            return CLAIMED, None
+        row = self.get(key)
+        if row is None:
+            # Expired between the insert attempt and the lookup
+            return self.claim(key, wallet_address)
+        if row["wallet"] != wallet_address.lower():
+            return MISMATCH, None
+        return (DUPLICATE if row["result"] is not None else IN_PROGRESS), row
+
+    def get(self, key):
+        cur = self._connect().execute(
+            "SELECT wallet, ref_no, result FROM submissions WHERE key = ?", (key,))
+        found = cur.fetchone()
+        if found is None:
+            return None
+        return {
+            "wallet": found[0],
+            "ref_no": found[1],
+            "result": json.loads(found[2]) if found[2] is not None else None
+        }
+
+    def set_ref(self, key, ref_no):
+        self._connect().execute("UPDATE submissions SET ref_no = ? WHERE key = ?", (ref_no, key))
+
+    def complete(self, key, result):
+        self._connect().execute("UPDATE submissions SET result = ? WHERE key = ?",
+                                (json.dumps(result, default=str), key))
+
+    def release(self, key):
+        """Forget a claim whose processing failed, so the user can retry"""
+        self._connect().execute("DELETE FROM submissions WHERE key = ? AND result IS NULL", (key,))
+
+    def wait_for_result(self, key, timeout, interval=0.25):
+        """Poll an in-progress key until its original request finishes
+
+        Returns the row once it has a result, None if the original request
+        released the key, or the row with result None if it is still running
+        after `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            row = self.get(key)
+            if row is None or row["result"] is not None:
+                return row
+            time.sleep(interval)
+        return self.get(key)
@@ -0,0 +1,259 @@
+"""
+Lightweight in-process metrics registry exposed in Prometheus text format
+"""
+
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Latency buckets in seconds, covering fast CSV reads up to slow receipt waits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# Batch size buckets for embedding encode calls
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+def _format_labels(labels):
+    """Render a label tuple as a Prometheus label set"""
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.type_name = "counter"
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self.type_name = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.type_name = "histogram"
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            items = [(key, dict(state, buckets=list(state["buckets"]))) for key, state in self._values.items()]
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state["buckets"]):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help_text, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, help_text):
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge, name, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, buckets=buckets)
+
+    def render(self):
+        """Render every registered metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Application metrics
+HTTP_REQUEST_DURATION = registry.histogram(
+    "complaint_desk_http_request_duration_seconds", "HTTP request latency by route")
+HTTP_REQUESTS = registry.counter(
+    "complaint_desk_http_requests_total", "HTTP requests by route and status code")
+RPC_DURATION = registry.histogram(
+    "complaint_desk_rpc_duration_seconds", "BlockchainManager method latency")
+RPC_CALLS = registry.counter(
+    "complaint_desk_rpc_calls_total", "BlockchainManager method calls by outcome")
+EMBEDDING_DURATION = registry.histogram(
+    "complaint_desk_embedding_encode_seconds", "Embedding model encode time")
+EMBEDDING_BATCH_SIZE = registry.histogram(
+    "complaint_desk_embedding_batch_size", "Texts per embedding encode call", buckets=BATCH_BUCKETS)
+PARTIAL_FIT_DURATION = registry.histogram(
+    "complaint_desk_partial_fit_seconds", "Incremental classifier update time")
+STORAGE_DURATION = registry.histogram(
+    "complaint_desk_storage_seconds", "CSV/storage read and append time")
+GROUP_COMMIT_BATCH_SIZE = registry.histogram(
+    "complaint_desk_group_commit_batch_size", "Rows written per CSV group commit", buckets=BATCH_BUCKETS)
+DUPLICATE_SUBMISSIONS = registry.counter(
+    "complaint_desk_duplicate_submissions_total", "Re-POSTed /confirm forms answered from the idempotency table")
+PENDING_TRANSACTIONS = registry.gauge(
+    "complaint_desk_pending_transactions", "Transactions sent but not yet mined")
+WATCHED_TRANSACTIONS = registry.gauge(
+    "complaint_desk_watched_transactions", "Transactions followed by the shared confirmation watcher")
+ADMISSION_REJECTIONS = registry.counter(
+    "complaint_desk_admission_rejections_total", "Requests refused by rate limits or full admission stages")
+STAGE_ACTIVE = registry.gauge(
+    "complaint_desk_stage_active", "Requests holding a slot of an admission stage")
+STAGE_WAITING = registry.gauge(
+    "complaint_desk_stage_waiting", "Requests queued for an admission stage")
+STAGE_WAIT_DURATION = registry.histogram(
+    "complaint_desk_stage_wait_seconds", "Time spent queued for an admission stage")
+PAGE_CACHE_REQUESTS = registry.counter(
+    "complaint_desk_page_cache_requests_total", "/history and /track responses by cache outcome (not_modified, hit, miss)")
+HEALTH_CHECK_STATUS = registry.gauge(
+    "complaint_desk_health_check_status", "Latest diagnostics result per check (1 ok, 0.5 warn, 0 fail)")
+
+
+_rpc_state = threading.local()
+
+
+def rpc_failed():
+    """Mark the tracked RPC call running on this thread as failed
+
+    For node errors a BlockchainManager method handles itself (logging them and
+    returning None, False or a fallback value), which would otherwise count as "ok".
+    """
+    _rpc_state.failed = True
+
+
+def rpc_error_count():
+    """Tracked RPC calls that failed on this thread so far (compare before and after a block)"""
+    return getattr(_rpc_state, "errors", 0)
+
+
+def track_rpc(func):
+    """Decorator recording call count, latency and outcome of a BlockchainManager method
+
+    A call fails if it raises, marks itself with rpc_failed() or returns {"success": False}.
+    """
+    method = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        outer_failed = getattr(_rpc_state, "failed", False)
+        _rpc_state.failed = False
+        outcome = "error"
+        try:
+            result = func(*args, **kwargs)
+            if not _rpc_state.failed and not (isinstance(result, dict) and result.get("success") is False):
+                outcome = "ok"
+            return result
+        finally:
+            _rpc_state.failed = outer_failed
+            if outcome == "error":
+                _rpc_state.errors = rpc_error_count() + 1
+            RPC_DURATION.observe(time.perf_counter() - start, method=method)
+            RPC_CALLS.inc(method=method, outcome=outcome)
+    return wrapper
+
+
+def init_app(app, token=None, allowed_addresses=("127.0.0.1", "::1")):
+    """Register request timing hooks and the /metrics endpoint on a Flask app
+
+    /metrics answers scrapers that send `Authorization: Bearer <token>` when a
+    token is configured, otherwise only clients connecting from allowed_addresses.
+    """
+    from flask import Response, abort, g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, route=route, method=request.method)
+            HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        return response
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Prometheus scrape endpoint"""
+        if token:
+            supplied = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+                abort(401)
+        elif request.remote_addr not in allowed_addresses:
+            abort(403)
+        return Response(registry.render(), content_type=CONTENT_TYPE)
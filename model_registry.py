@@ -0,0 +1,292 @@
+"""
+Versioned classifier registry with hot reload
+
+Every trained or incrementally updated classifier is published as an
+immutable version directory:
+
+    models/v00042/complaint_model.pkl
+    models/v00042/classes.pkl
+    models/v00042/manifest.json     # sha256 of each file, created_at, note
+    models/CURRENT                  # name of the live version
+
+A version directory is fully written in a temporary directory and renamed
+into place, and CURRENT is replaced atomically, so readers never see a
+half-written pickle. Loads verify the checksums. Each worker's ModelHandle
+polls CURRENT and swaps in the new (model, classes) bundle; requests
+already holding the old bundle finish with it.
+
+Incremental updates are buffered per worker and published in batches
+(every `publish_batch` samples or `publish_interval` seconds). A batch is
+fitted on top of whatever CURRENT is at that moment and published only if
+CURRENT has not moved meanwhile (checked under a lock on CURRENT), otherwise
+it is refitted on the newer version, so a retrained model published by
+train_model.py or another worker is never replaced by one built from an
+older version. Pruning always keeps the newest fully trained version.
+"""
+
+import atexit
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+import metrics
+from complaint_writer import FileLock
+
+REGISTRY_DIR = "models"
+MODEL_FILE = "complaint_model.pkl"
+CLASSES_FILE = "classes.pkl"
+POINTER_FILE = "CURRENT"
+
+logger = logging.getLogger(__name__)
+
+
+class ModelIntegrityError(Exception):
+    pass
+
+
+class StaleBaseError(Exception):
+    """CURRENT moved away from the version an update was built on"""
+
+
+class ModelBundle:
+    """A loaded classifier version; treat as immutable once published"""
+
+    def __init__(self, version, model, classes):
+        self.version = version
+        self.model = model
+        self.classes = classes
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR, keep_versions=10):
+        self.root = root
+        self.keep_versions = keep_versions
+        os.makedirs(root, exist_ok=True)
+
+    def versions(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if name.startswith("v") and os.path.isdir(os.path.join(self.root, name)))
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root, POINTER_FILE), "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_current(self, version):
+        """Atomically point CURRENT at an existing version"""
+        self.verify(version)
+        pointer = os.path.join(self.root, POINTER_FILE)
+        tmp = f"{pointer}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, pointer)
+
+    def _manifest(self, version):
+        try:
+            with open(os.path.join(self.root, version, "manifest.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def publish(self, model, classes, note="", base=None, incremental=False):
+        """Write a new version and make it current; returns the version name
+
+        With `base`, the version is only published if CURRENT still points at
+        base (compare-and-swap); otherwise StaleBaseError is raised.
+        """
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            files = {}
+            for name, obj in ((MODEL_FILE, model), (CLASSES_FILE, classes)):
+                path = os.path.join(staging, name)
+                with open(path, "wb") as f:
+                    pickle.dump(obj, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                files[name] = _sha256(path)
+            manifest = {"files": files, "created_at": time.time(), "note": note,
+                        "base": base, "incremental": incremental}
+            with open(os.path.join(staging, "manifest.json"), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            # Publishers in every worker and train_model.py serialize on CURRENT
+            with FileLock(os.path.join(self.root, POINTER_FILE)):
+                if base is not None and self.current_version() != base:
+                    raise StaleBaseError(f"CURRENT moved from {base} to {self.current_version()}")
+                existing = self.versions()
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1:05d}"
+                os.rename(staging, os.path.join(self.root, version))
+                self.set_current(version)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self._prune()
+        return version
+
+    def import_files(self, model_path=MODEL_FILE, classes_path=CLASSES_FILE, note="imported"):
+        """Publish pickles from the pre-registry layout; returns the version or None"""
+        if not os.path.exists(model_path):
+            return None
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+        classes = model.classes_
+        if os.path.exists(classes_path):
+            with open(classes_path, "rb") as f:
+                classes = pickle.load(f)
+        return self.publish(model, classes, note)
+
+    def verify(self, version):
+        """Raise ModelIntegrityError unless every file of version matches its checksum"""
+        directory = os.path.join(self.root, version)
+        try:
+            with open(os.path.join(directory, "manifest.json"), "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ModelIntegrityError(f"{version}: unreadable manifest ({e})")
+        for name, expected in manifest["files"].items():
+            path = os.path.join(directory, name)
+            if not os.path.exists(path) or _sha256(path) != expected:
+                raise ModelIntegrityError(f"{version}: checksum mismatch for {name}")
+
+    def load(self, version=None):
+        """Load and verify a version (default: current); returns a ModelBundle or None"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        self.verify(version)
+        directory = os.path.join(self.root, version)
+        with open(os.path.join(directory, MODEL_FILE), "rb") as f:
+            model = pickle.load(f)
+        with open(os.path.join(directory, CLASSES_FILE), "rb") as f:
+            classes = pickle.load(f)
+        return ModelBundle(version, model, classes)
+
+    def _prune(self):
+        current = self.current_version()
+        versions = self.versions()
+        # Incremental versions must not push the last fully trained model out of the registry
+        trained = next((v for v in reversed(versions) if not self._manifest(v).get("incremental")), None)
+        for version in versions[:-self.keep_versions]:
+            if version not in (current, trained):
+                shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
+
+
+class ModelHandle:
+    """Per-worker view of the current model that follows the registry pointer"""
+
+    def __init__(self, registry, poll_interval=10.0, publish_interval=300.0, publish_batch=50):
+        self.registry = registry
+        self.poll_interval = poll_interval
+        self.publish_interval = publish_interval
+        self.publish_batch = publish_batch
+        self._bundle = None
+        self._rejected = None
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._update_lock = threading.Lock()
+        self._last_publish = time.monotonic()
+        self._thread = None
+        self.reload()
+
+    def get(self):
+        """Current ModelBundle (or None); hold on to it for the whole request"""
+        return self._bundle
+
+    def reload(self):
+        """Swap in the registry's current version if it differs; returns True on a swap"""
+        version = self.registry.current_version()
+        if version is None or version == self._rejected or (self._bundle and self._bundle.version == version):
+            return False
+        try:
+            bundle = self.registry.load(version)
+        except Exception as e:
+            self._rejected = version
+            logger.error("Model %s rejected, keeping %s: %s", version, self._bundle.version if self._bundle else "none", e)
+            return False
+        self._bundle = bundle
+        logger.info("ML model %s loaded", version)
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if self._pending and time.monotonic() - self._last_publish >= self.publish_interval:
+                    self.flush()
+                self.reload()
+            except Exception as e:
+                logger.error("Model reload check failed: %s", e)
+
+    def partial_fit(self, embedding, labels, note="partial_fit"):
+        """Queue training samples; they are published with the next batch"""
+        with self._pending_lock:
+            self._pending.append((np.atleast_2d(embedding), list(labels), note))
+            full = len(self._pending) >= self.publish_batch
+        if full:
+            return self.flush()
+        return None
+
+    def flush(self, max_attempts=3):
+        """Fit the queued samples on top of CURRENT and publish them; returns the version or None"""
+        with self._update_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return None
+            embeddings = np.vstack([embedding for embedding, _, _ in pending])
+            labels = np.asarray([label for _, batch_labels, _ in pending for label in batch_labels])
+            note = f"{len(labels)} samples: " + ", ".join(note for _, _, note in pending[:5])
+            try:
+                for _ in range(max_attempts):
+                    base = self.registry.current_version()
+                    bundle = self._bundle
+                    if bundle is None or bundle.version != base:
+                        bundle = self.registry.load(base)
+                    if bundle is None:
+                        return None
+                    # One sample with an unknown department must not sink the whole batch
+                    known = np.isin(labels, bundle.classes)
+                    if not known.any():
+                        return None
+                    model = copy.deepcopy(bundle.model)
+                    with metrics.PARTIAL_FIT_DURATION.time():
+                        model.partial_fit(embeddings[known], labels[known], classes=bundle.classes)
+                    try:
+                        version = self.registry.publish(model, bundle.classes, note, base=base, incremental=True)
+                    except StaleBaseError as e:
+                        logger.info("Refitting incremental update: %s", e)
+                        continue
+                    self._bundle = ModelBundle(version, model, bundle.classes)
+                    return version
+                logger.error("Incremental update of %d samples dropped: CURRENT kept moving", len(labels))
+                return None
+            finally:
+                self._last_publish = time.monotonic()
@@ -0,0 +1,113 @@
+"""
+Conditional GET and rendered-page caching for per-wallet pages
+
+/history and /track render large templates from a wallet's complaints. Each
+response gets a weak ETag derived from:
+
+  * the wallet's data version (ComplaintStore.wallet_version, which changes on
+    every submit, status change and chain/reconciliation update),
+  * the request parameters (filters, cursor, ref),
+  * a render version covering templates, static assets and department list,
+  * a time bucket of `ttl` seconds, bounding how long on-chain data that the
+    store does not track (e.g. the chain-only /history fallback) can be stale.
+
+A matching If-None-Match gets an empty 304; otherwise a page rendered earlier
+for the same ETag is served from a byte-bounded LRU cache, and only a miss
+runs the route's lookups and template rendering. Pages rendered while a
+lookup failed are served but never cached.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import make_response, request
+
+import metrics
+
+
+def fingerprint_files(*paths):
+    """Stable hash of the files under the given paths (templates, asset manifest, ...)"""
+    digest = hashlib.sha1()
+    for path in paths:
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+        for name in files:
+            digest.update(name.encode())
+            with open(name, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class PageCache:
+    def __init__(self, render_version="", ttl=60, max_bytes=32 * 1024 * 1024):
+        self.render_version = render_version
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._pages = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def etag(self, wallet_address, data_version, *parts):
+        bucket = int(time.time() // self.ttl) if self.ttl > 0 else 0
+        key = "|".join([self.render_version, str(bucket), wallet_address.lower(), data_version, *map(str, parts)])
+        return hashlib.sha1(key.encode()).hexdigest()[:24]
+
+    def _get(self, etag):
+        with self._lock:
+            body = self._pages.get(etag)
+            if body is not None:
+                self._pages.move_to_end(etag)
+            return body
+
+    def _put(self, etag, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if etag in self._pages:
+                return
+            self._pages[etag] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self._size -= len(evicted)
+
+    def respond(self, etag, render):
+        """304 if the client already has etag, else the cached page, else render()
+
+        render returns (html, cacheable). A page rendered while a lookup failed
+        (e.g. "not found" because the node was down) is sent without an ETag and
+        neither stored here nor by the browser, so the next request renders again.
+        """
+        cacheable = True
+        if request.method in ("GET", "HEAD") and request.if_none_match.contains_weak(etag):
+            metrics.PAGE_CACHE_REQUESTS.inc(outcome="not_modified")
+            response = make_response("", 304)
+        else:
+            body = self._get(etag)
+            if body is None:
+                metrics.PAGE_CACHE_REQUESTS.inc(outcome="miss")
+                html, cacheable = render()
+                body = html.encode("utf-8")
+                if cacheable:
+                    self._put(etag, body)
+            else:
+                metrics.PAGE_CACHE_REQUESTS.inc(outcome="hit")
+            response = make_response(body)
+            response.content_type = "text/html; charset=utf-8"
+        if cacheable:
+            response.set_etag(etag, weak=True)
+            # Per-user content: browsers may keep it but must revalidate; shared caches must not store it
+            response.headers["Cache-Control"] = "private, no-cache"
+        else:
+            response.headers["Cache-Control"] = "no-store"
+        response.vary.add("Cookie")
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {"pages": len(self._pages), "bytes": self._size}
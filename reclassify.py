@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Bulk reclassification of stored complaints after a model retrain
+
+Streams complaints.csv in chunks, encodes complaint texts with the local
+embedding_model across a process pool (texts are sorted by length so each
+batch pads to a similar size), predicts departments with one vectorized
+predict_proba call per chunk, and records every changed department plus its
+confidence in complaint_updates.csv, the admin search index, the analytics
+counters and the vector index (the same path the app uses for field changes).
+
+Usage:
+    python reclassify.py --dry-run --report reclassify_report.csv
+    python reclassify.py --workers 4 --batch-size 64 --min-confidence 0.6
+"""
+
+import argparse
+import csv
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from analytics import AnalyticsCounters
+from complaint_store import COMPLAINTS_FILE, UPDATES_FILE
+from complaint_updates import UpdateRecorder
+from complaint_writer import GroupCommitWriter, UPDATE_COLUMNS
+from config import Config
+from model_registry import ModelRegistry
+from search_index import SearchIndex
+from vector_index import VectorIndex
+
+REPORT_COLUMNS = ["Reference No", "Old Department", "New Department", "Confidence"]
+
+_worker_model = None
+
+
+def _init_worker(embedding_model_path):
+    """Load the embedding model once per pool process"""
+    global _worker_model
+    try:
+        import torch
+        # Parallelism comes from the pool; one intra-op thread per process avoids oversubscription
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(embedding_model_path)
+
+
+def _encode_batch(task):
+    index, texts = task
+    return index, np.asarray(_worker_model.encode(texts, batch_size=len(texts)), dtype=np.float32)
+
+
+def length_sorted_batches(texts, batch_size):
+    """Split texts into batches of similar length; returns (order, [(batch_no, texts), ...])"""
+    order = np.argsort([len(text) for text in texts], kind="stable")
+    batches = []
+    for start in range(0, len(order), batch_size):
+        positions = order[start:start + batch_size]
+        batches.append((len(batches), [texts[i] for i in positions]))
+    return order, batches
+
+
+def encode_chunk(pool, texts, batch_size):
+    """Encode texts in parallel and return embeddings in the original order"""
+    order, batches = length_sorted_batches(texts, batch_size)
+    encoded = [None] * len(batches)
+    for index, embeddings in pool.imap_unordered(_encode_batch, batches):
+        encoded[index] = embeddings
+    sorted_embeddings = np.vstack(encoded)
+    embeddings = np.empty_like(sorted_embeddings)
+    embeddings[order] = sorted_embeddings
+    return embeddings
+
+
+def load_current_departments(updates_path):
+    """Department overrides already recorded in the updates log"""
+    overrides = {}
+    if not os.path.exists(updates_path):
+        return overrides
+    for chunk in pd.read_csv(updates_path, dtype=str, keep_default_na=False,
+                             on_bad_lines="skip", chunksize=100000):
+        departments = chunk[chunk["Field"] == "Department"]
+        overrides.update(zip(departments["Reference No"], departments["Value"]))
+    return overrides
+
+
+def reclassify(complaints_path=COMPLAINTS_FILE, updates_path=UPDATES_FILE, model_version=None,
+               embedding_model_path="embedding_model", workers=None, batch_size=64, chunk_size=20000,
+               min_confidence=0.0, dry_run=False, report_path=None):
+    bundle = ModelRegistry().load(model_version)
+    if bundle is None:
+        print("❌ No classifier in the model registry. Please run train_model.py first")
+        return None
+    print(f"📂 Loaded classifier {bundle.version}")
+    model = bundle.model
+    classes = np.asarray(model.classes_)
+
+    overrides = load_current_departments(updates_path)
+    writer = None if dry_run else GroupCommitWriter(updates_path, UPDATE_COLUMNS, max_batch=5000)
+    recorder = None if dry_run else UpdateRecorder(writer, SearchIndex(Config.SEARCH_INDEX_DB),
+                                                   AnalyticsCounters(Config.ANALYTICS_DB),
+                                                   VectorIndex(Config.VECTOR_INDEX_DIR))
+    report_file = open(report_path, "w", newline="", encoding="utf-8") if report_path else None
+    report = csv.writer(report_file) if report_file else None
+    if report:
+        report.writerow(REPORT_COLUMNS)
+
+    workers = workers or os.cpu_count() or 1
+    stats = {"rows": 0, "changed": 0, "low_confidence": 0}
+    transitions = {}
+    started = time.time()
+    print(f"⚙️ Encoding with {workers} worker process(es), batch size {batch_size}...")
+
+    try:
+        with Pool(workers, initializer=_init_worker, initargs=(embedding_model_path,)) as pool:
+            for chunk in pd.read_csv(complaints_path, dtype=str, keep_default_na=False,
+                                     on_bad_lines="skip", chunksize=chunk_size,
+                                     usecols=["Reference No", "Complaint", "Department", "Date"]):
+                chunk = chunk[chunk["Complaint"].str.strip() != ""]
+                if chunk.empty:
+                    continue
+
+                embeddings = encode_chunk(pool, chunk["Complaint"].tolist(), batch_size)
+                probabilities = model.predict_proba(embeddings)
+                best = probabilities.argmax(axis=1)
+                new_departments = classes[best]
+                confidences = probabilities[np.arange(len(best)), best]
+
+                current = chunk["Department"].to_numpy().copy()
+                refs = chunk["Reference No"].to_numpy()
+                dates = chunk["Date"].to_numpy()
+                for i, ref_no in enumerate(refs):
+                    current[i] = overrides.get(ref_no, current[i])
+
+                changed = new_departments != current
+                confident = confidences >= min_confidence
+                stats["rows"] += len(chunk)
+                stats["low_confidence"] += int(np.sum(changed & ~confident))
+
+                for i in np.flatnonzero(changed & confident):
+                    old, new, confidence = current[i], new_departments[i], float(confidences[i])
+                    transitions[(old, new)] = transitions.get((old, new), 0) + 1
+                    if report:
+                        report.writerow([refs[i], old, new, f"{confidence:.4f}"])
+                    if recorder:
+                        complaint = {"Reference No": refs[i], "Department": old, "Date": dates[i]}
+                        recorder.record(complaint, "Department", new, wait=False)
+                        recorder.record(complaint, "Department Confidence", f"{confidence:.4f}", wait=False)
+                    stats["changed"] += 1
+
+                if recorder:
+                    recorder.flush()
+                print(f"📊 {stats['rows']} complaints processed, {stats['changed']} reclassified")
+    finally:
+        if recorder:
+            recorder.flush()
+        if writer:
+            writer.close()
+        if report_file:
+            report_file.close()
+
+    elapsed = time.time() - started
+    print(f"\n✅ Processed {stats['rows']} complaints in {elapsed:.1f}s")
+    print(f"🔀 {'Would change' if dry_run else 'Changed'} {stats['changed']} departments "
+          f"({stats['low_confidence']} changes below --min-confidence skipped)")
+    for (old, new), count in sorted(transitions.items(), key=lambda item: -item[1]):
+        print(f"   {old or '(none)'} → {new}: {count}")
+    if report_path:
+        print(f"📄 Diff report written to {report_path}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-route stored complaints with the current model")
+    parser.add_argument("--complaints", default=COMPLAINTS_FILE)
+    parser.add_argument("--updates", default=UPDATES_FILE)
+    parser.add_argument("--model-version", help="Registry version to use (default: current)")
+    parser.add_argument("--embedding-model", default="embedding_model")
+    parser.add_argument("--workers", type=int, default=None, help="Encoding processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--chunk-size", type=int, default=20000, help="Rows read from the store at a time")
+    parser.add_argument("--min-confidence", type=float, default=0.0,
+                        help="Only move complaints whose new department has at least this probability")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    parser.add_argument("--report", help="Write a CSV diff of every change to this path")
+    args = parser.parse_args()
+
+    reclassify(args.complaints, args.updates, args.model_version, args.embedding_model, args.workers,
+               args.batch_size, args.chunk_size, args.min_confidence, args.dry_run, args.report)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Reconcile local complaint records with the blockchain
+
+Finds every stored complaint without a confirmed transaction (Blockchain
+Status Failed, Legacy, empty, or Pending for longer than --pending-after
+minutes), checks in bulk which of their refs already exist on chain, and:
+
+  * marks refs that are already on chain as Success, with the submitting
+    transaction hash looked up from ComplaintSubmitted logs;
+  * resubmits the rest as a pipeline of locally-numbered transactions
+    (up to --max-in-flight unconfirmed at once, at most --rate per second)
+    and writes each tx hash back as soon as it is sent.
+
+Every send and outcome is appended to a journal file, so an interrupted run
+resumes without resubmitting: refs with a sent transaction are settled from
+their receipts first. Stale Pending rows sent by the app are looked up by
+their stored transaction hash and only resubmitted when the node does not
+know that transaction. Refs whose resubmission already failed (reverted) are
+not sent again unless --retry-failed is given, so a failing ref does not pay
+gas on every run.
+
+Usage:
+    python reconcile.py --dry-run
+    python reconcile.py --rate 2 --max-in-flight 16
+    python reconcile.py --retry-failed
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from analytics import AnalyticsCounters
+from complaint_store import ComplaintStore, COMPLAINTS_FILE, UPDATES_FILE
+from complaint_updates import UpdateRecorder
+from complaint_writer import GroupCommitWriter, UPDATE_COLUMNS
+from config import Config
+from search_index import SearchIndex
+
+UNCONFIRMED_STATUSES = ("Failed", "Legacy", "", "N/A")
+JOURNAL_FILE = "reconcile_journal.jsonl"
+
+
+class Journal:
+    """Append-only record of sends and outcomes; the last entry per ref wins"""
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    self.entries[entry["ref_no"]] = entry
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, ref_no, state, tx_hash=None):
+        entry = {"ref_no": ref_no, "state": state, "tx_hash": tx_hash,
+                 "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        self.entries[ref_no] = entry
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class Reconciler:
+    def __init__(self, blockchain_manager, store, journal, rate=2.0, max_in_flight=16, dry_run=False,
+                 retry_failed=False):
+        self.blockchain_manager = blockchain_manager
+        self.store = store
+        self.journal = journal
+        self.min_interval = 1.0 / rate if rate > 0 else 0
+        self.max_in_flight = max_in_flight
+        self.dry_run = dry_run
+        self.retry_failed = retry_failed
+        self.stats = {"already_on_chain": 0, "resubmitted": 0, "confirmed": 0, "failed": 0,
+                      "still_pending": 0, "skipped_failed": 0}
+        if not dry_run:
+            self.updates_writer = GroupCommitWriter(UPDATES_FILE, UPDATE_COLUMNS)
+            self.recorder = UpdateRecorder(self.updates_writer, SearchIndex(Config.SEARCH_INDEX_DB),
+                                           AnalyticsCounters(Config.ANALYTICS_DB))
+
+    def record_update(self, complaint, field, value):
+        """Write a field change to the updates log, search index and analytics (like the app does)"""
+        self.recorder.record(complaint, field, value, wait=False)
+
+    def candidates(self, pending_after_minutes):
+        df, _ = self.store.snapshot()
+        cutoff = (datetime.now() - timedelta(minutes=pending_after_minutes)).strftime("%Y-%m-%d %H:%M:%S")
+        status = df["Blockchain Status"]
+        mask = status.isin(UNCONFIRMED_STATUSES) | ((status == "Pending") & (df["Date"] < cutoff))
+        return {row["Reference No"]: row for row in df[mask].drop(columns="_wallet").to_dict(orient="records")}
+
+    def settle_journal(self, complaints):
+        """Resolve transactions sent by an earlier, interrupted run"""
+        for ref_no, entry in list(self.journal.entries.items()):
+            if entry["state"] != "sent" or ref_no not in complaints:
+                continue
+            receipt = self.blockchain_manager.get_transaction_receipt(entry["tx_hash"])
+            if receipt is not None:
+                self._settle(complaints.pop(ref_no), entry["tx_hash"], receipt)
+
+    def check_pending(self, complaints):
+        """Stale Pending rows: settle mined transactions, leave those the node still holds
+
+        Only a Pending row whose transaction the node has never seen (dropped
+        from the mempool, or never broadcast) stays a resubmission candidate.
+        """
+        for ref_no, complaint in list(complaints.items()):
+            tx_hash = complaint.get("Transaction Hash", "")
+            if complaint["Blockchain Status"] != "Pending" or tx_hash in ("", "N/A"):
+                continue
+            try:
+                receipt = self.blockchain_manager.get_transaction_receipt(tx_hash)
+                known = receipt is not None or self.blockchain_manager.get_transaction(tx_hash) is not None
+            except Exception as e:
+                print(f"⚠️ Could not look up {ref_no}'s transaction {tx_hash}, leaving it Pending: {e}")
+                known, receipt = True, None
+            if receipt is not None:
+                complaint = complaints.pop(ref_no)
+                if not self.dry_run:
+                    self._settle(complaint, tx_hash, receipt)
+            elif known:
+                complaints.pop(ref_no)
+                self.stats["still_pending"] += 1
+
+    def _settle(self, complaint, tx_hash, receipt):
+        ref_no = complaint["Reference No"]
+        if receipt.status == 1:
+            self.stats["confirmed"] += 1
+            self.journal.record(ref_no, "confirmed", tx_hash)
+            self.record_update(complaint, "Blockchain Status", "Success")
+        else:
+            self.stats["failed"] += 1
+            self.journal.record(ref_no, "failed", tx_hash)
+            self.record_update(complaint, "Blockchain Status", "Failed")
+
+    def mark_existing(self, complaints):
+        """Bulk existence check; refs already on chain are marked Success with their tx hash"""
+        exists = self.blockchain_manager.complaints_exist(complaints.keys())
+        on_chain = [ref_no for ref_no, present in exists.items() if present]
+        self.stats["already_on_chain"] = len(on_chain)
+        print(f"🔍 {len(on_chain)} of {len(complaints)} refs already exist on chain")
+        if self.dry_run or not on_chain:
+            return [ref_no for ref_no in complaints if ref_no not in on_chain]
+
+        try:
+            tx_hashes = self.blockchain_manager.find_submission_transactions(on_chain, Config.CONTRACT_DEPLOY_BLOCK)
+        except Exception as e:
+            print(f"⚠️ Could not look up submission transactions, keeping stored hashes: {e}")
+            tx_hashes = {}
+        for ref_no in on_chain:
+            complaint = complaints[ref_no]
+            if tx_hashes.get(ref_no) and complaint.get("Transaction Hash") != tx_hashes[ref_no]:
+                self.record_update(complaint, "Transaction Hash", tx_hashes[ref_no])
+            self.record_update(complaint, "Blockchain Status", "Success")
+            self.journal.record(ref_no, "exists", tx_hashes.get(ref_no))
+        return [ref_no for ref_no in complaints if ref_no not in on_chain]
+
+    def resubmit(self, complaints, missing):
+        """Send missing refs with consecutive nonces, keeping a bounded window of unconfirmed transactions"""
+        nonce = self.blockchain_manager.get_pending_nonce()
+        in_flight = deque()
+        last_send = 0.0
+        for count, ref_no in enumerate(missing, 1):
+            while len(in_flight) >= self.max_in_flight:
+                self._wait_oldest(complaints, in_flight)
+
+            wait = self.min_interval - (time.monotonic() - last_send)
+            if wait > 0:
+                time.sleep(wait)
+            complaint = complaints[ref_no]
+            complaint_data = {"name": complaint["Name"], "email": complaint["Email"],
+                              "phone": complaint["Phone"], "complaint": complaint["Complaint"]}
+            try:
+                tx_hash = self.blockchain_manager.send_complaint_transaction(
+                    ref_no, complaint_data, complaint["Department"], complaint["Wallet Address"], nonce)
+            except Exception as e:
+                print(f"❌ Could not send {ref_no}: {e}")
+                # Re-read the nonce in case the failed send consumed it
+                nonce = self.blockchain_manager.get_pending_nonce()
+                continue
+            last_send = time.monotonic()
+            nonce += 1
+            self.stats["resubmitted"] += 1
+            self.journal.record(ref_no, "sent", tx_hash)
+            self.record_update(complaint, "Transaction Hash", tx_hash)
+            self.record_update(complaint, "Blockchain Status", "Pending")
+            in_flight.append((ref_no, tx_hash, time.monotonic()))
+            if count % 50 == 0:
+                print(f"📤 {count} / {len(missing)} sent")
+
+        while in_flight:
+            self._wait_oldest(complaints, in_flight)
+
+    def _wait_oldest(self, complaints, in_flight, timeout=600):
+        ref_no, tx_hash, sent_at = in_flight[0]
+        while True:
+            receipt = self.blockchain_manager.get_transaction_receipt(tx_hash)
+            if receipt is not None:
+                in_flight.popleft()
+                self._settle(complaints[ref_no], tx_hash, receipt)
+                return
+            if time.monotonic() - sent_at > timeout:
+                # Left as Pending in the journal; the next run settles it
+                in_flight.popleft()
+                print(f"⏳ {ref_no} not mined after {timeout}s, will be checked on the next run")
+                return
+            time.sleep(2)
+
+    def run(self, pending_after_minutes=60):
+        complaints = self.candidates(pending_after_minutes)
+        print(f"📋 {len(complaints)} local complaints without a confirmed transaction")
+        if not complaints:
+            return self.stats
+        if not self.dry_run:
+            self.settle_journal(complaints)
+        self.check_pending(complaints)
+        if self.stats["still_pending"]:
+            print(f"⏳ {self.stats['still_pending']} Pending transactions are still known to the node, not resent")
+        missing = self.mark_existing(complaints)
+        # A sent-but-unmined transaction from an earlier run must not be sent again
+        missing = [ref_no for ref_no in missing if self.journal.entries.get(ref_no, {}).get("state") != "sent"]
+        if not self.retry_failed:
+            # A resubmission that reverted would most likely revert again, paying gas each run
+            failed = {ref_no for ref_no in missing if self.journal.entries.get(ref_no, {}).get("state") == "failed"}
+            if failed:
+                self.stats["skipped_failed"] = len(failed)
+                print(f"⏭️ {len(failed)} refs whose resubmission failed before are skipped (use --retry-failed)")
+                missing = [ref_no for ref_no in missing if ref_no not in failed]
+        print(f"🔁 {len(missing)} refs {'would be' if self.dry_run else 'will be'} resubmitted")
+        if missing and not self.dry_run:
+            self.resubmit(complaints, missing)
+        return self.stats
+
+    def close(self):
+        if not self.dry_run:
+            self.updates_writer.close()
+        self.journal.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resubmit complaints missing from the blockchain")
+    parser.add_argument("--rate", type=float, default=2.0, help="Maximum transactions sent per second")
+    parser.add_argument("--max-in-flight", type=int, default=16, help="Unconfirmed transactions allowed at once")
+    parser.add_argument("--pending-after", type=int, default=60,
+                        help="Treat Pending records older than this many minutes as unconfirmed")
+    parser.add_argument("--journal", default=JOURNAL_FILE)
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Also resubmit refs whose earlier resubmission failed on chain")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be done")
+    args = parser.parse_args()
+
+    from chain_backend import create_blockchain_manager
+    manager = create_blockchain_manager()
+    if not manager.is_connected():
+        print("❌ Blockchain not connected; check CHAIN_BACKEND, BLOCKCHAIN_NETWORK and contract_info.json")
+        raise SystemExit(1)
+
+    reconciler = Reconciler(manager, ComplaintStore(COMPLAINTS_FILE, UPDATES_FILE), Journal(args.journal),
+                            args.rate, args.max_in_flight, args.dry_run, args.retry_failed)
+    try:
+        stats = reconciler.run(args.pending_after)
+    finally:
+        reconciler.close()
+    print(f"✅ Done: {stats['already_on_chain']} already on chain, {stats['resubmitted']} resubmitted, "
+          f"{stats['confirmed']} confirmed, {stats['failed']} failed, "
+          f"{stats['still_pending']} still pending, {stats['skipped_failed']} earlier failures skipped")
@@ -0,0 +1,166 @@
+"""
+Time-sortable, collision-free complaint reference numbers
+
+A reference number is 8 characters from 0-9A-Z (digits sort before letters,
+so string order equals numeric order):
+
+    TTTTT W SS
+    |     | +- per-worker sequence within the minute (1296 values)
+    |     +--- worker slot (36 workers)
+    +--------- minutes since 2025-01-01 UTC (good for ~114 years)
+
+Refs from the same worker are strictly increasing, and two workers can never
+produce the same ref because their slots differ. Sorting refs therefore
+sorts complaints by submission minute, and a date range maps to a ref range.
+
+Each process claims a worker slot by holding an exclusive lock on
+`<state dir>/worker-<slot>.lock` (or uses WORKER_ID from the environment
+when several hosts share one store). The slot file also records the last
+minute issued, so a restarted worker never reuses a minute it already used.
+The slot is claimed on the first next_ref() of each process, not at import:
+workers forked from a preloaded app would otherwise all inherit the parent's
+locked slot and issue the same refs.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BASE = len(ALPHABET)
+TIME_DIGITS = 5
+SEQ_DIGITS = 2
+MAX_WORKERS = BASE
+MAX_SEQUENCE = BASE ** SEQ_DIGITS
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def _encode(value, width):
+    digits = []
+    for _ in range(width):
+        value, remainder = divmod(value, BASE)
+        digits.append(ALPHABET[remainder])
+    if value:
+        raise OverflowError("Value does not fit in reference number")
+    return "".join(reversed(digits))
+
+
+def _decode(text):
+    value = 0
+    for char in text:
+        value = value * BASE + ALPHABET.index(char)
+    return value
+
+
+def _minute(timestamp):
+    return int((timestamp - EPOCH) // 60)
+
+
+def ref_datetime(ref_no):
+    """Submission minute embedded in a reference number (UTC)"""
+    minute = _decode(ref_no[:TIME_DIGITS])
+    return datetime.fromtimestamp(EPOCH + minute * 60, tz=timezone.utc)
+
+
+def ref_range(start, end):
+    """Inclusive (low, high) ref bounds covering datetimes start..end, for range scans"""
+    low = _encode(max(_minute(start.timestamp()), 0), TIME_DIGITS) + "0" * (1 + SEQ_DIGITS)
+    high = _encode(max(_minute(end.timestamp()), 0), TIME_DIGITS) + "Z" * (1 + SEQ_DIGITS)
+    return low, high
+
+
+class ReferenceGenerator:
+    def __init__(self, state_dir=".refgen", worker_id=None):
+        self.state_dir = state_dir
+        self._lock = threading.Lock()
+        self._slot_file = None
+        self._pid = None  # process that holds self._slot_file's lock
+        self._configured_id = None if worker_id is None else int(worker_id)
+        if self._configured_id is not None and not 0 <= self._configured_id < MAX_WORKERS:
+            raise ValueError(f"WORKER_ID must be between 0 and {MAX_WORKERS - 1}")
+        self.worker_id = None
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _ensure_slot(self):
+        """Claim a slot for the current process (caller holds self._lock)"""
+        if self._pid == os.getpid():
+            return
+        if self._slot_file is not None:
+            # Inherited across fork: the parent's lock is not ours to use
+            self._slot_file.close()
+            self._slot_file = None
+        if self._configured_id is None:
+            self.worker_id = self._claim_slot()
+        else:
+            self.worker_id = self._configured_id
+            self._slot_file = open(self._slot_path(self.worker_id), "a+")
+            if not self._try_lock(self._slot_file):
+                self._slot_file.close()
+                self._slot_file = None
+                raise RuntimeError(f"Worker slot {self.worker_id} is already in use")
+        self._pid = os.getpid()
+        self._last_minute = self._read_high_water()
+        self._sequence = MAX_SEQUENCE  # forces a fresh minute on first use
+
+    def _slot_path(self, slot):
+        return os.path.join(self.state_dir, f"worker-{slot}.lock")
+
+    @staticmethod
+    def _try_lock(fh):
+        try:
+            if fcntl:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _claim_slot(self):
+        for slot in range(MAX_WORKERS):
+            fh = open(self._slot_path(slot), "a+")
+            if self._try_lock(fh):
+                self._slot_file = fh
+                return slot
+            fh.close()
+        raise RuntimeError(f"All {MAX_WORKERS} reference number worker slots are in use")
+
+    def _read_high_water(self):
+        self._slot_file.seek(0)
+        content = self._slot_file.read().strip()
+        return int(content) if content.isdigit() else -1
+
+    def _write_high_water(self, minute):
+        self._slot_file.seek(0)
+        self._slot_file.truncate()
+        self._slot_file.write(str(minute))
+        self._slot_file.flush()
+        os.fsync(self._slot_file.fileno())
+
+    def next_ref(self):
+        """Issue the next reference number for this worker"""
+        with self._lock:
+            self._ensure_slot()
+            minute = max(_minute(time.time()), 0)
+            if minute > self._last_minute:
+                self._last_minute = minute
+                self._sequence = 0
+                self._write_high_water(minute)
+            elif self._sequence >= MAX_SEQUENCE:
+                # Sequence exhausted (or restarted within a used minute): borrow the next minute
+                self._last_minute += 1
+                self._sequence = 0
+                self._write_high_water(self._last_minute)
+            sequence = self._sequence
+            self._sequence += 1
+            return (_encode(self._last_minute, TIME_DIGITS)
+                    + ALPHABET[self.worker_id]
+                    + _encode(sequence, SEQ_DIGITS))
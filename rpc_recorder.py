@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Record and replay JSON-RPC traffic of the web3 backend
+
+RecordingProvider wraps the real provider and appends every request,
+response and its latency to a gzip-compressed JSON-lines file.
+ReplayProvider serves a recording back without any network access, either
+at the recorded latency (speed 1.0), scaled (speed 2.0 = twice as fast) or
+instantly (speed 0), so app performance can be compared between builds
+without testnet noise:
+
+    RPC_RECORD_FILE=rpc.jsonl.gz python app.py          # record a session
+    RPC_REPLAY_FILE=rpc.jsonl.gz RPC_REPLAY_SPEED=0 python app.py
+
+    python rpc_recorder.py summary rpc.jsonl.gz
+    python rpc_recorder.py bench rpc.jsonl.gz --wallet 0x... --ref 0K94F300 --speed 0
+
+Responses are matched on (method, params) and served in recorded order,
+cycling when a request is repeated more often than it was recorded. A request
+that was never recorded with those params falls back to the next response
+recorded for the same method, and fails with a JSON-RPC error if the method
+was never seen.
+"""
+
+import argparse
+import atexit
+import gzip
+import json
+import logging
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    if hasattr(value, "hex"):
+        return value.hex()
+    return str(value)
+
+
+def _request_key(method, params):
+    return method, json.dumps(params, sort_keys=True, separators=(",", ":"), default=_json_default)
+
+
+def read_recording(path):
+    """Return (header, records) from a recording file"""
+    header, records = None, []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # torn tail of an interrupted recording
+            if header is None and "version" in entry:
+                header = entry
+            else:
+                records.append(entry)
+    return header or {}, records
+
+
+try:
+    from web3.providers.base import BaseProvider
+except ImportError:  # replay summaries and the memory backend do not need web3
+    BaseProvider = object
+
+
+class RecordingProvider(BaseProvider):
+    """Pass requests through to `provider`, recording each one with its latency"""
+
+    def __init__(self, provider, path, flush_every=50):
+        super().__init__()
+        self.provider = provider
+        self.path = path
+        self.flush_every = flush_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "at", encoding="utf-8")
+        endpoint = getattr(provider, "endpoint_uri", None)
+        self._write({"version": FORMAT_VERSION, "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                     # Host only: RPC URLs often embed an API key
+                     "endpoint": urlparse(str(endpoint)).hostname if endpoint else None})
+        atexit.register(self.close)
+
+    def _write(self, entry):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(entry, separators=(",", ":"), default=_json_default) + "\n")
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def make_request(self, method, params):
+        start = time.perf_counter()
+        response = self.provider.make_request(method, params)
+        self._write({"m": method, "p": params, "r": response, "t": round(time.perf_counter() - start, 6)})
+        return response
+
+    def is_connected(self, show_traceback=False):
+        return self.provider.is_connected(show_traceback)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ReplayProvider(BaseProvider):
+    """Serve responses from a recording; speed 1.0 = recorded latency, 0 = instant"""
+
+    def __init__(self, path, speed=1.0):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        self.header, records = read_recording(path)
+        self._exact = defaultdict(deque)
+        self._by_method = defaultdict(deque)
+        for record in records:
+            entry = (record["r"], record["t"])
+            self._exact[_request_key(record["m"], record["p"])].append(entry)
+            self._by_method[record["m"]].append(entry)
+        self._lock = threading.Lock()
+        self.hits = self.fallbacks = self.misses = 0
+        logger.info("Replaying %d recorded RPC calls from %s at speed %s", len(records), path, speed)
+
+    def _next(self, queue):
+        # Rotate so repeated requests cycle through every recorded response
+        entry = queue.popleft()
+        queue.append(entry)
+        return entry
+
+    def make_request(self, method, params):
+        with self._lock:
+            exact = self._exact.get(_request_key(method, params))
+            if exact:
+                self.hits += 1
+                response, duration = self._next(exact)
+            elif self._by_method.get(method):
+                self.fallbacks += 1
+                response, duration = self._next(self._by_method[method])
+            else:
+                self.misses += 1
+                response, duration = None, 0
+        if response is None:
+            logger.warning("RPC call not in recording", extra={"rpc_method": method})
+            return {"jsonrpc": "2.0", "id": 0,
+                    "error": {"code": -32601, "message": f"{method} not in recording {self.path}"}}
+        if self.speed > 0 and duration:
+            time.sleep(duration / self.speed)
+        return response
+
+    def is_connected(self, show_traceback=False):
+        return bool(self._by_method)
+
+    def stats(self):
+        return {"hits": self.hits, "fallbacks": self.fallbacks, "misses": self.misses}
+
+
+def parse_speed(value):
+    value = str(value).strip().lower()
+    if value == "instant":
+        return 0.0
+    if value in ("", "recorded"):
+        return 1.0
+    return float(value)
+
+
+def provider_from_config(provider):
+    """Wrap (or replace) the web3 backend's provider as RPC_RECORD_FILE / RPC_REPLAY_FILE ask"""
+    if Config.RPC_REPLAY_FILE:
+        return ReplayProvider(Config.RPC_REPLAY_FILE, parse_speed(Config.RPC_REPLAY_SPEED))
+    if Config.RPC_RECORD_FILE:
+        logger.info("Recording RPC calls to %s", Config.RPC_RECORD_FILE)
+        return RecordingProvider(provider, Config.RPC_RECORD_FILE)
+    return provider
+
+
+def summary(path):
+    header, records = read_recording(path)
+    print(f"📼 {path}: {len(records)} calls recorded {header.get('recorded_at', '?')} from {header.get('endpoint', '?')}")
+    by_method = defaultdict(list)
+    for record in records:
+        by_method[record["m"]].append(record["t"] * 1000)
+    print(f"{'method':<32} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'total s':>9}")
+    for method, times in sorted(by_method.items(), key=lambda item: -sum(item[1])):
+        times.sort()
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        print(f"{method:<32} {len(times):>6} {statistics.median(times):>9.1f} {p95:>9.1f} {sum(times) / 1000:>9.2f}")
+
+
+def bench(path, wallet, refs, iterations=20, speed=0.0):
+    """Time /track and /history against a recording (both run offline)"""
+    Config.CHAIN_BACKEND = "web3"
+    Config.RPC_REPLAY_FILE = path
+    Config.RPC_REPLAY_SPEED = str(speed)
+    Config.RPC_RECORD_FILE = None
+    from app import app, blockchain_manager
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["wallet_address"] = wallet
+
+    requests_to_time = [("/history", lambda: client.get("/history"))]
+    for ref_no in refs:
+        requests_to_time.append((f"/track {ref_no}", lambda ref_no=ref_no: client.post("/track", data={"ref_no": ref_no})))
+
+    print(f"⏱️  {iterations} iterations per request, replay speed {speed or 'instant'}")
+    for name, send in requests_to_time:
+        send()  # warm caches the way a running server would have them
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = send()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"  {name:<40} status {response.status_code}  p50 {statistics.median(timings):8.2f} ms  "
+              f"max {timings[-1]:8.2f} ms")
+    print(f"📊 Replay: {blockchain_manager.w3.provider.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or benchmark against a recorded RPC session")
+    parser.add_argument("command", choices=["summary", "bench"])
+    parser.add_argument("recording")
+    parser.add_argument("--wallet", help="Session wallet for bench requests")
+    parser.add_argument("--ref", action="append", default=[], help="Reference number to /track (repeatable)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--speed", default="instant", help="'instant', 'recorded' or a speed factor")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        summary(args.recording)
+    else:
+        if not args.wallet:
+            parser.error("bench needs --wallet")
+        bench(args.recording, args.wallet, args.ref, args.iterations, parse_speed(args.speed))
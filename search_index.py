@@ -0,0 +1,227 @@
+"""
+Full-text and faceted complaint search for administrators
+
+A SQLite database next to the CSV store holds one row per complaint with
+its facet columns (department, status, city, state, date) plus an FTS5
+inverted index over the complaint text. /confirm indexes each new complaint
+and status changes are applied as they are recorded, so searches never scan
+complaints.csv. Rebuild from the store with:
+
+    python search_index.py rebuild
+"""
+
+import argparse
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+FACETS = {
+    "department": "c.department",
+    "status": "c.status",
+    "city": "c.city",
+    "month": "substr(c.date, 1, 7)"
+}
+INDEXED_FIELDS = {
+    "Department": "department",
+    "Status": "status",
+    "Blockchain Status": "blockchain_status"
+}
+FACET_LIMIT = 20
+FACET_CACHE_SIZE = 64  # filters whose totals and facet counts are kept per connection
+MAX_RESULTS = 100
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    words = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class SearchIndex:
+    def __init__(self, path="search_index.db"):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS complaints
+                (id INTEGER PRIMARY KEY,
+                 ref_no TEXT NOT NULL UNIQUE,
+                 department TEXT COLLATE NOCASE,
+                 status TEXT COLLATE NOCASE,
+                 city TEXT COLLATE NOCASE,
+                 state TEXT COLLATE NOCASE,
+                 date TEXT,
+                 blockchain_status TEXT);
+            CREATE INDEX IF NOT EXISTS complaints_department ON complaints (department, date);
+            CREATE INDEX IF NOT EXISTS complaints_status ON complaints (status, date);
+            CREATE INDEX IF NOT EXISTS complaints_city ON complaints (city, date);
+            CREATE INDEX IF NOT EXISTS complaints_date ON complaints (date);
+            CREATE VIRTUAL TABLE IF NOT EXISTS complaint_text
+                USING fts5(complaint, city, state, department, tokenize='porter unicode61');
+        """)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def index_complaints(self, rows):
+        """Insert or replace complaints given as dicts with complaint store column names"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                values = (row["Reference No"], row.get("Department", ""), row.get("Status", ""),
+                          row.get("City", ""), row.get("State", ""), row.get("Date", ""),
+                          row.get("Blockchain Status", ""))
+                row_id = conn.execute("""
+                    INSERT INTO complaints (ref_no, department, status, city, state, date, blockchain_status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (ref_no) DO UPDATE SET
+                        department = excluded.department, status = excluded.status,
+                        city = excluded.city, state = excluded.state,
+                        date = excluded.date, blockchain_status = excluded.blockchain_status
+                    RETURNING id""", values).fetchone()[0]
+                conn.execute("DELETE FROM complaint_text WHERE rowid = ?", (row_id,))
+                conn.execute("INSERT INTO complaint_text (rowid, complaint, city, state, department) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (row_id, row.get("Complaint", ""), values[3], values[4], values[1]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._changed()
+
+    def index_complaint(self, row):
+        self.index_complaints([row])
+
+    def update_field(self, ref_no, field, value):
+        """Apply a recorded field change; fields that are not indexed are ignored"""
+        column = INDEXED_FIELDS.get(field)
+        if column is None:
+            return
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            found = conn.execute(f"UPDATE complaints SET {column} = ? WHERE ref_no = ? RETURNING id",
+                                 (value, ref_no)).fetchone()
+            if found and column == "department":
+                conn.execute("UPDATE complaint_text SET department = ? WHERE rowid = ?", (value, found[0]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._changed()
+
+    def search(self, text="", department=None, status=None, city=None, state=None,
+               date_from=None, date_to=None, limit=20, offset=0):
+        """Return {"results", "total", "facets"} for a text query plus facet filters"""
+        clauses, params = [], []
+        for column, value in (("department", department), ("status", status),
+                              ("city", city), ("state", state)):
+            if value:
+                clauses.append(f"c.{column} = ?")
+                params.append(value)
+        if date_from:
+            clauses.append("c.date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("c.date <= ?")
+            params.append(date_to + " 23:59:59" if len(date_to) == 10 else date_to)
+
+        match = fts_query(text or "")
+        if match:
+            # Restrict by the FTS match first: letting a facet index drive the join
+            # would rescan the FTS table once per complaint of that facet value
+            clauses.insert(0, "c.id IN (SELECT rowid FROM complaint_text WHERE complaint_text MATCH ?)")
+            params.insert(0, match)
+            source = "complaint_text CROSS JOIN complaints c ON c.id = complaint_text.rowid"
+            row_clauses = ["complaint_text MATCH ?"] + clauses[1:]
+            snippet = "snippet(complaint_text, 0, '[', ']', ' … ', 12)"
+            order = "complaint_text.rank"
+        else:
+            source = "complaints c CROSS JOIN complaint_text ON complaint_text.rowid = c.id"
+            row_clauses = clauses
+            snippet = "substr(complaint_text.complaint, 1, 160)"
+            order = "c.date DESC"
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        row_where = " WHERE " + " AND ".join(row_clauses) if row_clauses else ""
+
+        conn = self._connect()
+        limit = max(1, min(int(limit), MAX_RESULTS))
+        rows = conn.execute(
+            f"SELECT c.ref_no, c.date, c.department, c.status, c.city, c.state, c.blockchain_status, {snippet} "
+            f"FROM {source}{row_where} ORDER BY {order} LIMIT ? OFFSET ?",
+            params + [limit, max(int(offset), 0)]
+        ).fetchall()
+        # Totals and facets only need the complaints table (the match is a rowid set)
+        total, facets = self._aggregate(conn, where, params)
+
+        keys = ["ref_no", "date", "department", "status", "city", "state", "blockchain_status", "snippet"]
+        return {"results": [dict(zip(keys, row)) for row in rows], "total": total, "facets": facets}
+
+    def _aggregate(self, conn, where, params):
+        """Total and facet counts for a filter, cached until the index changes"""
+        cache = getattr(self._local, "facet_cache", None)
+        if cache is None:
+            cache = self._local.facet_cache = OrderedDict()
+        # data_version moves when another connection commits; own writes bump self._local.writes
+        generation = (conn.execute("PRAGMA data_version").fetchone()[0], getattr(self._local, "writes", 0))
+        key = (where, tuple(params))
+        cached = cache.get(key)
+        if cached and cached[0] == generation:
+            cache.move_to_end(key)
+            return cached[1]
+
+        total = conn.execute(f"SELECT COUNT(*) FROM complaints c{where}", params).fetchone()[0]
+        facets = {}
+        for name, expression in FACETS.items():
+            facets[name] = [
+                {"value": value, "count": count}
+                for value, count in conn.execute(
+                    f"SELECT {expression} AS value, COUNT(*) AS n FROM complaints c{where} "
+                    f"GROUP BY value ORDER BY n DESC LIMIT {FACET_LIMIT}", params)
+            ]
+        cache[key] = (generation, (total, facets))
+        while len(cache) > FACET_CACHE_SIZE:
+            cache.popitem(last=False)
+        return total, facets
+
+    def _changed(self):
+        self._local.writes = getattr(self._local, "writes", 0) + 1
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM complaints").fetchone()[0]
+
+
+def rebuild(index, batch_size=5000):
+    """Re-index every complaint in the local store and archive (with recorded updates applied)"""
+    from complaint_store import store
+
+    records = store.all_complaints().to_dict(orient="records")
+    for start in range(0, len(records), batch_size):
+        index.index_complaints(records[start:start + batch_size])
+        print(f"📊 {min(start + batch_size, len(records))} / {len(records)} complaints indexed")
+    print(f"✅ Search index holds {index.count()} complaints")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Complaint search index maintenance")
+    parser.add_argument("command", choices=["rebuild", "search"])
+    parser.add_argument("--db", default="search_index.db")
+    parser.add_argument("--query", default="")
+    args = parser.parse_args()
+
+    search_index = SearchIndex(args.db)
+    if args.command == "rebuild":
+        rebuild(search_index)
+    else:
+        found = search_index.search(args.query)
+        print(f"🔍 {found['total']} matches")
+        for result in found["results"]:
+            print(f"   {result['ref_no']} {result['date']} {result['department']} / {result['city']}: {result['snippet']}")
@@ -64,40 +64,103 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // API function for programmatic access
+    // Each call aborts the previous in-flight request and carries a sequence
+    // number so the server can also drop requests overtaken by newer ones.
+    let classifySeq = 0;
+    let classifyController = null;
     window.classifyComplaint = function(complaintText) {
+        if (classifyController) {
+            classifyController.abort();
+        }
+        classifyController = new AbortController();
+        const seq = ++classifySeq;
         return fetch('/api/classify', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
-                complaint: complaintText
-            })
+                complaint: complaintText,
+                seq: seq
+            }),
+            signal: classifyController.signal
         })
         .then(response => response.json())
+        .then(data => (data.stale || seq !== classifySeq) ? { stale: true } : data)
         .catch(error => {
+            if (error.name === 'AbortError') {
+                return { stale: true };
+            }
             console.error('Error:', error);
             return { error: 'Network error occurred' };
         });
     };
 
-    // Table search functionality for history page
+    // Live department suggestion whenever the user pauses typing
+    const suggestion = document.getElementById('departmentSuggestion');
+    if (complaintTextarea && suggestion) {
+        let classifyTimer = null;
+        complaintTextarea.addEventListener('input', function() {
+            clearTimeout(classifyTimer);
+            const text = complaintTextarea.value.trim();
+            if (text.length < 10) {
+                suggestion.textContent = '';
+                return;
+            }
+            classifyTimer = setTimeout(function() {
+                window.classifyComplaint(text).then(function(data) {
+                    if (data.stale || data.error) {
+                        return;
+                    }
+                    const confidence = data.probability !== null
+                        ? ` (${Math.round(data.probability * 100)}% confidence)` : '';
+                    suggestion.textContent = `Likely department: ${data.department}${confidence}`;
+                });
+            }, 400);
+        });
+    }
+
+    // Live transaction status pushed by the server (see /events/complaint/<ref>)
+    document.querySelectorAll('[data-chain-status]').forEach(function(badge) {
+        if (!window.EventSource) {
+            return;
+        }
+        const refNo = badge.getAttribute('data-chain-status');
+        const source = new EventSource(`/events/complaint/${encodeURIComponent(refNo)}`);
+        const styles = {
+            pending: 'bg-secondary',
+            mined: 'bg-info',
+            confirmed: 'bg-success',
+            failed: 'bg-danger'
+        };
+        source.addEventListener('status', function(e) {
+            const data = JSON.parse(e.data);
+            if (data.state === 'unavailable') {
+                source.close();
+                return;
+            }
+            badge.className = `badge ${styles[data.state] || 'bg-secondary'}`;
+            if (data.state === 'pending') {
+                badge.textContent = 'Pending';
+            } else if (data.state === 'failed') {
+                badge.textContent = 'Failed';
+            } else {
+                badge.textContent = `${data.state === 'confirmed' ? 'Confirmed' : 'Mined'} ` +
+                    `(${data.confirmations}/${data.required_confirmations} confirmations)`;
+            }
+            if (data.state === 'confirmed' || data.state === 'failed') {
+                source.close();
+            }
+        });
+    });
+
+    // Search box on the history page filters server-side: submit after the user pauses typing
     const searchInput = document.getElementById('searchComplaints');
-    if (searchInput) {
+    if (searchInput && searchInput.form) {
+        let searchTimer = null;
         searchInput.addEventListener('input', function() {
-            const filter = this.value.toLowerCase();
-            const rows = document.querySelectorAll('tbody tr');
-            
-            rows.forEach(row => {
-                const complaintText = row.cells[1].textContent.toLowerCase();
-                const department = row.cells[2].textContent.toLowerCase();
-                
-                if (complaintText.includes(filter) || department.includes(filter)) {
-                    row.style.display = '';
-                } else {
-                    row.style.display = 'none';
-                }
-            });
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => searchInput.form.submit(), 500);
         });
     }
 });
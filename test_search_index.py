@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Query-plan checks for the admin search index
+
+A text query combined with a facet filter must be driven by the FTS match;
+if a facet index drives the join, SQLite rescans the FTS table once per
+complaint of that facet value and the search becomes quadratic.
+
+    python -m pytest -q test_search_index.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from search_index import SearchIndex
+
+WORDS = ["water", "leak", "road", "pothole", "garbage", "street", "light", "noise"]
+CITIES = ["Pune", "Delhi", "Goa"]
+
+
+def build_index(path, count=3000):
+    index = SearchIndex(str(path))
+    index.index_complaints([{
+        "Reference No": f"REF{i:05d}",
+        "Department": ["Water", "Roads", "Sanitation"][i % 3],
+        "Status": "Pending",
+        "City": CITIES[i % len(CITIES)],
+        "State": "MH",
+        "Date": f"2025-0{i % 9 + 1}-01 10:00:00",
+        "Complaint": " ".join(WORDS[(i + k) % len(WORDS)] for k in range(3))
+    } for i in range(count)])
+    return index
+
+
+def traced_plans(index, **search_args):
+    """Run a search and return (sql, top-level plan steps) for every SELECT it issued"""
+    conn = index._connect()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        index.search(**search_args)
+    finally:
+        conn.set_trace_callback(None)
+    plans = []
+    for sql in statements:
+        if not sql.lstrip().upper().startswith("SELECT"):
+            continue
+        steps = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        plans.append((sql, [detail for _, parent, _, detail in steps if parent == 0]))
+    return plans
+
+
+def test_text_with_facet_filter_is_driven_by_fts(tmp_path):
+    index = build_index(tmp_path / "search.db")
+    plans = traced_plans(index, text="water", city="Pune")
+    assert plans
+    for sql, top_level in plans:
+        fts_steps = [i for i, detail in enumerate(top_level) if "complaint_text" in detail]
+        # The FTS table is either the outer loop or a subquery evaluated once, never an inner loop
+        assert fts_steps in ([], [0]), f"FTS scanned inside a join loop:\n{sql}\n{top_level}"
+
+
+def test_aggregates_skip_fts_without_text(tmp_path):
+    index = build_index(tmp_path / "search.db")
+    plans = traced_plans(index, city="Pune")
+    # Only the result page needs the complaint text for its snippet
+    assert sum("complaint_text" in sql for sql, _ in plans) == 1
+
+
+def test_facets_follow_index_changes(tmp_path):
+    index = build_index(tmp_path / "search.db", count=30)
+    before = index.search("water", city="Pune")
+    index.update_field("REF00000", "Department", "Electricity")
+    after = index.search("water", city="Pune")
+    assert before["total"] == after["total"]
+    assert "Electricity" in [facet["value"] for facet in after["facets"]["department"]]
@@ -9,10 +9,49 @@ import sys
 from web3 import Web3
 from dotenv import load_dotenv
 import json
+from diagnostics import run_probes
 
 # Load environment variables
 load_dotenv()
 
+RPC_TIMEOUT = 10  # seconds per RPC query
+
+_w3 = None
+_chain_facts = None
+
+def get_web3():
+    """One connection shared by every check"""
+    global _w3
+    if _w3 is None:
+        _w3 = Web3(Web3.HTTPProvider(os.getenv('BLOCKCHAIN_NETWORK'), request_kwargs={'timeout': RPC_TIMEOUT}))
+    return _w3
+
+def chain_facts():
+    """Query connection, chain id, latest block and wallet balance concurrently, once"""
+    global _chain_facts
+    if _chain_facts is None:
+        w3 = get_web3()
+        probes = {
+            'connected': lambda: {'value': w3.is_connected()},
+            'chain_id': lambda: {'value': w3.eth.chain_id},
+            'latest_block': lambda: {'value': w3.eth.block_number},
+        }
+        private_key = os.getenv('PRIVATE_KEY')
+        if private_key:
+            address = w3.eth.account.from_key(private_key).address
+            probes['balance'] = lambda: {'value': w3.eth.get_balance(address), 'address': address}
+        _chain_facts = run_probes(probes, RPC_TIMEOUT)
+    return _chain_facts
+
+def chain_fact(name):
+    """Value of one chain query, raising its error if it failed"""
+    result = chain_facts().get(name)
+    if result is None:
+        raise ValueError(f"{name} not available")
+    if result['status'] != 'ok':
+        raise ConnectionError(result.get('error'))
+    return result['value']
+
 def check_environment():
     """Check if all required environment variables are set"""
     print("🔍 Checking environment configuration...")
@@ -42,16 +81,15 @@ def check_network_connection():
     
     try:
         blockchain_network = os.getenv('BLOCKCHAIN_NETWORK')
-        w3 = Web3(Web3.HTTPProvider(blockchain_network))
         
-        if not w3.is_connected():
+        if not chain_facts()['connected'].get('value'):
             print("❌ Failed to connect to blockchain network")
             print(f"Network URL: {blockchain_network}")
             return False
         
         # Get network info
-        chain_id = w3.eth.chain_id
-        latest_block = w3.eth.block_number
+        chain_id = chain_fact('chain_id')
+        latest_block = chain_fact('latest_block')
         
         network_names = {
             1: "Ethereum Mainnet",
@@ -82,19 +120,14 @@ def check_wallet_balance():
     print("💰 Checking wallet balance...")
     
     try:
-        blockchain_network = os.getenv('BLOCKCHAIN_NETWORK')
-        private_key = os.getenv('PRIVATE_KEY')
-        
-        w3 = Web3(Web3.HTTPProvider(blockchain_network))
-        account = w3.eth.account.from_key(private_key)
-        
-        balance = w3.eth.get_balance(account.address)
+        w3 = get_web3()
+        balance = chain_fact('balance')
         balance_eth = w3.from_wei(balance, 'ether')
         
-        print(f"👤 Wallet Address: {account.address}")
+        print(f"👤 Wallet Address: {chain_facts()['balance']['address']}")
         print(f"💸 Balance: {balance_eth:.6f} ETH")
         
-        chain_id = w3.eth.chain_id
+        chain_id = chain_fact('chain_id')
         
         if balance_eth < 0.01:
             print("⚠️  Low balance! You need more ETH for gas fees.")
@@ -123,8 +156,7 @@ def estimate_deployment_cost():
     print("⛽ Estimating deployment cost...")
     
     try:
-        blockchain_network = os.getenv('BLOCKCHAIN_NETWORK')
-        w3 = Web3(Web3.HTTPProvider(blockchain_network))
+        w3 = get_web3()
         
         # Estimate gas (rough estimate)
         estimated_gas = 2500000  # Typical contract deployment
@@ -1,10 +1,10 @@
 import pandas as pd
-import pickle
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import SGDClassifier
 from sklearn.metrics import accuracy_score, classification_report
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from model_registry import ModelRegistry
 
 def train_model():
     print("📂 Loading dataset...")
@@ -48,17 +48,14 @@ def train_model():
     print("\n📄 Classification Report:")
     print(classification_report(y_test, y_pred))
 
-    # Save model & embedding model
-    with open('complaint_model.pkl', 'wb') as f:
-        pickle.dump(model, f)
-
+    # Save embedding model, then publish model & classes as a new registry version
     emb_model.save("embedding_model")
 
-    # Save classes for future incremental updates in app.py
-    with open('classes.pkl', 'wb') as f:
-        pickle.dump(classes, f)
+    registry = ModelRegistry()
+    version = registry.publish(model, classes, note=f"train_model accuracy={accuracy_score(y_test, y_pred):.3f}")
 
-    print("✅ Model, embedding model, and classes saved successfully!")
+    print(f"✅ Embedding model saved and classifier published as {version}!")
+    print("🔄 Running app workers switch to it automatically")
 
 if __name__ == "__main__":
     train_model()
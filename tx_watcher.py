@@ -0,0 +1,144 @@
+"""
+Shared blockchain transaction watcher
+
+One background thread per process follows every transaction somebody is
+interested in (freshly sent submissions and any ref a browser subscribes to)
+and pushes state changes to subscriber queues:
+
+    pending -> mined (1 confirmation) -> ... -> confirmed (N confirmations)
+
+Each poll costs one block-number call plus one receipt call per still-unmined
+transaction, no matter how many browsers are watching.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+MINED = "mined"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+FINAL_STATES = (CONFIRMED, FAILED)
+
+
+def normalize_tx_hash(tx_hash):
+    tx_hash = str(tx_hash).strip()
+    return tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+
+
+class TransactionWatcher:
+    def __init__(self, blockchain_manager, required_confirmations=3, poll_interval=4.0,
+                 give_up_after=1800, on_final=None):
+        self.blockchain_manager = blockchain_manager
+        self.required_confirmations = required_confirmations
+        self.poll_interval = poll_interval
+        self.give_up_after = give_up_after
+        self.on_final = on_final
+        self._tracked = {}
+        self._subscribers = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def watch(self, ref_no, tx_hash):
+        """Start following tx_hash for ref_no (no-op if it is already followed)"""
+        with self._cond:
+            if ref_no not in self._tracked:
+                self._tracked[ref_no] = {
+                    "ref_no": ref_no,
+                    "tx_hash": normalize_tx_hash(tx_hash),
+                    "state": PENDING,
+                    "block_number": None,
+                    "confirmations": 0,
+                    "required_confirmations": self.required_confirmations,
+                    "since": time.monotonic()
+                }
+                metrics.WATCHED_TRANSACTIONS.set(len(self._tracked))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tx-watcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def subscribe(self, ref_no, tx_hash=None):
+        """Return a queue receiving status events for ref_no, primed with the current state"""
+        q = queue.Queue()
+        with self._cond:
+            self._subscribers.setdefault(ref_no, []).append(q)
+            entry = self._tracked.get(ref_no)
+            if entry is not None:
+                q.put(self._event(entry))
+        if entry is None and tx_hash:
+            self.watch(ref_no, tx_hash)
+            with self._cond:
+                entry = self._tracked.get(ref_no)
+                if entry is not None:
+                    q.put(self._event(entry))
+        return q
+
+    def unsubscribe(self, ref_no, q):
+        with self._cond:
+            subscribers = self._subscribers.get(ref_no, [])
+            if q in subscribers:
+                subscribers.remove(q)
+            if not subscribers:
+                self._subscribers.pop(ref_no, None)
+
+    @staticmethod
+    def _event(entry):
+        return {key: value for key, value in entry.items() if key != "since"}
+
+    def _publish(self, entry):
+        event = self._event(entry)
+        with self._cond:
+            subscribers = list(self._subscribers.get(entry["ref_no"], []))
+        for q in subscribers:
+            q.put(event)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._tracked:
+                    self._cond.wait()
+                entries = list(self._tracked.values())
+            self._poll(entries)
+            time.sleep(self.poll_interval)
+
+    def _poll(self, entries):
+        latest_block = self.blockchain_manager.get_block_number()
+        if latest_block is None:
+            return
+
+        for entry in entries:
+            previous = (entry["state"], entry["confirmations"])
+            if entry["block_number"] is None:
+                receipt = self.blockchain_manager.get_transaction_receipt(entry["tx_hash"])
+                if receipt is not None:
+                    entry["block_number"] = receipt.blockNumber
+                    if receipt.status != 1:
+                        entry["state"] = FAILED
+
+            if entry["block_number"] is not None and entry["state"] != FAILED:
+                entry["confirmations"] = max(latest_block - entry["block_number"] + 1, 1)
+                if entry["confirmations"] >= self.required_confirmations:
+                    entry["state"] = CONFIRMED
+                else:
+                    entry["state"] = MINED
+
+            if (entry["state"], entry["confirmations"]) != previous:
+                self._publish(entry)
+
+            timed_out = entry["state"] == PENDING and time.monotonic() - entry["since"] > self.give_up_after
+            if entry["state"] in FINAL_STATES or timed_out:
+                with self._cond:
+                    self._tracked.pop(entry["ref_no"], None)
+                    metrics.WATCHED_TRANSACTIONS.set(len(self._tracked))
+                if self.on_final and not timed_out:
+                    try:
+                        self.on_final(self._event(entry))
+                    except Exception as e:
+                        logger.error("Error handling final transaction state: %s", e, extra={"ref_no": entry["ref_no"]})
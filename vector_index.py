@@ -0,0 +1,280 @@
+"""
+Embedding vector index for duplicate and related complaint detection
+
+Complaint embeddings are L2-normalized and stored as float16 in fixed-size
+records (reference number + vector), one append-only file per
+(department, city) partition. Readers memory-map the partition files, so a
+top-k cosine query is a dot product over only the partitions that can
+match, with no per-complaint Python objects. Files are shared by every
+worker process; appends go through the same FileLock as the CSV writers.
+When a complaint changes department its record is moved: the old record's
+reference is blanked in place (a tombstone readers skip) and the vector is
+appended to the new (department, city) partition.
+
+    python vector_index.py backfill            # index complaints.csv
+    python vector_index.py clusters --department Electricity --city Pune
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from complaint_writer import FileLock
+
+DEFAULT_DIM = 384
+REF_BYTES = 24
+SCAN_BLOCK = 65536
+
+
+def partition_key(department, city):
+    return (str(department or "").strip().lower(), str(city or "").strip().lower())
+
+
+class VectorIndex:
+    def __init__(self, directory="vector_index", dim=DEFAULT_DIM):
+        self.directory = directory
+        self.dim = dim
+        self.dtype = np.dtype([("ref", f"S{REF_BYTES}"), ("vec", "<f2", (dim,))])
+        self._partitions = {}  # key -> {"path", "department", "city"}
+        self._maps = {}  # path -> (size, memmap)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _partition_path(self, key):
+        digest = hashlib.sha1("\x1f".join(key).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{digest}.f16")
+
+    def _discover(self):
+        """Pick up partitions created by other processes"""
+        for meta_path in glob.glob(os.path.join(self.directory, "*.json")):
+            path = meta_path[:-len(".json")] + ".f16"
+            if any(p["path"] == path for p in self._partitions.values()):
+                continue
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            key = partition_key(meta["department"], meta["city"])
+            self._partitions[key] = {"path": path, "department": meta["department"], "city": meta["city"]}
+
+    def _records(self, path):
+        """Memory-mapped records of a partition, remapped when the file has grown"""
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        count = size // self.dtype.itemsize
+        cached = self._maps.get(path)
+        if cached and cached[0] == count:
+            return cached[1]
+        records = np.memmap(path, dtype=self.dtype, mode="r", shape=(count,)) if count else None
+        self._maps[path] = (count, records)
+        return records
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add(self, ref_no, department, city, vector):
+        """Append one complaint embedding to its (department, city) partition"""
+        self.add_many([(ref_no, department, city, vector)])
+
+    def add_many(self, items):
+        """Append [(ref_no, department, city, vector), ...], one write per partition"""
+        grouped = {}
+        for ref_no, department, city, vector in items:
+            grouped.setdefault(partition_key(department, city), []).append((ref_no, department, city, vector))
+
+        for key, rows in grouped.items():
+            path = self._partition_path(key)
+            records = np.zeros(len(rows), dtype=self.dtype)
+            records["ref"] = [str(ref_no).encode("ascii")[:REF_BYTES] for ref_no, _, _, _ in rows]
+            records["vec"] = np.vstack([self._normalize(vector) for _, _, _, vector in rows])
+            with FileLock(path):
+                meta_path = path[:-len(".f16")] + ".json"
+                if not os.path.exists(meta_path):
+                    with open(meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"department": rows[0][1], "city": rows[0][2]}, f)
+                with open(path, "ab") as f:
+                    # Drop a torn record left by a crashed writer so every record stays aligned
+                    f.truncate(f.tell() - f.tell() % self.dtype.itemsize)
+                    f.write(records.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            with self._lock:
+                self._partitions.setdefault(key, {"path": path, "department": rows[0][1], "city": rows[0][2]})
+
+    def reassign(self, moves):
+        """Move complaints to new departments: [(ref_no, new_department), ...]
+
+        One pass over every partition finds the moved records; each is appended
+        to the (new department, same city) partition, then tombstoned in place.
+        """
+        targets = {str(ref_no).encode("ascii")[:REF_BYTES]: department for ref_no, department in moves}
+        if not targets:
+            return 0
+        with self._lock:
+            self._discover()
+            partitions = list(self._partitions.items())
+
+        moved = 0
+        for key, info in partitions:
+            with self._lock:
+                records = self._records(info["path"])
+            if records is None:
+                continue
+            positions = np.flatnonzero(np.isin(records["ref"], list(targets)))
+            positions = [i for i in positions if partition_key(targets[records["ref"][i]], "")[0] != key[0]]
+            if not positions:
+                continue
+            # Append first: a crash in between leaves a duplicate record, never a lost one
+            self.add_many([(records["ref"][i].decode("ascii"), targets[records["ref"][i]], info["city"],
+                            records["vec"][i].astype(np.float32)) for i in positions])
+            with FileLock(info["path"]), open(info["path"], "r+b") as f:
+                for i in positions:
+                    f.seek(int(i) * self.dtype.itemsize)
+                    f.write(b"\0" * REF_BYTES)
+                f.flush()
+                os.fsync(f.fileno())
+            moved += len(positions)
+        return moved
+
+    def search(self, vector, department=None, city=None, top_k=5, min_score=0.0, exclude=()):
+        """Top-k most similar complaints as [{"ref_no", "score", "department", "city"}], best first
+
+        department / city restrict the scan to matching partitions; None means any.
+        """
+        query = self._normalize(vector)
+        want_dept = None if department is None else partition_key(department, "")[0]
+        want_city = None if city is None else partition_key("", city)[1]
+        exclude = set(exclude)
+
+        with self._lock:
+            self._discover()
+            candidates = []
+            for key, info in self._partitions.items():
+                if (want_dept is not None and key[0] != want_dept) or (want_city is not None and key[1] != want_city):
+                    continue
+                records = self._records(info["path"])
+                if records is None:
+                    continue
+                for start in range(0, len(records), SCAN_BLOCK):
+                    block = records[start:start + SCAN_BLOCK]
+                    # Stored as float16 to halve the files; CPUs multiply float32 far faster
+                    scores = block["vec"].astype(np.float32) @ query
+                    scores[block["ref"] == b""] = -np.inf  # moved to another partition
+                    keep = min(top_k + len(exclude), len(scores))
+                    best = np.argpartition(scores, -keep)[-keep:]
+                    for i in best:
+                        if scores[i] >= min_score:
+                            candidates.append((float(scores[i]), block["ref"][i].decode("ascii"), info))
+
+        results = []
+        for score, ref_no, info in sorted(candidates, key=lambda c: -c[0]):
+            if ref_no in exclude:
+                continue
+            results.append({"ref_no": ref_no, "score": round(score, 4),
+                            "department": info["department"], "city": info["city"]})
+            if len(results) >= top_k:
+                break
+        return results
+
+    def clusters(self, department, city, threshold=0.85, min_size=2):
+        """Group a partition into incidents with single-pass leader clustering
+
+        Each complaint is compared against the current cluster leaders only, so
+        the cost grows with complaints x incidents rather than complaints squared.
+        """
+        key = partition_key(department, city)
+        with self._lock:
+            self._discover()
+            info = self._partitions.get(key)
+            records = self._records(info["path"]) if info else None
+        if records is None:
+            return []
+
+        leaders = np.empty((0, self.dim), dtype=np.float32)
+        members = []
+        for start in range(0, len(records), SCAN_BLOCK):
+            block = records[start:start + SCAN_BLOCK]
+            vectors = block["vec"].astype(np.float32)
+            for ref, vector in zip(block["ref"], vectors):
+                if not ref:
+                    continue
+                if len(leaders):
+                    scores = leaders @ vector
+                    best = int(scores.argmax())
+                    if scores[best] >= threshold:
+                        members[best].append(ref.decode("ascii"))
+                        continue
+                leaders = np.vstack([leaders, vector])
+                members.append([ref.decode("ascii")])
+        groups = [group for group in members if len(group) >= min_size]
+        return sorted(groups, key=len, reverse=True)
+
+    def stats(self):
+        with self._lock:
+            self._discover()
+            partitions = list(self._partitions.values())
+        with self._lock:
+            records = [(info, self._records(info["path"])) for info in partitions]
+        return [{"department": info["department"], "city": info["city"],
+                 "complaints": int(np.count_nonzero(rows["ref"] != b""))}
+                for info, rows in records if rows is not None]
+
+
+def backfill(index, complaints_path="complaints.csv", embedding_model_path="embedding_model",
+             batch_size=256, chunk_size=20000):
+    """Index every stored complaint (encoding in-process, in length-sorted batches)"""
+    import pandas as pd
+    from sentence_transformers import SentenceTransformer
+    from reclassify import length_sorted_batches
+
+    print("📂 Loading embedding model...")
+    encoder = SentenceTransformer(embedding_model_path)
+    total = 0
+    for chunk in pd.read_csv(complaints_path, dtype=str, keep_default_na=False, on_bad_lines="skip",
+                             chunksize=chunk_size, usecols=["Reference No", "Complaint", "Department", "City"]):
+        chunk = chunk[chunk["Complaint"].str.strip() != ""]
+        if chunk.empty:
+            continue
+        texts = chunk["Complaint"].tolist()
+        order, batches = length_sorted_batches(texts, batch_size)
+        embeddings = np.empty((len(texts), index.dim), dtype=np.float32)
+        embeddings[order] = np.vstack([encoder.encode(batch) for _, batch in batches])
+        index.add_many(zip(chunk["Reference No"], chunk["Department"], chunk["City"], embeddings))
+        total += len(chunk)
+        print(f"📊 {total} complaints indexed")
+    print(f"✅ Indexed {total} complaints into {index.directory}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Complaint embedding index maintenance")
+    parser.add_argument("--index-dir", default="vector_index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("backfill", help="Index complaints.csv (run once on an empty index)")
+    build.add_argument("--complaints", default="complaints.csv")
+    build.add_argument("--embedding-model", default="embedding_model")
+    group = commands.add_parser("clusters", help="List incidents reported by several complaints")
+    group.add_argument("--department", required=True)
+    group.add_argument("--city", default="")
+    group.add_argument("--threshold", type=float, default=0.85)
+    commands.add_parser("stats", help="Show partition sizes")
+    args = parser.parse_args()
+
+    vector_index = VectorIndex(args.index_dir)
+    if args.command == "backfill":
+        backfill(vector_index, args.complaints, args.embedding_model)
+    elif args.command == "clusters":
+        incidents = vector_index.clusters(args.department, args.city, args.threshold)
+        print(f"🔍 {len(incidents)} incidents with more than one complaint")
+        for refs in incidents:
+            print(f"   {len(refs)} complaints: {', '.join(refs[:10])}{' ...' if len(refs) > 10 else ''}")
+    else:
+        for partition in sorted(vector_index.stats(), key=lambda p: -p["complaints"]):
+            print(f"   {partition['department']} / {partition['city'] or '(no city)'}: {partition['complaints']}")